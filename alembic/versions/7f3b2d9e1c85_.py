@@ -0,0 +1,45 @@
+"""empty message
+
+Revision ID: 7f3b2d9e1c85
+Revises: 5a1c8e3f9d72
+Create Date: 2026-10-20 10:14:27.903516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3b2d9e1c85'
+down_revision: Union[str, None] = '5a1c8e3f9d72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TABLES = ('tasks', 'reminders')
+
+
+def upgrade() -> None:
+    # На базах, где search_vector создавалась вычисляемой, она становится обычной колонкой
+    # без перезаписи таблицы: значения остаются, дальше их поддерживает триггер
+    for table in SEARCH_TABLES:
+        op.execute(sa.text(f'ALTER TABLE {table} ALTER COLUMN search_vector DROP EXPRESSION IF EXISTS'))
+
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION set_search_vector() RETURNS trigger AS $$ "
+        "BEGIN NEW.search_vector := to_tsvector('russian', NEW.description); RETURN NEW; END "
+        "$$ LANGUAGE plpgsql"
+    ))
+    for table in SEARCH_TABLES:
+        op.execute(sa.text(
+            f'CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF description ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION set_search_vector()'
+        ))
+    # Старые строки заполняются онлайн-миграцией (см. backfill/steps.py)
+
+
+def downgrade() -> None:
+    for table in SEARCH_TABLES:
+        op.execute(sa.text(f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}'))
+    op.execute(sa.text('DROP FUNCTION IF EXISTS set_search_vector()'))
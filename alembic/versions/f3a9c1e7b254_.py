@@ -0,0 +1,93 @@
+"""empty message
+
+Revision ID: f3a9c1e7b254
+Revises: d2f8b4a6c917
+Create Date: 2026-10-19 20:41:09.318447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.config import BOT_TOKEN, BOT_TOKENS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c1e7b254'
+down_revision: Union[str, None] = 'd2f8b4a6c917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Существующие строки принадлежат боту, который работал до перехода на несколько токенов:
+# BOT_TOKEN, а если задан только BOT_TOKENS — первому из них
+LEGACY_BOT_TOKEN = BOT_TOKEN or (BOT_TOKENS[0] if BOT_TOKENS else None)
+
+SCOPED_TABLES = ('users', 'categories', 'tasks', 'reminders', 'broadcasts')
+USER_TABLES = ('categories', 'tasks', 'reminders')
+
+
+def get_legacy_bot_id() -> int:
+    if not LEGACY_BOT_TOKEN:
+        raise RuntimeError("Не задан BOT_TOKEN или BOT_TOKENS: неизвестно, какому боту принадлежат существующие данные")
+    return int(LEGACY_BOT_TOKEN.split(":")[0])
+
+
+def upgrade() -> None:
+    legacy_bot_id = get_legacy_bot_id()
+    for table in SCOPED_TABLES:
+        op.add_column(table, sa.Column('bot_id', sa.BigInteger(), server_default=str(legacy_bot_id), nullable=False))
+        op.alter_column(table, 'bot_id', server_default=None)
+
+    # Ключ users.user_id и все ссылки на него заменяются составными (bot_id, user_id).
+    # Уникальные ограничения на users.user_id создавались без имени, поэтому ищем их в каталоге
+    op.execute(sa.text(
+        "DO $$ DECLARE constraint_name text; BEGIN "
+        "FOR constraint_name IN SELECT conname FROM pg_constraint "
+        "WHERE conrelid = 'users'::regclass AND contype IN ('p', 'u') LOOP "
+        "EXECUTE format('ALTER TABLE users DROP CONSTRAINT %I CASCADE', constraint_name); "
+        "END LOOP; END $$"
+    ))
+    op.create_primary_key('users_pkey', 'users', ['bot_id', 'user_id'])
+    for table in USER_TABLES:
+        op.create_foreign_key(f'{table}_bot_id_user_id_fkey', table, 'users', ['bot_id', 'user_id'], ['bot_id', 'user_id'])
+
+    op.drop_constraint('uq_user_category_name', 'categories', type_='unique')
+    op.create_unique_constraint('uq_user_category_name', 'categories', ['bot_id', 'user_id', 'name'])
+
+    op.drop_index('ix_users_user_id_active', table_name='users', postgresql_where=sa.text('is_active'))
+    op.create_index('ix_users_bot_id_user_id_active', 'users', ['bot_id', 'user_id'], unique=False, postgresql_where=sa.text('is_active'))
+
+    # Прогресс рассылок и хеш команд меню теперь хранятся для каждого бота отдельно
+    op.execute(sa.text(
+        "UPDATE bot_state SET key = key || ':' || :bot_id "
+        "WHERE key LIKE 'fan_out:%' OR key = 'menu_commands_hash'"
+    ).bindparams(bot_id=str(legacy_bot_id)))
+
+
+def downgrade() -> None:
+    legacy_bot_id = get_legacy_bot_id()
+    op.execute(sa.text(
+        "UPDATE bot_state SET key = left(key, length(key) - length(:suffix)) "
+        "WHERE key LIKE '%' || :suffix"
+    ).bindparams(suffix=f':{legacy_bot_id}'))
+
+    op.drop_index('ix_users_bot_id_user_id_active', table_name='users', postgresql_where=sa.text('is_active'))
+    op.create_index('ix_users_user_id_active', 'users', ['user_id'], unique=False, postgresql_where=sa.text('is_active'))
+
+    op.drop_constraint('uq_user_category_name', 'categories', type_='unique')
+    op.create_unique_constraint('uq_user_category_name', 'categories', ['user_id', 'name'])
+
+    # Данные других ботов в схеме с одним ботом не помещаются
+    for table in ('tasks', 'reminders', 'categories', 'users', 'broadcasts'):
+        op.execute(sa.text(f"DELETE FROM {table} WHERE bot_id <> :bot_id").bindparams(bot_id=legacy_bot_id))
+
+    for table in USER_TABLES:
+        op.drop_constraint(f'{table}_bot_id_user_id_fkey', table, type_='foreignkey')
+    op.drop_constraint('users_pkey', 'users', type_='primary')
+    op.create_primary_key('users_pkey', 'users', ['user_id'])
+    for table in USER_TABLES:
+        op.create_foreign_key(f'{table}_user_id_fkey', table, 'users', ['user_id'], ['user_id'])
+
+    for table in SCOPED_TABLES:
+        op.drop_column(table, 'bot_id')
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Бенчмарки запускаются из корня репозитория (python -m benchmarks.<name>),
+# а код бота, как и в Dockerfile, ожидает src в PYTHONPATH.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+for path in (ROOT_DIR, SRC_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,185 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict
+
+from aiohttp import web
+
+BENCH_BOT_ID = 123456
+BENCH_BOT_TOKEN = f"{BENCH_BOT_ID}:BENCHMARK-TOKEN"
+
+
+class FakeBotApi:
+    """Локальная подмена Telegram Bot API.
+
+    Отдаёт апдейты виртуальных пользователей через getUpdates, принимает ответы
+    бота (sendMessage, editMessageText, answerCallbackQuery) и замеряет время
+    от выдачи апдейта боту до его ответа в тот же чат.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081):
+        self.host = host
+        self.port = port
+
+        self._pending_updates: list[dict] = []
+        self._updates_available = asyncio.Condition()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+
+        self._delivered_at: dict[int, float] = {}
+        self._reply_waiters: dict[int, asyncio.Future] = {}
+
+        self.last_message: dict[int, dict] = {}
+        self.last_markup: dict[int, dict] = {}
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.calls: dict[str, int] = defaultdict(int)
+
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # ==============================
+    # Апдейты от виртуальных пользователей
+    # ==============================
+
+    async def push_text(self, user: dict, text: str) -> asyncio.Future:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user["id"], "type": "private"},
+            "from": user,
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return await self._push(user["id"], {"message": message})
+
+    async def push_callback(self, user: dict, data: str) -> asyncio.Future:
+        callback_query = {
+            "id": str(next(self._callback_ids)),
+            "from": user,
+            "chat_instance": str(user["id"]),
+            "data": data,
+            "message": self.last_message.get(user["id"]) or {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user["id"], "type": "private"},
+                "text": "",
+            },
+        }
+        return await self._push(user["id"], {"callback_query": callback_query})
+
+    async def _push(self, chat_id: int, update: dict) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        self._reply_waiters[chat_id] = waiter
+
+        async with self._updates_available:
+            self._pending_updates.append({"update_id": next(self._update_ids), **update})
+            self._updates_available.notify_all()
+
+        return waiter
+
+    # ==============================
+    # Методы Bot API
+    # ==============================
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        payload = dict(await request.post())
+
+        handler = getattr(self, f"_method_{method}", None)
+        result = await handler(payload) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def _method_getMe(self, payload: dict) -> dict:
+        return {"id": BENCH_BOT_ID, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+
+    async def _method_getUpdates(self, payload: dict) -> list[dict]:
+        offset = int(payload.get("offset") or 0)
+        timeout = float(payload.get("timeout") or 0)
+        limit = int(payload.get("limit") or 100)
+
+        async with self._updates_available:
+            self._pending_updates = [u for u in self._pending_updates if u["update_id"] >= offset]
+            if not self._pending_updates and timeout:
+                try:
+                    await asyncio.wait_for(self._updates_available.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            updates = self._pending_updates[:limit]
+
+        now = time.perf_counter()
+        for update in updates:
+            chat_id = self._get_chat_id(update)
+            self._delivered_at.setdefault(chat_id, now)
+        return updates
+
+    async def _method_sendMessage(self, payload: dict) -> dict:
+        chat_id = int(payload["chat_id"])
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": payload.get("text", ""),
+        }
+        self._reply(chat_id, "sendMessage", message, payload)
+        return message
+
+    async def _method_editMessageText(self, payload: dict) -> dict:
+        chat_id = int(payload["chat_id"])
+        message = {
+            "message_id": int(payload["message_id"]),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": payload.get("text", ""),
+        }
+        self._reply(chat_id, "editMessageText", message, payload)
+        return message
+
+    async def _method_answerCallbackQuery(self, payload: dict) -> bool:
+        return True
+
+    def _reply(self, chat_id: int, method: str, message: dict, payload: dict) -> None:
+        self.last_message[chat_id] = message
+        if payload.get("reply_markup"):
+            self.last_markup[chat_id] = json.loads(payload["reply_markup"])
+
+        delivered_at = self._delivered_at.pop(chat_id, None)
+        if delivered_at is not None:
+            self.latencies[method].append(time.perf_counter() - delivered_at)
+
+        waiter = self._reply_waiters.pop(chat_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(message)
+
+    @staticmethod
+    def _get_chat_id(update: dict) -> int:
+        if "message" in update:
+            return update["message"]["chat"]["id"]
+        return update["callback_query"]["from"]["id"]
+
+    def find_callbacks(self, chat_id: int, prefix: str) -> list[str]:
+        """Возвращает callback_data кнопок последней клавиатуры с заданным префиксом."""
+        markup = self.last_markup.get(chat_id) or {}
+        return [
+            button["callback_data"]
+            for row in markup.get("inline_keyboard", [])
+            for button in row
+            if button.get("callback_data", "").startswith(prefix)
+        ]
@@ -0,0 +1,185 @@
+"""Нагрузочный тест бота без Telegram.
+
+Поднимает локальную подмену Bot API, заполняет Postgres синтетическими
+пользователями и гоняет через настоящий Dispatcher сценарии нажатий от
+N виртуальных пользователей.
+
+Запуск из корня репозитория (нужна локальная база с применёнными миграциями):
+
+    python -m benchmarks.load_test --users 1000 --virtual-users 200 --flows 5
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from aiogram import Bot, BaseMiddleware
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+
+from . import stats
+from .fake_bot_api import FakeBotApi, BENCH_BOT_TOKEN
+from .seed import seed_users, reset_bench_data
+
+logger = logging.getLogger(__name__)
+
+REPLY_TIMEOUT = 10
+
+
+class UpdateTimingMiddleware(BaseMiddleware):
+    """Замеряет полное время обработки апдейта диспетчером."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+
+    async def __call__(self, handler, event, data):
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+
+class VirtualUser:
+    """Пользователь, который нажимает кнопки и ждёт ответа бота."""
+
+    def __init__(self, api: FakeBotApi, user_id: int):
+        self.api = api
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"Bench {user_id}", "username": f"bench_{user_id}"}
+        self.timeouts = 0
+
+    async def _wait(self, waiter: asyncio.Future) -> bool:
+        try:
+            await asyncio.wait_for(waiter, REPLY_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return False
+
+    async def send(self, text: str) -> bool:
+        return await self._wait(await self.api.push_text(self.user, text))
+
+    async def click(self, data: str) -> bool:
+        return await self._wait(await self.api.push_callback(self.user, data))
+
+    async def click_any(self, prefix: str) -> bool:
+        callbacks = self.api.find_callbacks(self.user["id"], prefix)
+        return bool(callbacks) and await self.click(random.choice(callbacks))
+
+    # ==============================
+    # Сценарии
+    # ==============================
+
+    async def browse_tasks(self) -> None:
+        await self.send("/start")
+        await self.click("main_menu_pressed")
+        await self.click("tasks_pressed")
+        await self.click("get_task_pressed")
+
+    async def add_task(self) -> None:
+        await self.click("main_menu_pressed")
+        await self.click("tasks_pressed")
+        await self.click("add_task_pressed")
+        if await self.click_any("category_"):
+            await self.send(f"Купить молоко {random.randint(1, 10_000)}")
+
+    async def delete_task(self) -> None:
+        await self.click("main_menu_pressed")
+        await self.click("tasks_pressed")
+        await self.click("delete_task_pressed")
+        await self.click_any("task_")
+
+    async def add_reminder(self) -> None:
+        await self.click("main_menu_pressed")
+        await self.click("reminders_pressed")
+        await self.click("add_date")
+        date = time.strftime("%d.%m.%Y", time.localtime(time.time() + random.randint(0, 60) * 86400))
+        await self.send(f"{date} День рождения {random.randint(1, 10_000)}")
+
+    async def browse_reminders(self) -> None:
+        await self.click("main_menu_pressed")
+        await self.click("reminders_pressed")
+        await self.click("get_dates_pressed")
+
+    async def run(self, flows: int) -> None:
+        scenarios = [
+            (self.browse_tasks, 4),
+            (self.add_task, 3),
+            (self.delete_task, 1),
+            (self.add_reminder, 1),
+            (self.browse_reminders, 2),
+        ]
+        for _ in range(flows):
+            scenario = random.choices([s for s, _ in scenarios], weights=[w for _, w in scenarios])[0]
+            await scenario()
+
+
+async def run_load_test(args: argparse.Namespace) -> None:
+    from database import engine
+    from main import create_dispatcher
+
+    if args.users:
+        await reset_bench_data(engine)
+        user_ids = await seed_users(
+            engine, args.users,
+            categories_per_user=args.categories,
+            tasks_per_user=args.tasks,
+            reminders_per_user=args.reminders,
+        )
+    else:
+        user_ids = None
+
+    api = FakeBotApi(port=args.port)
+    await api.start()
+
+    bot = Bot(
+        token=BENCH_BOT_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api.base_url)),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    dp = create_dispatcher()
+    timing = UpdateTimingMiddleware()
+    dp.update.outer_middleware(timing)
+    queries = stats.QueryCounter(engine)
+
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+
+    population = user_ids or range(1, args.virtual_users + 1)
+    sample = random.sample(population, min(args.virtual_users, len(population)))
+    virtual_users = [VirtualUser(api, user_id) for user_id in sample]
+
+    with stats.stopwatch() as elapsed:
+        await asyncio.gather(*(user.run(args.flows) for user in virtual_users))
+
+    await dp.stop_polling()
+    await polling
+    await api.stop()
+    await engine.dispose()
+
+    updates = len(timing.latencies)
+    print(f"Апдейтов: {updates} за {elapsed['elapsed']:.2f} с ({updates / elapsed['elapsed']:.1f} апдейтов/с)")
+    print(f"Обработка апдейта: {stats.format_latency(timing.latencies)}")
+    print(f"SQL-запросов на апдейт: {queries.count / max(updates, 1):.2f}")
+    print(f"Действий без ответа за {REPLY_TIMEOUT} с: {sum(user.timeouts for user in virtual_users)}")
+    for method, latencies in sorted(api.latencies.items()):
+        print(f"{method}: {stats.format_latency(latencies)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="сколько синтетических пользователей пересоздать в базе (0 — не трогать базу)")
+    parser.add_argument("--categories", type=int, default=3, help="категорий на пользователя")
+    parser.add_argument("--tasks", type=float, default=10, help="задач на пользователя")
+    parser.add_argument("--reminders", type=float, default=2, help="событий на пользователя")
+    parser.add_argument("--virtual-users", type=int, default=100, help="одновременных виртуальных пользователей")
+    parser.add_argument("--flows", type=int, default=5, help="сценариев на виртуального пользователя")
+    parser.add_argument("--port", type=int, default=8081, help="порт подмены Bot API")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run_load_test(parse_args()))
@@ -0,0 +1,75 @@
+"""Бенчмарк сборки дайджеста напоминаний.
+
+Строит синтетический дайджест (по умолчанию 10 тысяч задач) и сравнивает
+прежнюю сборку строки через += с текущим рендерером, который режет текст
+на сообщения по лимиту Telegram. База данных и Bot API не нужны.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.render_bench --tasks 10000 --categories 20
+"""
+import argparse
+import random
+from types import SimpleNamespace
+
+from . import stats
+
+
+def make_tasks(tasks: int, categories: int, description_length: int) -> list[SimpleNamespace]:
+    category_objects = [SimpleNamespace(name=f"Категория <{index}> & Co") for index in range(categories)]
+    words = ["купить", "молоко", "позвонить", "<маме>", "отчёт", "&", "встреча", "завтра"]
+
+    result = []
+    for index in range(tasks):
+        text = " ".join(random.choices(words, k=description_length // 6))[:description_length]
+        result.append(SimpleNamespace(description=f"{index} {text}", category=random.choice(category_objects)))
+    return result
+
+
+def format_with_concatenation(tasks) -> str:
+    """Прежняя реализация: одна строка без ограничения длины, сборка через +=."""
+    tasks_by_category = {}
+    for task in tasks:
+        tasks_by_category.setdefault(task.category.name, []).append(task.description)
+
+    tasks_message = "<b>Ваши напоминания:</b>\n\n"
+    for category, descriptions in tasks_by_category.items():
+        tasks_message += f"<b>{category}:</b>\n"
+        for idx, description in enumerate(descriptions, start=1):
+            tasks_message += f"{idx}. {description}\n"
+        tasks_message += "\n"
+    return tasks_message
+
+
+def run_render_bench(args: argparse.Namespace) -> None:
+    from handlers.rendering import TELEGRAM_MESSAGE_LIMIT
+    from handlers.utils import format_tasks_by_category
+
+    tasks = make_tasks(args.tasks, args.categories, args.description_length)
+
+    for name, render in (("Сборка через +=", format_with_concatenation), ("Рендерер по частям", format_tasks_by_category)):
+        timings = []
+        for _ in range(args.repeat):
+            with stats.stopwatch() as elapsed:
+                render(tasks)
+            timings.append(elapsed["elapsed"])
+        print(f"{name}: {stats.format_latency(timings)}")
+
+    chunks = format_tasks_by_category(tasks)
+    longest = max(len(chunk) for chunk in chunks)
+    print(f"Сообщений: {len(chunks)}, самое длинное: {longest} символов (лимит {TELEGRAM_MESSAGE_LIMIT})")
+    if longest > TELEGRAM_MESSAGE_LIMIT:
+        raise SystemExit("Рендерер превысил лимит длины сообщения")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000, help="задач в дайджесте")
+    parser.add_argument("--categories", type=int, default=20, help="категорий")
+    parser.add_argument("--description-length", type=int, default=60, help="длина описания задачи")
+    parser.add_argument("--repeat", type=int, default=20, help="повторов замера")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run_render_bench(parse_args())
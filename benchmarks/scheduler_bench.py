@@ -0,0 +1,102 @@
+"""Бенчмарк рассылок планировщика на больших объёмах пользователей.
+
+Заполняет Postgres синтетическими пользователями (от 10 тысяч до миллиона),
+после чего прогоняет настоящие рассылки 20:00 (дайджест задач) и 09:00
+(события на сегодня) через подмену Bot API.
+
+Запуск из корня репозитория (нужна локальная база с применёнными миграциями):
+
+    python -m benchmarks.scheduler_bench --users 100000 --distribution exponential
+"""
+import argparse
+import asyncio
+import logging
+import resource
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+
+from . import stats
+from .fake_bot_api import FakeBotApi, BENCH_BOT_TOKEN
+from .seed import DISTRIBUTIONS, seed_users, reset_bench_data
+
+logger = logging.getLogger(__name__)
+
+
+def get_peak_rss_mb() -> float:
+    # На Linux ru_maxrss возвращается в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def measure(name: str, job, api: FakeBotApi, queries: stats.QueryCounter) -> None:
+    sends_before = api.calls["sendMessage"]
+    queries_before = queries.count
+
+    with stats.stopwatch() as elapsed:
+        await job()
+
+    sends = api.calls["sendMessage"] - sends_before
+    print(
+        f"{name}: {elapsed['elapsed']:.2f} с, "
+        f"отправлено {sends} ({sends / elapsed['elapsed']:.1f}/с), "
+        f"SQL-запросов {queries.count - queries_before}, "
+        f"пиковый RSS {get_peak_rss_mb():.1f} МБ"
+    )
+
+
+async def run_scheduler_bench(args: argparse.Namespace) -> None:
+    from database import engine
+    from handlers.scheduler import send_daily_digests, check_and_notify_reminders
+
+    if not args.skip_seed:
+        await reset_bench_data(engine)
+        with stats.stopwatch() as elapsed:
+            await seed_users(
+                engine, args.users,
+                categories_per_user=args.categories,
+                tasks_per_user=args.tasks,
+                reminders_per_user=args.reminders,
+                distribution=args.distribution,
+                event_days=args.event_days,
+            )
+        print(f"Заполнение {args.users} пользователей: {elapsed['elapsed']:.2f} с")
+
+    api = FakeBotApi(port=args.port)
+    await api.start()
+
+    bot = Bot(
+        token=BENCH_BOT_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api.base_url)),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    queries = stats.QueryCounter(engine)
+
+    try:
+        await measure("Дайджест 20:00", lambda: send_daily_digests(bot), api, queries)
+        await measure("События 09:00", lambda: check_and_notify_reminders(bot), api, queries)
+    finally:
+        await bot.session.close()
+        await api.stop()
+        await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000, help="синтетических пользователей")
+    parser.add_argument("--categories", type=int, default=3, help="категорий на пользователя")
+    parser.add_argument("--tasks", type=float, default=10, help="задач на пользователя (среднее)")
+    parser.add_argument("--reminders", type=float, default=2, help="событий на пользователя (среднее)")
+    parser.add_argument("--distribution", choices=sorted(DISTRIBUTIONS), default="fixed",
+                        help="распределение задач и событий по пользователям")
+    parser.add_argument("--event-days", type=int, default=30, help="на сколько дней вперёд разбросаны события")
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже заполненную базу")
+    parser.add_argument("--port", type=int, default=8081, help="порт подмены Bot API")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run_scheduler_bench(parse_args()))
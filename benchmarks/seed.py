@@ -0,0 +1,80 @@
+import logging
+
+from sqlalchemy import text
+
+from .fake_bot_api import BENCH_BOT_ID
+
+logger = logging.getLogger(__name__)
+
+# Синтетические пользователи получают идентификаторы из отдельного диапазона
+BENCH_FIRST_USER_ID = 9_000_000_000
+
+SEED_BATCH_SIZE = 50_000
+
+# Количество строк на пользователя: fixed — ровно mean, exponential — с длинным хвостом
+DISTRIBUTIONS = {
+    "fixed": "round(CAST(:mean AS float))",
+    "exponential": "floor(-ln(1 - random()) * CAST(:mean AS float))",
+}
+
+
+async def reset_bench_data(engine) -> None:
+    """Удаляет синтетических пользователей и все их данные."""
+    async with engine.begin() as conn:
+        params = {"bot_id": BENCH_BOT_ID, "first": BENCH_FIRST_USER_ID}
+        await conn.execute(text("DELETE FROM tasks WHERE bot_id = :bot_id AND user_id >= :first"), params)
+        await conn.execute(text("DELETE FROM reminders WHERE bot_id = :bot_id AND user_id >= :first"), params)
+        await conn.execute(text("DELETE FROM categories WHERE bot_id = :bot_id AND user_id >= :first"), params)
+        await conn.execute(text("DELETE FROM users WHERE bot_id = :bot_id AND user_id >= :first"), params)
+
+
+async def seed_users(
+    engine,
+    users: int,
+    categories_per_user: int = 3,
+    tasks_per_user: float = 10,
+    reminders_per_user: float = 2,
+    distribution: str = "fixed",
+    event_days: int = 30,
+) -> range:
+    """Заполняет базу синтетическими пользователями с категориями, задачами и событиями.
+
+    Данные генерируются на стороне Postgres (generate_series), поэтому заполнение
+    миллиона пользователей не требует передачи строк из Python.
+    """
+    amount = DISTRIBUTIONS[distribution]
+    tasks_per_category = tasks_per_user / max(categories_per_user, 1)
+
+    for first in range(BENCH_FIRST_USER_ID, BENCH_FIRST_USER_ID + users, SEED_BATCH_SIZE):
+        last = min(first + SEED_BATCH_SIZE, BENCH_FIRST_USER_ID + users) - 1
+        params = {"bot_id": BENCH_BOT_ID, "first": first, "last": last}
+
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO users (bot_id, user_id, username) "
+                "SELECT :bot_id, u, 'bench_' || u FROM generate_series(CAST(:first AS bigint), :last) AS u"
+            ), params)
+            await conn.execute(text(
+                "INSERT INTO categories (name, bot_id, user_id) "
+                "SELECT 'Категория ' || c, :bot_id, u "
+                "FROM generate_series(CAST(:first AS bigint), :last) AS u, generate_series(1, :categories) AS c"
+            ), {**params, "categories": categories_per_user})
+            await conn.execute(text(
+                "INSERT INTO tasks (description, category_id, bot_id, user_id) "
+                "SELECT 'Задача ' || t || ' в категории ' || c.name, c.id, c.bot_id, c.user_id "
+                "FROM categories AS c "
+                f"CROSS JOIN LATERAL generate_series(1, CAST({amount} + 0 * c.id AS int)) AS t "
+                "WHERE c.bot_id = :bot_id AND c.user_id BETWEEN :first AND :last"
+            ), {**params, "mean": tasks_per_category})
+            await conn.execute(text(
+                "INSERT INTO reminders (date, next_fire_at, description, bot_id, user_id) "
+                "SELECT d.date, d.date, 'Событие ' || r, :bot_id, u "
+                "FROM generate_series(CAST(:first AS bigint), :last) AS u "
+                f"CROSS JOIN LATERAL generate_series(1, CAST({amount} + 0 * u AS int)) AS r "
+                "CROSS JOIN LATERAL (SELECT date_trunc('day', now()) "
+                "+ floor(random() * CAST(:days AS int) + 0 * r) * interval '1 day' AS date) AS d"
+            ), {**params, "mean": reminders_per_user, "days": event_days})
+
+        logger.info("Заполнено пользователей: %s из %s", last - BENCH_FIRST_USER_ID + 1, users)
+
+    return range(BENCH_FIRST_USER_ID, BENCH_FIRST_USER_ID + users)
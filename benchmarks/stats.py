@@ -0,0 +1,41 @@
+import time
+from contextlib import contextmanager
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def format_latency(values: list[float]) -> str:
+    return (
+        f"n={len(values)} "
+        f"p50={percentile(values, 50) * 1000:.1f}мс "
+        f"p99={percentile(values, 99) * 1000:.1f}мс"
+    )
+
+
+class QueryCounter:
+    """Считает SQL-запросы движка через события SQLAlchemy."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@contextmanager
+def stopwatch():
+    timing = {"start": time.perf_counter(), "elapsed": 0.0}
+    try:
+        yield timing
+    finally:
+        timing["elapsed"] = time.perf_counter() - timing["start"]
@@ -1,19 +1,37 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
 import os
 import asyncio
 import logging
 
 from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 from aiogram import Dispatcher
 
-from handlers.commands import commands_router
-from handlers.callbacks import callbacks_router
-from config import BOT_TOKEN
-
-from handlers.scheduler import start_schedulers
-from middleware import DatabaseSessionMiddleware
-from menus.menus import set_main_menu
+from circuit_breaker import install_circuit_breaker
+from config import BOT_TOKENS, SHUTDOWN_TIMEOUT
+from lifecycle import InFlightMiddleware, handlers_in_flight, jobs_in_flight, shutdown_event
+from metrics import (
+    HandlerMetricsMiddleware,
+    BotApiMetricsMiddleware,
+    instrument_engine,
+    instrument_scheduler,
+    start_metrics_server
+)
+from middleware import BotScopeMiddleware, DatabaseSessionMiddleware, FirstUpdateTimingMiddleware
+from profiling import QueryProfilerMiddleware, install_query_profiler
+from tracing import (
+    UpdateTracingMiddleware,
+    FSMTracingMiddleware,
+    HandlerTracingMiddleware,
+    BotApiTracingMiddleware,
+    install_db_tracing,
+    trace_exporter
+)
 
 os.environ['TZ'] = 'Europe/Moscow'
 
@@ -23,28 +41,125 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+background_tasks: set[asyncio.Task] = set()
+
+
+async def sync_main_menu(bots: list[Bot]) -> None:
+    from menus.menus import set_main_menu
+
+    for bot in bots:
+        try:
+            if await set_main_menu(bot):
+                logger.info("Команды меню бота %s обновлены", bot.id)
+        except Exception:
+            logger.exception("Не удалось обновить команды меню бота %s", bot.id)
+
+
+async def on_startup(bots: list[Bot]) -> None:
+    from database import engine
+    from handlers.scheduler import scheduler, start_schedulers
+    from handlers.broadcast import resume_broadcasts
+    from handlers.outbox import start_outbox_replay
+
+    install_circuit_breaker(engine)
+    instrument_engine(engine)
+    install_query_profiler(engine)
+    install_db_tracing(engine)
+    trace_exporter.start()
+    instrument_scheduler(scheduler)
+    start_metrics_server()
+
+    # Изменения, отложенные при прошлом сбое базы, применяются в фоне
+    start_outbox_replay()
+    await start_schedulers(bots)
+    await resume_broadcasts(bots)
+
+    # Команды меню не нужны для обработки апдейтов, поэтому не задерживаем старт поллинга
+    task = asyncio.create_task(sync_main_menu(bots))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+    logger.info("Боты запущены (%s) за %.3f с", len(bots), time.perf_counter() - STARTED_AT)
+
+
+async def on_shutdown() -> None:
+    from database import engine
+    from handlers.scheduler import stop_schedulers
+    from handlers.outbox import write_outbox
+
+    # Поллинг уже остановлен: новые апдейты не принимаем, рассылки сохраняют прогресс
+    shutdown_event.set()
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+
+    if not await handlers_in_flight.wait_idle(SHUTDOWN_TIMEOUT):
+        logger.warning("Не дождались завершения %s обработчиков", handlers_in_flight.count)
+    if not await jobs_in_flight.wait_idle(max(deadline - time.monotonic(), 0)):
+        logger.warning("Не дождались завершения %s рассылок", jobs_in_flight.count)
+
+    await stop_schedulers()
+    await write_outbox.stop()
+    await trace_exporter.stop()
+    await engine.dispose()
+    logger.info("Бот остановлен")
+
+
+def create_dispatcher() -> Dispatcher:
+    """Собирает диспетчер с роутерами и middleware."""
+    from handlers.broadcast import broadcast_router
+    from handlers.commands import commands_router
+    from handlers.callbacks import callbacks_router
+    from handlers.inline import inline_router
+
+    # FSM подключаем сами после трассировки, чтобы чтение состояния попадало в трассу апдейта
+    dp = Dispatcher(disable_fsm=True)
+
+    # Первым: всё остальное, включая сессию базы, работает уже в контексте бота
+    dp.update.outer_middleware(BotScopeMiddleware())
+    dp.update.outer_middleware(UpdateTracingMiddleware())
+    dp.update.outer_middleware(FSMTracingMiddleware(dp.fsm))
+    dp.update.outer_middleware(InFlightMiddleware())
+    dp.update.outer_middleware(QueryProfilerMiddleware())
+    for observer in (dp.message, dp.callback_query, dp.inline_query):
+        observer.middleware(DatabaseSessionMiddleware())
+        observer.middleware(HandlerMetricsMiddleware())
+        observer.middleware(HandlerTracingMiddleware())
+
+    dp.include_router(broadcast_router)
+    dp.include_router(commands_router)
+    dp.include_router(callbacks_router)
+    dp.include_router(inline_router)
 
-async def main():
-    bot = Bot(
-        token=BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
+    return dp
 
-    dp = Dispatcher()
 
-    dp.message.middleware(DatabaseSessionMiddleware())
-    dp.callback_query.middleware(DatabaseSessionMiddleware())
+def create_bots(tokens: list[str]) -> list[Bot]:
+    """Создаёт ботов с общей HTTP-сессией: один пул соединений к Bot API на все токены."""
+    session = AiohttpSession()
+    session.middleware(BotApiMetricsMiddleware())
+    session.middleware(BotApiTracingMiddleware())
 
-    dp.include_router(commands_router)
-    dp.include_router(callbacks_router)
+    return [
+        Bot(
+            token=token,
+            session=session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        ) for token in tokens
+    ]
+
+
+async def main():
+    bots = create_bots(BOT_TOKENS)
 
-    await set_main_menu(bot)
+    dp = create_dispatcher()
+    dp.update.outer_middleware(FirstUpdateTimingMiddleware(STARTED_AT))
 
-    await bot.delete_webhook(drop_pending_updates=True)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
 
-    await start_schedulers(bot)
+    for bot in bots:
+        await bot.delete_webhook(drop_pending_updates=True)
 
-    await dp.start_polling(bot)
+    await dp.start_polling(*bots)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,191 @@
+"""Онлайн-миграции: заполнение данных пачками и индексы без блокировки таблиц.
+
+Ревизии Alembic выполняются при старте бота, поэтому в них остаются только быстрые
+изменения схемы: новая колонка без значения по умолчанию, новая таблица. Всё, что
+на больших tasks и reminders держало бы блокировку, описывается шагом в
+backfill/steps.py и выполняется отдельным процессом, пока бот работает:
+
+    python -m backfill           # все незавершённые шаги по порядку
+    python -m backfill status    # прогресс шагов
+
+Прогресс хранится в backfill_progress и сохраняется в одной транзакции с пачкой,
+поэтому остановленный шаг продолжается с последней пачки.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from config import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_MAX_BATCH_SIZE,
+    BACKFILL_PAUSE,
+    BACKFILL_TARGET_BATCH_SECONDS,
+    BACKFILL_LOCK_TIMEOUT_MS
+)
+from src.models.models import BackfillProgressModel
+
+logger = logging.getLogger(__name__)
+
+# Ключ «до первой строки»: ключи таблиц — целые числа, не меньше этого
+FIRST_KEY = -2 ** 63
+
+MIN_BATCH_SIZE = 10
+
+# lock_not_available и query_canceled: пачка упёрлась в блокировку или таймаут
+RETRYABLE_SQLSTATES = {"55P03", "57014"}
+
+
+@dataclass
+class Backfill:
+    """Заполнение данных пачками по возрастанию ключа.
+
+    statement — UPDATE (или INSERT ... SELECT) с параметрами :lower и :upper,
+    который обрабатывает строки с lower < key <= upper. Он должен быть
+    идемпотентным: пачка, прерванная до сохранения прогресса, выполнится снова.
+    """
+    name: str
+    table: str
+    statement: str
+    key: str = "id"
+
+
+@dataclass
+class ConcurrentIndex:
+    """Индекс, который строится CREATE INDEX CONCURRENTLY, не блокируя запись в таблицу.
+
+    definition — всё после имени таблицы, например "(user_id, category_id)"
+    или "USING gin (user_id, search_vector)"; where — условие частичного индекса.
+    """
+    name: str
+    table: str
+    definition: str
+    where: str | None = None
+
+
+@dataclass
+class Progress:
+    last_key: int | None = None
+    rows: int = 0
+    done: bool = False
+
+
+def is_retryable(error: DBAPIError) -> bool:
+    return getattr(error.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+async def load_progress(engine: AsyncEngine, name: str) -> Progress:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("SELECT last_key, rows, done FROM backfill_progress WHERE name = :name"), {"name": name}
+        )
+        row = result.first()
+
+    return Progress(*row) if row else Progress()
+
+
+async def save_progress(conn: AsyncConnection, name: str, progress: Progress) -> None:
+    stmt = insert(BackfillProgressModel).values(
+        name=name, last_key=progress.last_key, rows=progress.rows, done=progress.done
+    )
+    await conn.execute(stmt.on_conflict_do_update(
+        index_elements=[BackfillProgressModel.name],
+        set_={
+            "last_key": stmt.excluded.last_key,
+            "rows": stmt.excluded.rows,
+            "done": stmt.excluded.done,
+            "updated_at": text("now()"),
+        }
+    ))
+
+
+async def run_backfill(engine: AsyncEngine, backfill: Backfill) -> None:
+    """Выполняет заполнение пачками, подстраивая размер пачки под BACKFILL_TARGET_BATCH_SECONDS.
+
+    Границы пачки берутся по ключу (keyset), а не OFFSET, поэтому каждая пачка
+    стоит одинаково независимо от того, сколько строк уже обработано.
+    """
+    progress = await load_progress(engine, backfill.name)
+    if progress.done:
+        return
+
+    batch_size = BACKFILL_BATCH_SIZE
+    upper_stmt = text(
+        f"SELECT max({backfill.key}) FROM ("
+        f"SELECT {backfill.key} FROM {backfill.table} WHERE {backfill.key} > :after "
+        f"ORDER BY {backfill.key} LIMIT :limit) AS batch"
+    )
+
+    while not progress.done:
+        started_at = time.monotonic()
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"SET LOCAL lock_timeout = {BACKFILL_LOCK_TIMEOUT_MS}"))
+
+                lower = progress.last_key if progress.last_key is not None else FIRST_KEY
+                upper = (await conn.execute(upper_stmt, {"after": lower, "limit": batch_size})).scalar()
+
+                if upper is None:
+                    progress = Progress(progress.last_key, progress.rows, done=True)
+                else:
+                    result = await conn.execute(text(backfill.statement), {"lower": lower, "upper": upper})
+                    progress = Progress(upper, progress.rows + max(result.rowcount, 0))
+
+                await save_progress(conn, backfill.name, progress)
+        except DBAPIError as error:
+            if not is_retryable(error):
+                raise
+            batch_size = max(MIN_BATCH_SIZE, batch_size // 2)
+            logger.warning("%s: пачка прервана (%s), повтор с размером %s", backfill.name, error.orig, batch_size)
+            await asyncio.sleep(BACKFILL_PAUSE * 10)
+            continue
+
+        elapsed = time.monotonic() - started_at
+        if elapsed > BACKFILL_TARGET_BATCH_SECONDS:
+            batch_size = max(MIN_BATCH_SIZE, batch_size // 2)
+        elif elapsed < BACKFILL_TARGET_BATCH_SECONDS / 2:
+            batch_size = min(BACKFILL_MAX_BATCH_SIZE, batch_size * 2)
+
+        logger.info("%s: обработано %s строк, ключ %s", backfill.name, progress.rows, progress.last_key)
+        await asyncio.sleep(BACKFILL_PAUSE)
+
+
+async def create_index_concurrently(engine: AsyncEngine, index: ConcurrentIndex) -> None:
+    """Строит индекс вне транзакции; недостроенный после сбоя индекс удаляется и строится заново."""
+    progress = await load_progress(engine, index.name)
+    if progress.done:
+        return
+
+    async with engine.connect() as conn:
+        # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+        result = await conn.execute(
+            text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": index.name}
+        )
+        is_valid = result.scalar()
+        if is_valid is False:
+            logger.warning("%s: индекс недостроен, удаляем и строим заново", index.name)
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+
+        if not is_valid:
+            where = f" WHERE {index.where}" if index.where else ""
+            started_at = time.monotonic()
+            await conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table} {index.definition}{where}"
+            ))
+            logger.info("%s: индекс построен за %.1f с", index.name, time.monotonic() - started_at)
+
+        await save_progress(conn, index.name, Progress(done=True))
+
+
+async def run_step(engine: AsyncEngine, step: Backfill | ConcurrentIndex) -> None:
+    if isinstance(step, ConcurrentIndex):
+        await create_index_concurrently(engine, step)
+    else:
+        await run_backfill(engine, step)
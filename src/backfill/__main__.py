@@ -0,0 +1,77 @@
+"""Выполняет онлайн-миграции из backfill/steps.py независимо от запуска бота.
+
+    python -m backfill           # все незавершённые шаги по порядку
+    python -m backfill status    # прогресс шагов
+    python -m backfill run NAME  # один шаг
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from database import engine
+from . import load_progress, run_step
+from .steps import STEPS
+
+logger = logging.getLogger(__name__)
+
+# Как часто (с) проверять, применены ли ревизии Alembic с таблицей backfill_progress
+SCHEMA_WAIT_INTERVAL = 5
+
+
+async def wait_for_schema() -> None:
+    """Ждёт, пока бот применит ревизии при старте: шаги опираются на уже созданные колонки."""
+    while True:
+        async with engine.connect() as conn:
+            if (await conn.execute(text("SELECT to_regclass('backfill_progress')"))).scalar() is not None:
+                return
+        logger.info("Таблица backfill_progress ещё не создана, ждём миграций")
+        await asyncio.sleep(SCHEMA_WAIT_INTERVAL)
+
+
+async def print_status() -> None:
+    for step in STEPS:
+        progress = await load_progress(engine, step.name)
+        state = "готово" if progress.done else f"ключ {progress.last_key}" if progress.last_key is not None else "не начато"
+        print(f"{step.name} ({step.table}): {state}, строк {progress.rows}")
+
+
+async def run(names: list[str] | None) -> None:
+    steps = [step for step in STEPS if names is None or step.name in names]
+    unknown = set(names or ()) - {step.name for step in steps}
+    if unknown:
+        raise SystemExit(f"Неизвестные шаги: {', '.join(sorted(unknown))}")
+
+    for step in steps:
+        logger.info("Шаг %s", step.name)
+        await run_step(engine, step)
+    logger.info("Онлайн-миграции выполнены")
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await wait_for_schema()
+        if args.command == "status":
+            await print_status()
+        else:
+            await run(args.names or None)
+    finally:
+        await engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("status", help="прогресс шагов")
+    run_parser = subparsers.add_parser("run", help="выполнить шаги (по умолчанию все)")
+    run_parser.add_argument("names", nargs="*", help="имена шагов")
+    args = parser.parse_args()
+    if args.command is None:
+        args.command, args.names = "run", []
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,28 @@
+from . import Backfill, ConcurrentIndex
+
+# Шаги онлайн-миграций в порядке выполнения. Шаг добавляется вместе с ревизией Alembic,
+# которая делает быструю часть изменения (например, добавляет колонку без значения по умолчанию),
+# и не удаляется: на уже обновлённой базе выполненный шаг пропускается по backfill_progress.
+STEPS: list[Backfill | ConcurrentIndex] = [
+    # Строки, созданные до триггера set_search_vector; там, где колонка была вычисляемой, заполнять нечего
+    Backfill(
+        "tasks_search_vector", "tasks",
+        "UPDATE tasks SET search_vector = to_tsvector('russian', description) "
+        "WHERE id > :lower AND id <= :upper AND search_vector IS NULL",
+    ),
+    Backfill(
+        "reminders_search_vector", "reminders",
+        "UPDATE reminders SET search_vector = to_tsvector('russian', description) "
+        "WHERE id > :lower AND id <= :upper AND search_vector IS NULL",
+    ),
+    ConcurrentIndex("ix_tasks_user_id_search_vector", "tasks", "USING gin (user_id, search_vector)"),
+    ConcurrentIndex("ix_reminders_user_id_search_vector", "reminders", "USING gin (user_id, search_vector)"),
+    ConcurrentIndex("ix_tasks_user_id_category_id", "tasks", "(user_id, category_id)"),
+    ConcurrentIndex("ix_tasks_category_id", "tasks", "(category_id)"),
+    ConcurrentIndex("ix_tasks_active_user_id_category_id", "tasks", "(user_id, category_id)",
+                    where="completed_at IS NULL"),
+    ConcurrentIndex("ix_tasks_active_category_id", "tasks", "(category_id)", where="completed_at IS NULL"),
+    ConcurrentIndex("ix_tasks_active_user_id_search_vector", "tasks", "USING gin (user_id, search_vector)",
+                    where="completed_at IS NULL"),
+    ConcurrentIndex("ix_tasks_completed_at", "tasks", "(completed_at)", where="completed_at IS NOT NULL"),
+]
@@ -0,0 +1,118 @@
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError, DBAPIError, OperationalError
+
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+from metrics import DB_CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(SQLAlchemyError):
+    """База недоступна: запрос отклонён без попытки соединения."""
+
+
+def is_database_outage(error: BaseException | None) -> bool:
+    """Ошибка означает недоступность базы, а не ошибку в самом запросе."""
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, DBAPIError) and (error.connection_invalidated or isinstance(error, OperationalError)):
+        return True
+    if isinstance(error, (OSError, TimeoutError)):
+        return True
+    return isinstance(getattr(error, "orig", None), (OSError, TimeoutError))
+
+
+class CircuitBreaker:
+    """Предохранитель перед базой данных.
+
+    После failure_threshold подряд ошибок соединения цепь размыкается, и новые
+    соединения сразу получают CircuitOpenError вместо ожидания таймаута. Через
+    reset_timeout одно соединение пропускается пробным: успех замыкает цепь,
+    ошибка снова размыкает её. Пока пробное соединение не завершилось, остальные
+    отклоняются; если оно так и не дало ни успеха, ни ошибки, через reset_timeout
+    пропускается следующее.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def allows_requests(self) -> bool:
+        return self.state == "closed" or time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def check(self) -> bool:
+        """Пропускает соединение или сразу отклоняет его, пока цепь разомкнута.
+
+        Возвращает True, если соединение пропущено пробным.
+        """
+        if self.state == "closed":
+            return False
+
+        now = time.monotonic()
+        if now - self._opened_at < self.reset_timeout:
+            raise CircuitOpenError("База данных недоступна, соединение не устанавливается")
+
+        # Пробный запрос; следующий пропустим не раньше чем через reset_timeout
+        self._opened_at = now
+        self._set_state("half_open")
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != "closed":
+            logger.info("База данных снова доступна")
+            self._set_state("closed")
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("База данных недоступна: запросы отклоняются на %s с", self.reset_timeout)
+            self._opened_at = time.monotonic()
+            self._set_state("open")
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        DB_CIRCUIT_STATE.set(CIRCUIT_STATES[state])
+
+
+database_breaker = CircuitBreaker()
+
+
+def install_circuit_breaker(engine, breaker: CircuitBreaker = database_breaker) -> None:
+    """Подключает предохранитель к движку: проверка при выдаче соединения, учёт ошибок и успехов."""
+    sync_engine = engine.sync_engine
+
+    # Новое соединение проходит оба события; пробным его делает do_connect, и при
+    # выдаче из пула та же попытка повторно не проверяется
+    @event.listens_for(sync_engine, "do_connect")
+    def before_connect(dialect, conn_rec, cargs, cparams):
+        if breaker.check():
+            conn_rec.info["circuit_trial"] = True
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def before_checkout(dbapi_connection, connection_record, connection_proxy):
+        if not connection_record.info.pop("circuit_trial", False):
+            breaker.check()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def on_error(context):
+        error = context.sqlalchemy_exception or context.original_exception
+        if isinstance(context.original_exception, CircuitOpenError):
+            return
+        if context.is_disconnect or is_database_outage(error) or is_database_outage(context.original_exception):
+            breaker.record_failure()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        breaker.record_success()
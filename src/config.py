@@ -6,9 +6,71 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# Токены ботов через запятую: один процесс обслуживает их всех; по умолчанию — только BOT_TOKEN
+BOT_TOKENS = [token.strip() for token in os.getenv("BOT_TOKENS", BOT_TOKEN or "").split(",") if token.strip()]
+
 DATABASE_URL = (
     f"postgresql+asyncpg://"
     f"{os.getenv('DB_USERNAME')}:{os.getenv('DB_PASSWORD')}@"
     f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/"
     f"{os.getenv('DB_NAME')}"
-)
\ No newline at end of file
+)
+
+# Сколько секунд при остановке ждать завершения обработчиков и рассылок
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "25"))
+
+# Порт HTTP-сервера с метриками Prometheus (/metrics), 0 — не запускать
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8000"))
+
+# Профилирование SQL: доля апдейтов и задач планировщика, для которых считаются запросы (0 — выключено)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Одинаковых по форме запросов за апдейт, после которых логируется подозрение на N+1
+PROFILE_N_PLUS_ONE_THRESHOLD = int(os.getenv("PROFILE_N_PLUS_ONE_THRESHOLD", "5"))
+# Запросы дольше этого порога (мс) попадают в лог медленных запросов (0 — не логировать)
+PROFILE_SLOW_QUERY_MS = float(os.getenv("PROFILE_SLOW_QUERY_MS", "200"))
+
+# Трассировка апдейтов: файл для JSON-строк в формате OTLP и/или адрес OTLP/HTTP-коллектора
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")
+# Хвостовая выборка: медленные апдейты сохраняются всегда, остальные — с этой вероятностью
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+
+# Кеш результатов inline-режима: время жизни (с) и максимальное число записей
+INLINE_CACHE_TTL = float(os.getenv("INLINE_CACHE_TTL", "30"))
+INLINE_CACHE_SIZE = int(os.getenv("INLINE_CACHE_SIZE", "10000"))
+
+# Telegram ID администраторов через запятую: им доступны рассылки /broadcast
+ADMIN_IDS = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").split(",") if user_id.strip()}
+
+# Исходящие сообщения: не больше DELIVERY_RATE_LIMIT в секунду и DELIVERY_CONCURRENCY запросов одновременно
+DELIVERY_RATE_LIMIT = float(os.getenv("DELIVERY_RATE_LIMIT", "25"))
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "10"))
+
+# Сколько пользователей помнить в кеше известных пользователей (/start без запроса к базе)
+KNOWN_USERS_CACHE_SIZE = int(os.getenv("KNOWN_USERS_CACHE_SIZE", "100000"))
+
+# Предохранитель базы: после стольких ошибок соединения подряд запросы отклоняются сразу,
+# пробный запрос — через CIRCUIT_RESET_TIMEOUT секунд
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "5"))
+# Таймаут установки соединения с базой (с)
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "3"))
+
+# Локальный журнал изменений (SQLite), записанных, пока база была недоступна, и как часто (с) пробовать их применить
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "data/outbox.sqlite3")
+OUTBOX_REPLAY_INTERVAL = float(os.getenv("OUTBOX_REPLAY_INTERVAL", "5"))
+
+# Онлайн-миграции (python -m backfill): начальный и предельный размер пачки, пауза между пачками (с)
+# и желаемая длительность пачки (с), под которую подстраивается её размер
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "1000"))
+BACKFILL_MAX_BATCH_SIZE = int(os.getenv("BACKFILL_MAX_BATCH_SIZE", "10000"))
+BACKFILL_PAUSE = float(os.getenv("BACKFILL_PAUSE", "0.2"))
+BACKFILL_TARGET_BATCH_SECONDS = float(os.getenv("BACKFILL_TARGET_BATCH_SECONDS", "0.5"))
+# Пачка не ждёт блокировок дольше этого (мс): конфликтующий с ботом запрос повторяется позже пачкой поменьше
+BACKFILL_LOCK_TIMEOUT_MS = int(os.getenv("BACKFILL_LOCK_TIMEOUT_MS", "1000"))
+
+# Выполненные задачи старше стольких дней сворачиваются в недельную статистику (task_stats)
+# пачками по TASK_COMPACTION_BATCH_SIZE строк
+TASK_HISTORY_DAYS = int(os.getenv("TASK_HISTORY_DAYS", "30"))
+TASK_COMPACTION_BATCH_SIZE = int(os.getenv("TASK_COMPACTION_BATCH_SIZE", "1000"))
@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from src.config import DATABASE_URL
+from src.config import DATABASE_URL, DB_CONNECT_TIMEOUT
 
-engine = create_async_engine(DATABASE_URL)
+# Короткий таймаут соединения: при недоступной базе апдейты не копятся в ожидании
+engine = create_async_engine(DATABASE_URL, connect_args={"timeout": DB_CONNECT_TIMEOUT})
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from config import DELIVERY_RATE_LIMIT, DELIVERY_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз повторять отправку после ответа 429 (Too Many Requests)
+MAX_RETRY_AFTER_ATTEMPTS = 3
+
+
+def is_unreachable_recipient(error: Exception) -> bool:
+    """Пользователь заблокировал бота, удалил аккаунт или чат не существует."""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    return isinstance(error, TelegramBadRequest) and "chat not found" in error.message.lower()
+
+
+class RateLimiter:
+    """Token bucket: в среднем не больше rate операций в секунду."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Ожидающие стоят в очереди на блокировке, поэтому токены раздаются по порядку
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов, например по retry_after от Telegram."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    failed: int = 0
+    unreachable: list[int] = field(default_factory=list)
+
+
+class RateLimitedSender:
+    """Отправляет сообщения через лимит скорости и ограничение параллельных запросов.
+
+    Telegram ограничивает частоту отправки для каждого токена отдельно, поэтому
+    у каждого бота свой token bucket, а очередь отправки у всех общая.
+    """
+
+    def __init__(self, rate: float, concurrency: int):
+        self.rate = rate
+        self.concurrency = concurrency
+        self._limiters: dict[int, RateLimiter] = {}
+
+    def get_limiter(self, bot: Bot) -> RateLimiter:
+        limiter = self._limiters.get(bot.id)
+        if limiter is None:
+            limiter = self._limiters[bot.id] = RateLimiter(self.rate)
+        return limiter
+
+    async def send_message(self, bot: Bot, chat_id: int, text: str, **kwargs):
+        limiter = self.get_limiter(bot)
+        for attempt in range(1, MAX_RETRY_AFTER_ATTEMPTS + 1):
+            await limiter.acquire()
+            try:
+                return await bot.send_message(chat_id, text, **kwargs)
+            except TelegramRetryAfter as error:
+                logger.warning("Бот %s: Telegram просит подождать %s с (попытка %s)",
+                               bot.id, error.retry_after, attempt)
+                limiter.pause(error.retry_after)
+                if attempt == MAX_RETRY_AFTER_ATTEMPTS:
+                    raise
+
+    async def send_many(self, bot: Bot, chat_ids: list[int], text: str, **kwargs) -> DeliveryReport:
+        """Отправляет одно сообщение многим получателям параллельно и считает результат."""
+        report = DeliveryReport()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send_one(chat_id: int) -> None:
+            async with semaphore:
+                try:
+                    await self.send_message(bot, chat_id, text, **kwargs)
+                except Exception as error:
+                    if is_unreachable_recipient(error):
+                        report.unreachable.append(chat_id)
+                    else:
+                        logger.warning("Не удалось отправить сообщение %s: %s", chat_id, error)
+                        report.failed += 1
+                else:
+                    report.sent += 1
+
+        await asyncio.gather(*(send_one(chat_id) for chat_id in chat_ids))
+        return report
+
+
+# Один лимит на все исходящие сообщения каждого бота: рассылки планировщика и объявления не мешают друг другу
+message_sender = RateLimitedSender(DELIVERY_RATE_LIMIT, DELIVERY_CONCURRENCY)
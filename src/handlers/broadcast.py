@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from config import ADMIN_IDS
+from database import get_session
+from delivery import message_sender
+from lifecycle import jobs_in_flight, shutdown_event
+from src.models.bot_scope import bot_scope
+from src.models.models import BroadcastModel
+from .router import broadcast_router
+from .scheduler import iter_user_ids, deactivate_unreachable_users
+from .text_constants import BOT_ANSWER
+
+logger = logging.getLogger(__name__)
+
+# Пачка получателей между сохранениями прогресса; при 25 сообщениях в секунду это около 4 секунд,
+# так что при остановке бота рассылка успевает сохраниться
+BROADCAST_BATCH_SIZE = 100
+
+# Как часто (с) обновлять сообщение с прогрессом у администратора
+BROADCAST_REPORT_INTERVAL = 10
+
+BROADCAST_STATUSES = {
+    "running": "идёт",
+    "paused": "на паузе",
+    "cancelled": "отменена",
+    "done": "завершена",
+}
+
+# Задачи запущенных рассылок: не даём запустить одну рассылку дважды
+running_broadcasts: dict[int, asyncio.Task] = {}
+
+broadcast_router.message.filter(F.from_user.id.in_(ADMIN_IDS))
+
+
+# ==============================
+# Работа с базой
+# ==============================
+
+async def create_broadcast(text: str, created_by: int) -> BroadcastModel:
+    db_session = await get_session()
+    try:
+        async with db_session.begin():
+            broadcast = BroadcastModel(text=text, created_by=created_by, status="running")
+            db_session.add(broadcast)
+        return broadcast
+    finally:
+        await db_session.close()
+
+
+async def get_broadcast(broadcast_id: int) -> BroadcastModel | None:
+    db_session = await get_session()
+    try:
+        async with db_session.begin():
+            return await db_session.get(BroadcastModel, broadcast_id)
+    finally:
+        await db_session.close()
+
+
+async def get_recent_broadcasts(limit: int = 5) -> list[BroadcastModel]:
+    db_session = await get_session()
+    try:
+        async with db_session.begin():
+            result = await db_session.execute(
+                select(BroadcastModel).order_by(BroadcastModel.id.desc()).limit(limit)
+            )
+            return result.scalars().all()
+    finally:
+        await db_session.close()
+
+
+async def change_broadcast_status(broadcast_id: int, from_statuses: tuple[str, ...], status: str) -> bool:
+    """Меняет статус рассылки, если она сейчас в одном из from_statuses."""
+    db_session = await get_session()
+    try:
+        async with db_session.begin():
+            result = await db_session.execute(
+                update(BroadcastModel)
+                .where(BroadcastModel.id == broadcast_id, BroadcastModel.status.in_(from_statuses))
+                .values(status=status)
+                .returning(BroadcastModel.id)
+            )
+            return result.scalar_one_or_none() is not None
+    finally:
+        await db_session.close()
+
+
+async def save_broadcast_progress(broadcast_id: int, last_user_id: int, sent: int, failed: int,
+                                  unreachable: int) -> BroadcastModel:
+    """Сохраняет прогресс пачки и возвращает актуальное состояние рассылки (статус мог поменять администратор)."""
+    db_session = await get_session()
+    try:
+        async with db_session.begin():
+            result = await db_session.execute(
+                update(BroadcastModel)
+                .where(BroadcastModel.id == broadcast_id)
+                .values(
+                    last_user_id=last_user_id,
+                    sent=BroadcastModel.sent + sent,
+                    failed=BroadcastModel.failed + failed,
+                    unreachable=BroadcastModel.unreachable + unreachable,
+                )
+                .returning(BroadcastModel)
+            )
+            return result.scalar_one()
+    finally:
+        await db_session.close()
+
+
+# ==============================
+# Выполнение рассылки
+# ==============================
+
+def format_broadcast_progress(broadcast: BroadcastModel, rate: float | None = None) -> str:
+    text = BOT_ANSWER["broadcast_progress"].format(
+        id=broadcast.id,
+        status=BROADCAST_STATUSES.get(broadcast.status, broadcast.status),
+        sent=broadcast.sent,
+        unreachable=broadcast.unreachable,
+        failed=broadcast.failed,
+    )
+    if rate is not None:
+        text += BOT_ANSWER["broadcast_rate"].format(rate=rate)
+    return text
+
+
+async def update_report(report: Message, text: str) -> None:
+    try:
+        await report.edit_text(text)
+    except TelegramBadRequest:
+        # Например, «message is not modified», если с прошлого отчёта ничего не изменилось
+        pass
+
+
+async def run_broadcast(broadcast_id: int, bot: Bot) -> None:
+    """Рассылает сообщение активным пользователям пачками по возрастанию user_id.
+
+    После каждой пачки прогресс сохраняется в таблицу broadcasts: пауза, отмена и
+    остановка бота прерывают рассылку между пачками, а продолжение начинается
+    с последнего обработанного пользователя. Рассылка идёт только пользователям
+    бота, от имени которого она создана.
+    """
+    with bot_scope(bot.id):
+        await run_bot_broadcast(broadcast_id, bot)
+
+
+async def run_bot_broadcast(broadcast_id: int, bot: Bot) -> None:
+    broadcast = await get_broadcast(broadcast_id)
+    if broadcast is None or broadcast.status != "running":
+        return
+
+    started_at = time.monotonic()
+    reported_at = started_at
+    sent_in_run = 0
+    report = await bot.send_message(broadcast.created_by, format_broadcast_progress(broadcast))
+
+    async with jobs_in_flight.track():
+        async for user_ids in iter_user_ids(batch_size=BROADCAST_BATCH_SIZE, after=broadcast.last_user_id):
+            delivery = await message_sender.send_many(bot, user_ids, broadcast.text, parse_mode="HTML")
+            await deactivate_unreachable_users(delivery.unreachable)
+
+            broadcast = await save_broadcast_progress(
+                broadcast_id, user_ids[-1], delivery.sent, delivery.failed, len(delivery.unreachable)
+            )
+            sent_in_run += delivery.sent
+
+            now = time.monotonic()
+            if now - reported_at >= BROADCAST_REPORT_INTERVAL:
+                reported_at = now
+                rate = sent_in_run / (now - started_at)
+                await update_report(report, format_broadcast_progress(broadcast, rate))
+
+            if broadcast.status != "running" or shutdown_event.is_set():
+                break
+        else:
+            await change_broadcast_status(broadcast_id, ("running",), "done")
+            broadcast.status = "done"
+
+    elapsed = time.monotonic() - started_at
+    logger.info("Рассылка %s: %s, отправлено %s за %.1f с", broadcast_id, broadcast.status, sent_in_run, elapsed)
+    await update_report(report, format_broadcast_progress(broadcast, sent_in_run / elapsed if elapsed else None))
+
+
+def start_broadcast_task(broadcast_id: int, bot: Bot) -> bool:
+    task = running_broadcasts.get(broadcast_id)
+    if task is not None and not task.done():
+        return False
+
+    task = asyncio.create_task(run_broadcast(broadcast_id, bot))
+    running_broadcasts[broadcast_id] = task
+    task.add_done_callback(lambda finished: on_broadcast_done(broadcast_id, finished))
+    return True
+
+
+def on_broadcast_done(broadcast_id: int, task: asyncio.Task) -> None:
+    running_broadcasts.pop(broadcast_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        # Статус остаётся running: рассылка продолжится после перезапуска или /broadcast_resume
+        logger.error("Рассылка %s прервана ошибкой", broadcast_id, exc_info=task.exception())
+
+
+async def resume_broadcasts(bots: list[Bot]) -> None:
+    """Продолжает рассылки, прерванные остановкой бота, каждую от имени своего бота."""
+    bots_by_id = {bot.id: bot for bot in bots}
+
+    db_session = await get_session()
+    try:
+        async with db_session.begin():
+            result = await db_session.execute(
+                select(BroadcastModel.id, BroadcastModel.bot_id).where(BroadcastModel.status == "running")
+            )
+            broadcasts = result.all()
+    finally:
+        await db_session.close()
+
+    for broadcast_id, bot_id in broadcasts:
+        bot = bots_by_id.get(bot_id)
+        if bot is None:
+            logger.warning("Рассылка %s не продолжена: бот %s не запущен", broadcast_id, bot_id)
+            continue
+        logger.info("Продолжаем рассылку %s бота %s", broadcast_id, bot_id)
+        start_broadcast_task(broadcast_id, bot)
+
+
+# ==============================
+# Команды администратора
+# ==============================
+
+def parse_broadcast_id(command: CommandObject) -> int | None:
+    args = (command.args or "").strip()
+    return int(args) if args.isdigit() else None
+
+
+@broadcast_router.message(Command(commands=["broadcast"]))
+async def processed_broadcast_command(message: Message, bot: Bot):
+    parts = message.html_text.split(maxsplit=1)
+    if len(parts) < 2:
+        await message.answer(BOT_ANSWER["broadcast_usage"])
+        return
+
+    broadcast = await create_broadcast(parts[1], message.from_user.id)
+    start_broadcast_task(broadcast.id, bot)
+
+
+@broadcast_router.message(Command(commands=["broadcast_pause"]))
+async def processed_broadcast_pause_command(message: Message, command: CommandObject):
+    broadcast_id = parse_broadcast_id(command)
+    if broadcast_id is not None and await change_broadcast_status(broadcast_id, ("running",), "paused"):
+        await message.answer(BOT_ANSWER["broadcast_paused"].format(id=broadcast_id))
+    else:
+        await message.answer(BOT_ANSWER["broadcast_not_found"])
+
+
+@broadcast_router.message(Command(commands=["broadcast_resume"]))
+async def processed_broadcast_resume_command(message: Message, command: CommandObject, bot: Bot):
+    broadcast_id = parse_broadcast_id(command)
+    if broadcast_id is not None and await change_broadcast_status(broadcast_id, ("paused", "running"), "running"):
+        # Если рассылка ещё дорабатывает пачку, она сама продолжит после неё
+        start_broadcast_task(broadcast_id, bot)
+    else:
+        await message.answer(BOT_ANSWER["broadcast_not_found"])
+
+
+@broadcast_router.message(Command(commands=["broadcast_cancel"]))
+async def processed_broadcast_cancel_command(message: Message, command: CommandObject):
+    broadcast_id = parse_broadcast_id(command)
+    if broadcast_id is not None and await change_broadcast_status(broadcast_id, ("running", "paused"), "cancelled"):
+        await message.answer(BOT_ANSWER["broadcast_cancelled"].format(id=broadcast_id))
+    else:
+        await message.answer(BOT_ANSWER["broadcast_not_found"])
+
+
+@broadcast_router.message(Command(commands=["broadcast_status"]))
+async def processed_broadcast_status_command(message: Message):
+    broadcasts = await get_recent_broadcasts()
+    if not broadcasts:
+        await message.answer(BOT_ANSWER["broadcast_none"])
+        return
+
+    await message.answer("\n\n".join(format_broadcast_progress(broadcast) for broadcast in broadcasts))
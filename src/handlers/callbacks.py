@@ -1,6 +1,9 @@
 import datetime
+import html
 
+from aiogram import Bot
 from aiogram.types import CallbackQuery, Message
+from aiogram.utils.deep_linking import create_start_link
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,20 +14,37 @@ from keyboards.keyboards import (
     generate_category_keyboard,
     main_menu_keyboard,
     generate_task_keyboard_for_deletion,
-    back_keyboard, generate_reminder_keyboard, category_menu_keyboard, task_menu_keyboard, reminder_menu_keyboard
+    back_keyboard, generate_reminder_keyboard, category_menu_keyboard, task_menu_keyboard, reminder_menu_keyboard,
+    generate_search_keyboard, generate_digest_mode_keyboard, remove_event_actions, generate_share_category_keyboard,
+    generate_owned_category_keyboard,
+    generate_complete_tasks_keyboard
 )
+from .deferred import snoozed_reminders
+from .inline_cache import inline_cache
+from .outbox import submit_write, WRITE_DEFERRED
 from .router import callbacks_router
+from .scheduler import notify_category_members
 from .states import InputState
 from .text_constants import BOT_ANSWER
 from .utils import (
     get_or_create_category,
     create_task,
+    create_tasks,
     get_tasks,
     delete_category,
     delete_task_by_id,
     format_tasks_by_category,
-    update_category, add_reminder, get_reminders, delete_reminder_by_id
+    update_category, add_reminder, get_reminders, delete_reminder_by_id,
+    search_user_items, format_search_results, format_reminders,
+    get_digest_mode, set_digest_mode,
+    get_category_overview, get_upcoming_event_counts, format_overview,
+    get_or_create_invite_code, remove_category,
+    complete_tasks, get_completion_stats, format_completion_stats,
+    snooze_reminder, acknowledge_reminder, get_now, get_today_start, is_snoozed_time, SNOOZE_DELAY
 )
+from .recurrence import parse_recurrence
+
+TASK_LIST_PREVIEW = 10
 
 
 async def send_message_with_keyboard(callback_query: CallbackQuery, text: str, reply_markup) -> None:
@@ -33,6 +53,14 @@ async def send_message_with_keyboard(callback_query: CallbackQuery, text: str, r
     await callback_query.answer()
 
 
+async def send_chunks_with_keyboard(callback_query: CallbackQuery, chunks: list[str], reply_markup) -> None:
+    """Показывает длинный текст несколькими сообщениями; клавиатура — под последним."""
+    first, *rest = chunks
+    await send_message_with_keyboard(callback_query, first, None if rest else reply_markup)
+    for index, chunk in enumerate(rest, start=1):
+        await callback_query.message.answer(chunk, reply_markup=reply_markup if index == len(rest) else None)
+
+
 async def handle_database_error(callback_query: CallbackQuery, error_message: str) -> None:
     """Обрабатывает ошибки, отправляя сообщение об ошибке."""
     await send_message_with_keyboard(callback_query, error_message, main_menu_keyboard)
@@ -68,6 +96,24 @@ async def open_menu(callback_query: CallbackQuery) -> None:
     await send_message_with_keyboard(callback_query, BOT_ANSWER[menu_key], keyboard)
 
 
+@callbacks_router.callback_query(lambda c: c.data == "overview_pressed")
+async def show_overview(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Показывает число задач по категориям и ближайшие события по дням"""
+    user_id = callback_query.from_user.id
+
+    try:
+        categories = await get_category_overview(db_session, user_id)
+        events = await get_upcoming_event_counts(db_session, user_id)
+    except SQLAlchemyError:
+        await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
+        return
+
+    if categories or events:
+        await send_chunks_with_keyboard(callback_query, format_overview(categories, events), main_menu_keyboard)
+    else:
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["overview_empty"], main_menu_keyboard)
+
+
 # ==============================
 # Работа с категориями
 # ==============================
@@ -93,14 +139,20 @@ async def show_category_keyboard_for_deletion(callback_query: CallbackQuery, sta
 @callbacks_router.callback_query(
     StateFilter(InputState.waiting_for_category_deletion), lambda c: c.data.startswith("category_"))
 async def delete_selected_category(callback_query: CallbackQuery, state: FSMContext, db_session: AsyncSession) -> None:
-    """Удаляет выбранную категорию"""
+    """Удаляет выбранную категорию; из чужой общей категории пользователь выходит"""
     category_id = int(callback_query.data.split("_")[1])
     user_id = callback_query.from_user.id
 
     try:
-        await delete_category(db_session, category_id, user_id)
-        await send_message_with_keyboard(callback_query, BOT_ANSWER["category_deleted"], main_menu_keyboard)
-    except SQLAlchemyError:
+        result = await submit_write("remove_category", user_id, {"category_id": category_id},
+                                    lambda: remove_category(db_session, category_id, user_id))
+        inline_cache.invalidate(user_id)
+        if result is WRITE_DEFERRED:
+            text = BOT_ANSWER["saved_offline"]
+        else:
+            text = BOT_ANSWER["category_left"] if result else BOT_ANSWER["category_deleted"]
+        await send_message_with_keyboard(callback_query, text, main_menu_keyboard)
+    except (SQLAlchemyError, ValueError):
         await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
 
     await state.clear()
@@ -120,8 +172,14 @@ async def handle_category_name(message: Message, state: FSMContext, db_session:
                                  reply_markup=main_menu_keyboard)
             await state.update_data(deleting_category=False)
         else:
-            category, created = await get_or_create_category(db_session, category_name, user_id)
-
+            result = await submit_write("add_category", user_id, {"name": category_name},
+                                        lambda: get_or_create_category(db_session, category_name, user_id))
+            if result is WRITE_DEFERRED:
+                await message.answer(BOT_ANSWER["saved_offline"], reply_markup=main_menu_keyboard)
+                await state.clear()
+                return
+
+            category, created = result
             if created:
                 await message.answer(BOT_ANSWER["category_added"].format(category_name=category_name),
                                      reply_markup=task_keyboard)
@@ -137,9 +195,9 @@ async def handle_category_name(message: Message, state: FSMContext, db_session:
 @callbacks_router.callback_query(lambda c: c.data == "update_category_pressed")
 async def show_category_keyboard_for_update(callback_query: CallbackQuery, state: FSMContext,
                                             db_session: AsyncSession) -> None:
-    """Показывает клавиатуру с категориями для изменения"""
+    """Показывает клавиатуру со своими категориями для изменения"""
     user_id = callback_query.from_user.id
-    category_keyboard = await generate_category_keyboard(user_id, db_session)
+    category_keyboard = await generate_owned_category_keyboard(user_id, db_session)
 
     await send_message_with_keyboard(callback_query, BOT_ANSWER["input_category_name_for_update"], category_keyboard)
     await state.set_state(InputState.waiting_for_category_update)
@@ -165,23 +223,58 @@ async def update_category_name(message: Message, state: FSMContext, db_session:
     category_id = data.get("current_category_id")
 
     try:
-        await update_category(db_session, category_id, new_category_name, user_id)
-        await message.answer(BOT_ANSWER["category_updated"].format(category_name=new_category_name),
-                             reply_markup=main_menu_keyboard)
-    except SQLAlchemyError:
+        result = await submit_write("update_category", user_id, {"category_id": category_id, "name": new_category_name},
+                                    lambda: update_category(db_session, category_id, new_category_name, user_id))
+        inline_cache.invalidate(user_id)
+        if result is WRITE_DEFERRED:
+            await message.answer(BOT_ANSWER["saved_offline"], reply_markup=main_menu_keyboard)
+        else:
+            await message.answer(BOT_ANSWER["category_updated"].format(category_name=new_category_name),
+                                 reply_markup=main_menu_keyboard)
+    except (SQLAlchemyError, ValueError):
         await message.answer(BOT_ANSWER["error_occurred"], reply_markup=main_menu_keyboard)
 
     await state.clear()
 
 
+@callbacks_router.callback_query(lambda c: c.data == "share_category_pressed")
+async def show_category_keyboard_for_share(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Показывает клавиатуру со своими категориями, которыми можно поделиться"""
+    user_id = callback_query.from_user.id
+    category_keyboard = await generate_share_category_keyboard(user_id, db_session)
+    await send_message_with_keyboard(callback_query, BOT_ANSWER["input_category_name_for_share"], category_keyboard)
+
+
+@callbacks_router.callback_query(lambda c: c.data.startswith("share_"))
+async def share_selected_category(callback_query: CallbackQuery, bot: Bot, db_session: AsyncSession) -> None:
+    """Присылает ссылку-приглашение в выбранную категорию"""
+    category_id = int(callback_query.data.split("_")[1])
+    user_id = callback_query.from_user.id
+
+    try:
+        invite_code, category_name = await get_or_create_invite_code(db_session, category_id, user_id)
+    except (SQLAlchemyError, ValueError):
+        await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
+        return
+
+    link = await create_start_link(bot, f"join_{invite_code}")
+    await send_message_with_keyboard(
+        callback_query,
+        BOT_ANSWER["category_invite_link"].format(category_name=html.escape(category_name), link=link),
+        main_menu_keyboard
+    )
+
+
 # ==============================
 # Работа с задачами
 # ==============================
 
-@callbacks_router.callback_query(lambda c: c.data == "add_task_pressed")
-async def select_category_for_add_task(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
-    """Выбор категории для задачи"""
+@callbacks_router.callback_query(lambda c: c.data in ("add_task_pressed", "add_task_list_pressed"))
+async def select_category_for_add_task(callback_query: CallbackQuery, state: FSMContext,
+                                       db_session: AsyncSession) -> None:
+    """Выбор категории для задачи (или для списка задач)"""
     user_id = callback_query.from_user.id
+    await state.update_data(task_list_input=callback_query.data == "add_task_list_pressed")
     category_keyboard = await generate_category_keyboard(user_id, db_session)
 
     await send_message_with_keyboard(callback_query, BOT_ANSWER["select_category_for_task"], category_keyboard)
@@ -193,21 +286,58 @@ async def input_description_task(callback_query: CallbackQuery, state: FSMContex
     category_id = int(callback_query.data.split("_")[1])
     await state.update_data(current_category_id=category_id)
 
-    await send_message_with_keyboard(callback_query, BOT_ANSWER["input_task_description"], back_keyboard)
+    task_list_input = (await state.get_data()).get("task_list_input")
+    text = BOT_ANSWER["input_task_list"] if task_list_input else BOT_ANSWER["input_task_description"]
+    await send_message_with_keyboard(callback_query, text, back_keyboard)
     await state.set_state(InputState.waiting_for_task_description)
 
 
+async def add_task_list(message: Message, bot: Bot, text: str, category_id: int, user_id: int,
+                        db_session: AsyncSession) -> None:
+    """Добавляет каждую непустую строку сообщения отдельной задачей"""
+    descriptions = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    if not descriptions:
+        await message.answer(BOT_ANSWER["no_tasks_in_list"], reply_markup=main_menu_keyboard)
+        return
+
+    count = await submit_write("create_tasks", user_id, {"descriptions": descriptions, "category_id": category_id},
+                               lambda: create_tasks(db_session, descriptions, category_id, user_id))
+    if count is WRITE_DEFERRED:
+        await message.answer(BOT_ANSWER["saved_offline"], reply_markup=main_menu_keyboard)
+        return
+
+    # Сообщение со всем списком может не влезть в лимит Telegram, поэтому показываем начало
+    task_list = "\n".join(f"• {description}" for description in descriptions[:TASK_LIST_PREVIEW])
+    if count > TASK_LIST_PREVIEW:
+        task_list += "\n…"
+    await message.answer(BOT_ANSWER["task_list_added"].format(count=count, task_list=task_list),
+                         reply_markup=main_menu_keyboard)
+    await notify_category_members(bot, category_id, message.from_user.full_name, user_id, descriptions)
+
+
 @callbacks_router.message(StateFilter(InputState.waiting_for_task_description))
-async def add_task(message: Message, state: FSMContext, db_session: AsyncSession) -> None:
+async def add_task(message: Message, state: FSMContext, bot: Bot, db_session: AsyncSession) -> None:
     """Добавляет новую задачу"""
     task_description = message.text
     user_id = message.from_user.id
-    category_id = (await state.get_data()).get("current_category_id")
+    data = await state.get_data()
+    category_id = data.get("current_category_id")
 
     try:
-        await create_task(db_session, task_description, category_id, user_id)
-        await message.answer(BOT_ANSWER["task_added"].format(task_description=task_description),
-                             reply_markup=main_menu_keyboard)
+        if data.get("task_list_input"):
+            await add_task_list(message, bot, task_description, category_id, user_id, db_session)
+        else:
+            result = await submit_write(
+                "create_tasks", user_id, {"descriptions": [task_description], "category_id": category_id},
+                lambda: create_task(db_session, task_description, category_id, user_id)
+            )
+            text = (BOT_ANSWER["saved_offline"] if result is WRITE_DEFERRED
+                    else BOT_ANSWER["task_added"].format(task_description=task_description))
+            await message.answer(text, reply_markup=main_menu_keyboard)
+            if result is not WRITE_DEFERRED:
+                await notify_category_members(bot, category_id, message.from_user.full_name, user_id,
+                                              [task_description])
+        inline_cache.invalidate(user_id)
     except SQLAlchemyError:
         await message.answer(BOT_ANSWER["error_occurred"], reply_markup=main_menu_keyboard)
 
@@ -222,8 +352,7 @@ async def get_all_tasks(callback_query: CallbackQuery, db_session: AsyncSession)
     tasks = await get_tasks(db_session, user_id)
 
     if tasks:
-        tasks_message = format_tasks_by_category(tasks)
-        await send_message_with_keyboard(callback_query, tasks_message, main_menu_keyboard)
+        await send_chunks_with_keyboard(callback_query, format_tasks_by_category(tasks), main_menu_keyboard)
     else:
         await send_message_with_keyboard(callback_query, BOT_ANSWER["no_tasks"], main_menu_keyboard)
 
@@ -249,11 +378,80 @@ async def delete_selected_task(callback_query: CallbackQuery, db_session: AsyncS
 
     try:
         await delete_task_by_id(db_session, task_id, user_id)
+        inline_cache.invalidate(user_id)
         await send_message_with_keyboard(callback_query, BOT_ANSWER["task_deleted"], main_menu_keyboard)
     except SQLAlchemyError:
         await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
 
 
+@callbacks_router.callback_query(lambda c: c.data == "complete_tasks_pressed")
+async def show_task_keyboard_for_completion(callback_query: CallbackQuery, state: FSMContext,
+                                            db_session: AsyncSession) -> None:
+    """Показывает задачи для отметки выполненными; выбор копится до нажатия «Готово»"""
+    user_id = callback_query.from_user.id
+
+    tasks = await get_tasks(db_session, user_id)
+    if not tasks:
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["no_tasks"], main_menu_keyboard)
+        return
+
+    # Список запоминаем в состоянии, чтобы переключение отметок не обращалось к базе
+    task_items = [(task.id, task.description) for task in tasks]
+    await state.set_state(InputState.waiting_for_tasks_completion)
+    await state.update_data(completion_tasks=task_items, completion_selected=[])
+    await send_message_with_keyboard(callback_query, BOT_ANSWER["select_tasks_to_complete"],
+                                     generate_complete_tasks_keyboard(task_items, set()))
+
+
+@callbacks_router.callback_query(
+    StateFilter(InputState.waiting_for_tasks_completion), lambda c: c.data.startswith("complete_toggle_"))
+async def toggle_task_for_completion(callback_query: CallbackQuery, state: FSMContext) -> None:
+    """Отмечает задачу или снимает отметку"""
+    task_id = int(callback_query.data.removeprefix("complete_toggle_"))
+    data = await state.get_data()
+    selected = set(data.get("completion_selected", []))
+    selected ^= {task_id}
+
+    await state.update_data(completion_selected=sorted(selected))
+    await callback_query.message.edit_reply_markup(
+        reply_markup=generate_complete_tasks_keyboard(data.get("completion_tasks", []), selected)
+    )
+    await callback_query.answer()
+
+
+@callbacks_router.callback_query(
+    StateFilter(InputState.waiting_for_tasks_completion), lambda c: c.data == "complete_confirm")
+async def complete_selected_tasks(callback_query: CallbackQuery, state: FSMContext, db_session: AsyncSession) -> None:
+    """Отмечает выбранные задачи выполненными одним запросом"""
+    user_id = callback_query.from_user.id
+    task_ids = (await state.get_data()).get("completion_selected", [])
+
+    try:
+        count = await complete_tasks(db_session, task_ids, user_id)
+        inline_cache.invalidate(user_id)
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["tasks_completed"].format(count=count),
+                                         main_menu_keyboard)
+    except SQLAlchemyError:
+        await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
+
+    await state.clear()
+
+
+@callbacks_router.callback_query(lambda c: c.data == "stats_pressed")
+async def show_completion_stats(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Показывает, сколько задач выполнено по категориям и неделям"""
+    try:
+        rows = await get_completion_stats(db_session, callback_query.from_user.id)
+    except SQLAlchemyError:
+        await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
+        return
+
+    if rows:
+        await send_chunks_with_keyboard(callback_query, format_completion_stats(rows), main_menu_keyboard)
+    else:
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["stats_empty"], main_menu_keyboard)
+
+
 # ==============================
 # Напоминания
 # ==============================
@@ -275,10 +473,20 @@ async def add_reminder_data(message: Message, state: FSMContext, db_session: Asy
         date, text = user_input.split(' ', 1)
         clean_date = datetime.datetime.strptime(date, "%d.%m.%Y")
 
-        await add_reminder(db_session, clean_date, text, user_id)
+        recurrence = None
+        first_word, *rest = text.split(' ', 1)
+        if rest and (recurrence := parse_recurrence(first_word)):
+            text = rest[0]
 
-        await message.answer(BOT_ANSWER["reminder_added"].format(reminder_text=text),
-                             reply_markup=main_menu_keyboard)
+        result = await submit_write(
+            "add_reminder", user_id, {"date": clean_date.isoformat(), "description": text, "recurrence": recurrence},
+            lambda: add_reminder(db_session, clean_date, text, user_id, recurrence)
+        )
+        inline_cache.invalidate(user_id)
+
+        reply = (BOT_ANSWER["saved_offline"] if result is WRITE_DEFERRED
+                 else BOT_ANSWER["reminder_added"].format(reminder_text=text))
+        await message.answer(reply, reply_markup=main_menu_keyboard)
     except ValueError:
         await message.answer(BOT_ANSWER["invalid_format"],
                              reply_markup=main_menu_keyboard)
@@ -296,10 +504,7 @@ async def get_all_reminders(callback_query: CallbackQuery, db_session: AsyncSess
     reminders = await get_reminders(db_session, user_id)
 
     if reminders:
-        reminders_message = "\n".join(
-            [f"📅 <b>{reminder.date.strftime('%d.%m.%Y')}</b> - {reminder.description}" for reminder in reminders]
-        )
-        await send_message_with_keyboard(callback_query, reminders_message, main_menu_keyboard)
+        await send_chunks_with_keyboard(callback_query, format_reminders(reminders), main_menu_keyboard)
     else:
         await send_message_with_keyboard(callback_query, BOT_ANSWER["no_reminders"], main_menu_keyboard)
 
@@ -325,11 +530,157 @@ async def delete_selected_reminder(callback_query: CallbackQuery, db_session: As
 
     try:
         await delete_reminder_by_id(db_session, reminder_id, user_id)
+        inline_cache.invalidate(user_id)
         await send_message_with_keyboard(callback_query, BOT_ANSWER["reminder_deleted"], main_menu_keyboard)
     except SQLAlchemyError:
         await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
 
 
+# ==============================
+# Кнопки под уведомлениями о событиях
+# ==============================
+
+async def finish_event_action(callback_query: CallbackQuery, reminder_id: int, text: str) -> None:
+    """Убирает кнопки обработанного события из уведомления и показывает подсказку."""
+    markup = callback_query.message.reply_markup
+    if markup is not None:
+        await callback_query.message.edit_reply_markup(reply_markup=remove_event_actions(markup, reminder_id))
+    await callback_query.answer(text)
+
+
+@callbacks_router.callback_query(lambda c: c.data.startswith("event_done_"))
+async def acknowledge_event(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Отмечает событие выполненным"""
+    reminder_id = int(callback_query.data.removeprefix("event_done_"))
+
+    try:
+        reminder = await acknowledge_reminder(db_session, reminder_id, callback_query.from_user.id)
+    except SQLAlchemyError:
+        await callback_query.answer(BOT_ANSWER["error_occurred"], show_alert=True)
+        return
+
+    snoozed_reminders.cancel(reminder_id)
+    await finish_event_action(callback_query, reminder_id,
+                              BOT_ANSWER["event_done"] if reminder else BOT_ANSWER["event_not_found"])
+
+
+@callbacks_router.callback_query(lambda c: c.data.startswith(("event_hour_", "event_tomorrow_")))
+async def snooze_event(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Откладывает событие на час или до завтрашнего утра"""
+    action, reminder_id = callback_query.data.rsplit("_", 1)
+    reminder_id = int(reminder_id)
+
+    if action == "event_hour":
+        fire_at = (get_now() + SNOOZE_DELAY).replace(microsecond=0)
+        if not is_snoozed_time(fire_at):
+            # Полночь означает плановое срабатывание, поэтому сдвигаем на секунду
+            fire_at += datetime.timedelta(seconds=1)
+        text = BOT_ANSWER["event_snoozed_hour"].format(time=fire_at.strftime("%H:%M"))
+    else:
+        # Завтрашняя полночь: событие придёт вместе с утренним уведомлением в 9:00
+        fire_at = get_today_start() + datetime.timedelta(days=1)
+        text = BOT_ANSWER["event_snoozed_tomorrow"]
+
+    try:
+        reminder = await snooze_reminder(db_session, reminder_id, callback_query.from_user.id, fire_at)
+    except SQLAlchemyError:
+        await callback_query.answer(BOT_ANSWER["error_occurred"], show_alert=True)
+        return
+
+    if reminder is None:
+        await finish_event_action(callback_query, reminder_id, BOT_ANSWER["event_not_found"])
+        return
+
+    if is_snoozed_time(fire_at):
+        snoozed_reminders.schedule(reminder_id, fire_at)
+    else:
+        snoozed_reminders.cancel(reminder_id)
+    await finish_event_action(callback_query, reminder_id, text)
+
+
+# ==============================
+# Поиск
+# ==============================
+
+@callbacks_router.callback_query(lambda c: c.data == "search_pressed")
+async def input_search_query(callback_query: CallbackQuery, state: FSMContext) -> None:
+    """Запрашивает поисковый запрос"""
+    await send_message_with_keyboard(callback_query, BOT_ANSWER["input_search_query"], back_keyboard)
+    await state.set_state(InputState.waiting_for_search_query)
+
+
+@callbacks_router.message(StateFilter(InputState.waiting_for_search_query))
+async def search_items(message: Message, state: FSMContext, db_session: AsyncSession) -> None:
+    """Ищет задачи и события по введённому запросу"""
+    query = (message.text or "").strip()[:200]
+    user_id = message.from_user.id
+
+    try:
+        rows, has_more = await search_user_items(db_session, user_id, query)
+    except SQLAlchemyError:
+        await message.answer(BOT_ANSWER["error_occurred"], reply_markup=main_menu_keyboard)
+        await state.clear()
+        return
+
+    if not rows:
+        await message.answer(BOT_ANSWER["search_nothing_found"].format(query=html.escape(query)),
+                             reply_markup=main_menu_keyboard)
+        await state.clear()
+        return
+
+    # Состояние сбрасываем, а запрос оставляем в данных для листания страниц
+    await state.set_state(None)
+    await state.update_data(search_query=query)
+    await message.answer(format_search_results(rows, query, 0), reply_markup=generate_search_keyboard(0, has_more))
+
+
+@callbacks_router.callback_query(lambda c: c.data.startswith("search_page_"))
+async def show_search_page(callback_query: CallbackQuery, state: FSMContext, db_session: AsyncSession) -> None:
+    """Показывает выбранную страницу результатов поиска"""
+    page = int(callback_query.data.split("_")[2])
+    query = (await state.get_data()).get("search_query")
+    user_id = callback_query.from_user.id
+
+    if not query:
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["input_search_query"], back_keyboard)
+        await state.set_state(InputState.waiting_for_search_query)
+        return
+
+    try:
+        rows, has_more = await search_user_items(db_session, user_id, query, page)
+    except SQLAlchemyError:
+        await handle_database_error(callback_query, BOT_ANSWER["error_occurred"])
+        return
+
+    await send_message_with_keyboard(callback_query, format_search_results(rows, query, page),
+                                     generate_search_keyboard(page, has_more))
+
+
+# ==============================
+# Настройки дайджеста
+# ==============================
+
+@callbacks_router.callback_query(lambda c: c.data == "digest_settings_pressed")
+async def show_digest_settings(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Показывает режимы вечернего дайджеста"""
+    mode = await get_digest_mode(db_session, callback_query.from_user.id)
+    await send_message_with_keyboard(callback_query, BOT_ANSWER["digest_settings"],
+                                     generate_digest_mode_keyboard(mode))
+
+
+@callbacks_router.callback_query(lambda c: c.data.startswith("digest_mode_"))
+async def change_digest_mode(callback_query: CallbackQuery, db_session: AsyncSession) -> None:
+    """Меняет режим вечернего дайджеста"""
+    mode = callback_query.data.removeprefix("digest_mode_")
+
+    try:
+        await set_digest_mode(db_session, callback_query.from_user.id, mode)
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["digest_mode_updated"],
+                                         generate_digest_mode_keyboard(mode))
+    except (SQLAlchemyError, ValueError):
+        await send_message_with_keyboard(callback_query, BOT_ANSWER["error_occurred"], main_menu_keyboard)
+
+
 @callbacks_router.message()
 async def unknown_message(message: Message, state: FSMContext):
     """Обрабатывает все неизвестные текстовые сообщения"""
@@ -1,13 +1,28 @@
-from aiogram.filters import Command, CommandStart
-from aiogram.types import Message
+import html
+import os
+import tempfile
 
+from aiogram import Bot, F
+from aiogram.filters import Command, CommandStart, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message, FSInputFile
+
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from keyboards.keyboards import main_menu_keyboard
+from keyboards.keyboards import main_menu_keyboard, back_keyboard
+from .inline_cache import inline_cache
 from .router import commands_router
+from .states import InputState
 from .text_constants import BOT_ANSWER
 
-from .utils import get_or_create_user
+from .utils import ensure_user, join_category, get_completion_stats, format_completion_stats
+from .transfer import (
+    IMPORT_PARSERS, ImportRowError, iter_lines, import_records, write_export_csv, write_export_ics
+)
+
+# Больше 20 МБ Bot API через getFile не отдаёт
+MAX_IMPORT_FILE_SIZE = 20 * 1024 * 1024
 
 
 async def send_welcome_message(user, message):
@@ -18,13 +33,124 @@ async def send_welcome_message(user, message):
     )
 
 
+# Ответы на приглашение в общую категорию по статусу join_category
+JOIN_ANSWERS = {
+    "joined": "category_joined",
+    "already": "category_already_joined",
+    "own": "category_own_invite",
+    "not_found": "category_invite_not_found",
+}
+
+
+@commands_router.message(CommandStart(deep_link=True, magic=F.args.startswith("join_")))
+async def processed_join_command(message: Message, command: CommandObject, db_session: AsyncSession):
+    """Добавляет пользователя в общую категорию по ссылке /start join_<код>."""
+    user_data = message.from_user
+    await ensure_user(db_session, user_data)
+
+    status, category_name = await join_category(db_session, command.args.removeprefix("join_"), user_data.id)
+    if status == "joined":
+        inline_cache.invalidate(user_data.id)
+
+    await message.answer(
+        BOT_ANSWER[JOIN_ANSWERS[status]].format(category_name=html.escape(category_name or "")),
+        reply_markup=main_menu_keyboard
+    )
+
+
 @commands_router.message(CommandStart())
 async def processed_start_command(message: Message, db_session: AsyncSession):
     user_data = message.from_user
 
-    user = await get_or_create_user(db_session, user_data)
-    await send_welcome_message(user, message)
+    await ensure_user(db_session, user_data)
+    await send_welcome_message(user_data, message)
 
 @commands_router.message(Command(commands=["help"]))
 async def processed_help_command(message: Message):
-    await message.answer(BOT_ANSWER["help"])
\ No newline at end of file
+    await message.answer(BOT_ANSWER["help"])
+
+
+@commands_router.message(Command(commands=["stats"]))
+async def processed_stats_command(message: Message, db_session: AsyncSession):
+    try:
+        rows = await get_completion_stats(db_session, message.from_user.id)
+    except SQLAlchemyError:
+        await message.answer(BOT_ANSWER["error_occurred"], reply_markup=main_menu_keyboard)
+        return
+
+    if not rows:
+        await message.answer(BOT_ANSWER["stats_empty"], reply_markup=main_menu_keyboard)
+        return
+
+    *chunks, last = format_completion_stats(rows)
+    for chunk in chunks:
+        await message.answer(chunk)
+    await message.answer(last, reply_markup=main_menu_keyboard)
+
+
+@commands_router.message(Command(commands=["search"]))
+async def processed_search_command(message: Message, state: FSMContext):
+    await message.answer(BOT_ANSWER["input_search_query"], reply_markup=back_keyboard)
+    await state.set_state(InputState.waiting_for_search_query)
+
+
+@commands_router.message(F.document)
+async def processed_import_document(message: Message, bot: Bot, db_session: AsyncSession):
+    document = message.document
+    file_name = document.file_name or ""
+    parse_records = IMPORT_PARSERS.get(os.path.splitext(file_name)[1].lower())
+
+    if parse_records is None:
+        await message.answer(BOT_ANSWER["import_unsupported"])
+        return
+    if document.file_size and document.file_size > MAX_IMPORT_FILE_SIZE:
+        await message.answer(BOT_ANSWER["import_too_large"].format(max_size=MAX_IMPORT_FILE_SIZE // 1024 // 1024))
+        return
+
+    await message.answer(BOT_ANSWER["import_started"].format(file_name=html.escape(file_name)))
+
+    # Файл читается из Bot API кусками и разбирается построчно, не попадая в память целиком
+    file = await bot.get_file(document.file_id)
+    chunks = bot.session.stream_content(url=bot.session.api.file_url(bot.token, file.file_path))
+
+    try:
+        await ensure_user(db_session, message.from_user)
+        summary = await import_records(db_session, message.from_user.id, parse_records(iter_lines(chunks)))
+    except ImportRowError as error:
+        await message.answer(BOT_ANSWER["import_failed"].format(error=html.escape(str(error))))
+        return
+    except SQLAlchemyError:
+        await message.answer(BOT_ANSWER["error_occurred"], reply_markup=main_menu_keyboard)
+        return
+    finally:
+        inline_cache.invalidate(message.from_user.id)
+
+    text = BOT_ANSWER["import_summary"].format(
+        categories=summary.categories, tasks=summary.tasks, events=summary.events, skipped=summary.skipped
+    )
+    if summary.errors:
+        text += BOT_ANSWER["import_errors"].format(errors=html.escape("\n".join(summary.errors)))
+    await message.answer(text, reply_markup=main_menu_keyboard)
+
+
+@commands_router.message(Command(commands=["export"]))
+async def processed_export_command(message: Message, command: CommandObject, db_session: AsyncSession):
+    as_calendar = (command.args or "").strip().lower() == "ics"
+    write_export, suffix = (write_export_ics, ".ics") if as_calendar else (write_export_csv, ".csv")
+
+    # Выгрузка пишется во временный файл по мере чтения из базы и отправляется с диска
+    with tempfile.NamedTemporaryFile("w", suffix=suffix, encoding="utf-8", newline="", delete=False) as file:
+        path = file.name
+        try:
+            rows = await write_export(db_session, message.from_user.id, file)
+        except BaseException:
+            os.remove(path)
+            raise
+
+    try:
+        if rows == 0:
+            await message.answer(BOT_ANSWER["export_empty"])
+            return
+        await message.answer_document(FSInputFile(path, filename=f"remember_me{suffix}"))
+    finally:
+        os.remove(path)
@@ -0,0 +1,92 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from .utils import get_now
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredQueue:
+    """Очередь отложенной доставки на куче таймеров.
+
+    Постановка и отмена стоят O(log n) и O(1); фоновая задача спит до ближайшего
+    срока и просыпается, только когда он наступил или в голову кучи встал более
+    ранний элемент, поэтому ожидающие элементы ничего не стоят. Отмена ленивая:
+    устаревшие записи кучи отбрасываются, когда доходят до её головы.
+    """
+
+    def __init__(self, now: Callable[[], datetime]):
+        self._now = now
+        self._heap: list[tuple[datetime, int, int]] = []
+        self._due: dict[int, datetime] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, item_id: int, due: datetime) -> None:
+        """Ставит элемент на срок due; повторная постановка переносит срок."""
+        self._due[item_id] = due
+        heapq.heappush(self._heap, (due, next(self._counter), item_id))
+        if self._heap[0][2] == item_id:
+            self._wakeup.set()
+
+    def cancel(self, item_id: int) -> None:
+        self._due.pop(item_id, None)
+
+    def start(self, deliver: Callable[[list[int]], Awaitable[None]]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(deliver))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+
+    def _pop_due(self) -> tuple[list[int], float | None]:
+        """Забирает наступившие элементы и возвращает их вместе с паузой до следующего срока."""
+        now = self._now()
+        ready = []
+
+        while self._heap:
+            due, _, item_id = self._heap[0]
+            if self._due.get(item_id) != due:
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                return ready, (due - now).total_seconds()
+
+            heapq.heappop(self._heap)
+            del self._due[item_id]
+            ready.append(item_id)
+
+        return ready, None
+
+    async def _run(self, deliver: Callable[[list[int]], Awaitable[None]]) -> None:
+        while True:
+            self._wakeup.clear()
+            ready, delay = self._pop_due()
+
+            if ready:
+                try:
+                    await deliver(ready)
+                except Exception:
+                    logger.exception("Не удалось доставить отложенные элементы: %s", ready)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Отложенные кнопкой «+1 ч» события; сроки хранятся в reminders.next_fire_at и
+# поднимаются в очередь при старте бота
+snoozed_reminders = DeferredQueue(get_now)
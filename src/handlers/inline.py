@@ -0,0 +1,67 @@
+import html
+
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .inline_cache import InlineItem, inline_cache
+from .router import inline_router
+from .utils import get_tasks, get_reminders, get_reminder_display_date
+
+# Ограничение Telegram на число результатов в одном ответе
+INLINE_RESULTS_LIMIT = 50
+# Сколько секунд Telegram может отдавать ответ из своего кеша, не присылая запрос боту
+INLINE_CACHE_TIME = 10
+
+
+async def load_inline_items(db_session: AsyncSession, user_id: int) -> list[InlineItem]:
+    """Загружает все задачи и события пользователя для inline-поиска."""
+    tasks = await get_tasks(db_session, user_id)
+    reminders = await get_reminders(db_session, user_id)
+
+    return [
+        InlineItem(kind="task", id=task.id, title=task.description, description=task.category.name)
+        for task in tasks
+    ] + [
+        InlineItem(kind="reminder", id=reminder.id, title=reminder.description,
+                   description=get_reminder_display_date(reminder).strftime('%d.%m.%Y'))
+        for reminder in reminders
+    ]
+
+
+def build_inline_result(item: InlineItem) -> InlineQueryResultArticle:
+    if item.kind == "task":
+        text = f"⏰ <b>{html.escape(item.description)}:</b> {html.escape(item.title)}"
+    else:
+        text = f"📅 <b>{html.escape(item.description)}</b> - {html.escape(item.title)}"
+
+    return InlineQueryResultArticle(
+        id=f"{item.kind}_{item.id}",
+        title=item.title,
+        description=item.description,
+        input_message_content=InputTextMessageContent(message_text=text),
+    )
+
+
+@inline_router.inline_query()
+async def inline_lookup(inline_query: InlineQuery, db_session: AsyncSession) -> None:
+    """Ищет задачи и события пользователя в inline-режиме"""
+    user_id = inline_query.from_user.id
+    query = inline_query.query.strip().lower()
+    offset = int(inline_query.offset or 0)
+
+    items = inline_cache.get(user_id, query)
+    if items is None:
+        all_items = await load_inline_items(db_session, user_id)
+        inline_cache.set(user_id, "", all_items)
+        # Кеш может быть отключён (нулевой размер или TTL), поэтому фильтруем загруженное сами
+        items = [item for item in all_items if item.matches(query)]
+
+    page = items[offset:offset + INLINE_RESULTS_LIMIT]
+    next_offset = str(offset + INLINE_RESULTS_LIMIT) if offset + INLINE_RESULTS_LIMIT < len(items) else ""
+
+    await inline_query.answer(
+        [build_inline_result(item) for item in page],
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=True,
+        next_offset=next_offset,
+    )
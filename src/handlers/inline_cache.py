@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from config import INLINE_CACHE_TTL, INLINE_CACHE_SIZE
+from src.models.bot_scope import current_bot_id
+
+# Владелец записей кеша: пользователь в конкретном боте
+Owner = tuple[int | None, int]
+
+
+@dataclass(frozen=True)
+class InlineItem:
+    kind: str
+    id: int
+    title: str
+    description: str
+
+    def matches(self, query: str) -> bool:
+        return query in self.title.lower() or query in self.description.lower()
+
+
+class InlineResultCache:
+    """Кеш найденных элементов по паре (пользователь, запрос) с коротким TTL.
+
+    Результаты для более короткого запроса переиспользуются для более длинного:
+    всё, что подходит под «молоко», уже содержится в результатах для «мол»,
+    поэтому при наборе каждой следующей буквы база не нужна.
+    """
+
+    def __init__(self, ttl: float = INLINE_CACHE_TTL, max_size: int = INLINE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[Owner, str], tuple[float, list[InlineItem]]] = OrderedDict()
+        self._user_queries: dict[Owner, set[str]] = {}
+
+    def get(self, user_id: int, query: str) -> list[InlineItem] | None:
+        now = time.monotonic()
+        owner = (current_bot_id.get(), user_id)
+
+        for length in range(len(query), -1, -1):
+            key = (owner, query[:length])
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+
+            expires_at, items = entry
+            if expires_at < now:
+                self._remove(key)
+                continue
+
+            self._entries.move_to_end(key)
+            if length == len(query):
+                return items
+
+            items = [item for item in items if item.matches(query)]
+            self.set(user_id, query, items, expires_at)
+            return items
+
+        return None
+
+    def set(self, user_id: int, query: str, items: list[InlineItem], expires_at: float | None = None) -> None:
+        owner = (current_bot_id.get(), user_id)
+        key = (owner, query)
+        self._entries[key] = (expires_at or time.monotonic() + self.ttl, items)
+        self._entries.move_to_end(key)
+        self._user_queries.setdefault(owner, set()).add(query)
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id: int) -> None:
+        """Сбрасывает кеш пользователя после изменения его задач или событий."""
+        owner = (current_bot_id.get(), user_id)
+        for query in self._user_queries.pop(owner, set()):
+            self._entries.pop((owner, query), None)
+
+    def _remove(self, key: tuple[Owner, str]) -> None:
+        owner, query = key
+        del self._entries[key]
+        queries = self._user_queries.get(owner)
+        if queries is not None:
+            queries.discard(query)
+            if not queries:
+                del self._user_queries[owner]
+
+
+inline_cache = InlineResultCache()
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import delete, event, update
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from circuit_breaker import database_breaker, is_database_outage
+from config import OUTBOX_PATH, OUTBOX_REPLAY_INTERVAL
+from database import get_session
+from metrics import OUTBOX_PENDING, OUTBOX_OPERATIONS
+from src.models.bot_scope import bot_scope, current_bot_id
+from src.models.models import AppliedOperationModel, CategoryModel, TaskModel, ReminderModel
+from .inline_cache import inline_cache
+from .recurrence import next_occurrence
+from .utils import get_today_start, leave_category
+
+logger = logging.getLogger(__name__)
+
+# Сколько изменений читать из журнала за раз при восстановлении
+OUTBOX_REPLAY_BATCH_SIZE = 100
+
+# Результат submit_write, когда изменение записано в журнал, а не в базу
+WRITE_DEFERRED = object()
+
+
+@dataclass
+class Operation:
+    id: int
+    op_id: str
+    kind: str
+    bot_id: int
+    user_id: int
+    payload: dict
+
+
+class WriteOutbox:
+    """Локальный журнал изменений (SQLite), которые не удалось записать в базу.
+
+    Изменения только дописываются в конец и применяются строго по порядку, когда
+    база снова доступна. op_id изменения записывается в applied_operations в той же
+    транзакции, что и само изменение, поэтому повтор после сбоя между записью
+    в базу и удалением из журнала ничего не дублирует.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        # Работа с файлом идёт в отдельном потоке, чтобы fsync не останавливал цикл событий
+        self._lock = threading.Lock()
+        self._pending: Counter[tuple[int, int]] = Counter()
+        self._task: asyncio.Task | None = None
+
+    def has_pending(self, bot_id: int, user_id: int) -> bool:
+        """Есть ли у пользователя неприменённые изменения: новые тогда тоже идут в журнал, чтобы сохранить порядок."""
+        self._open()
+        return self._pending[(bot_id, user_id)] > 0
+
+    def _open(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._connection is not None:
+                return self._connection
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, op_id TEXT NOT NULL UNIQUE, kind TEXT NOT NULL, "
+                "bot_id INTEGER NOT NULL, user_id INTEGER NOT NULL, payload TEXT NOT NULL)"
+            )
+            rows = connection.execute("SELECT bot_id, user_id, count(*) FROM outbox GROUP BY bot_id, user_id")
+            self._pending = Counter({(bot_id, user_id): count for bot_id, user_id, count in rows})
+            OUTBOX_PENDING.set(sum(self._pending.values()))
+
+            self._connection = connection
+            return connection
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        connection = self._open()
+        with self._lock:
+            return connection.execute(sql, parameters).fetchall()
+
+    async def append(self, op_id: str, kind: str, bot_id: int, user_id: int, payload: dict) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO outbox (op_id, kind, bot_id, user_id, payload) VALUES (?, ?, ?, ?, ?)",
+            (op_id, kind, bot_id, user_id, json.dumps(payload, ensure_ascii=False)),
+        )
+        self._pending[(bot_id, user_id)] += 1
+        OUTBOX_PENDING.inc()
+        OUTBOX_OPERATIONS.labels("deferred").inc()
+
+    async def read(self, limit: int) -> list[Operation]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT id, op_id, kind, bot_id, user_id, payload FROM outbox ORDER BY id LIMIT ?",
+            (limit,),
+        )
+        return [
+            Operation(id=row_id, op_id=op_id, kind=kind, bot_id=bot_id, user_id=user_id, payload=json.loads(payload))
+            for row_id, op_id, kind, bot_id, user_id, payload in rows
+        ]
+
+    async def remove(self, operation: Operation) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM outbox WHERE id = ?", (operation.id,))
+        key = (operation.bot_id, operation.user_id)
+        self._pending[key] -= 1
+        if self._pending[key] <= 0:
+            del self._pending[key]
+        OUTBOX_PENDING.dec()
+
+    async def replay(self, apply: Callable[[Operation], Awaitable[bool]]) -> None:
+        """Применяет изменения по порядку; при недоступности базы останавливается до следующей попытки."""
+        while operations := await self.read(OUTBOX_REPLAY_BATCH_SIZE):
+            for operation in operations:
+                try:
+                    applied = await apply(operation)
+                except Exception as error:
+                    if is_database_outage(error):
+                        return
+                    # Изменение уже не применить (например, категорию удалили): не держим из-за него очередь
+                    logger.exception("Изменение %s (%s) из журнала отброшено", operation.op_id, operation.kind)
+                    OUTBOX_OPERATIONS.labels("failed").inc()
+                else:
+                    OUTBOX_OPERATIONS.labels("applied" if applied else "duplicate").inc()
+
+                await self.remove(operation)
+
+        logger.info("Журнал изменений применён")
+
+    def start(self, apply: Callable[[Operation], Awaitable[bool]]) -> None:
+        self._open()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(apply))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def _run(self, apply: Callable[[Operation], Awaitable[bool]]) -> None:
+        while True:
+            if self._pending and database_breaker.allows_requests:
+                try:
+                    await self.replay(apply)
+                except Exception:
+                    logger.exception("Не удалось применить журнал изменений")
+            await asyncio.sleep(OUTBOX_REPLAY_INTERVAL)
+
+
+write_outbox = WriteOutbox(OUTBOX_PATH)
+
+
+# ==============================
+# Запись изменений
+# ==============================
+
+# op_id изменения, которое submit_write сейчас записывает в базу напрямую
+current_operation_id: ContextVar[str | None] = ContextVar("current_operation_id", default=None)
+
+
+@event.listens_for(Session, "before_commit")
+def record_current_operation(session) -> None:
+    """Записывает op_id прямой записи в applied_operations в той же транзакции, что и само изменение.
+
+    Если ответ на COMMIT потерян и изменение всё же ушло в журнал, при восстановлении
+    оно будет пропущено как уже применённое.
+    """
+    op_id = current_operation_id.get()
+    if op_id is None:
+        return
+    current_operation_id.set(None)
+    session.execute(insert(AppliedOperationModel).values(op_id=op_id).on_conflict_do_nothing())
+
+
+async def submit_write(kind: str, user_id: int, payload: dict, write: Callable[[], Awaitable[Any]]) -> Any:
+    """Записывает изменение в базу, а если она недоступна — в локальный журнал.
+
+    Возвращает результат write или WRITE_DEFERRED, если изменение отложено.
+    payload должен содержать всё, что нужно, чтобы применить изменение позже (см. OPERATIONS).
+    write должен делать изменение одной транзакцией: op_id записывается при её фиксации.
+    """
+    bot_id = current_bot_id.get()
+    op_id = uuid.uuid4().hex
+
+    if not write_outbox.has_pending(bot_id, user_id):
+        token = current_operation_id.set(op_id)
+        try:
+            return await write()
+        except Exception as error:
+            if not is_database_outage(error):
+                raise
+        finally:
+            current_operation_id.reset(token)
+
+    await write_outbox.append(op_id, kind, bot_id, user_id, payload)
+    return WRITE_DEFERRED
+
+
+# ==============================
+# Применение отложенных изменений
+# ==============================
+
+async def apply_create_tasks(db_session: AsyncSession, user_id: int, descriptions: list[str], category_id: int) -> None:
+    await db_session.execute(
+        insert(TaskModel).values([
+            {"description": description, "category_id": category_id, "user_id": user_id}
+            for description in descriptions
+        ])
+    )
+
+
+async def apply_add_reminder(db_session: AsyncSession, user_id: int, date: str, description: str,
+                             recurrence: str | None) -> None:
+    date = datetime.fromisoformat(date)
+    await db_session.execute(
+        insert(ReminderModel).values(
+            date=date,
+            description=description,
+            user_id=user_id,
+            recurrence=recurrence,
+            next_fire_at=next_occurrence(date, recurrence, get_today_start()),
+        )
+    )
+
+
+async def apply_add_category(db_session: AsyncSession, user_id: int, name: str) -> None:
+    await db_session.execute(
+        insert(CategoryModel)
+        .values(name=name, user_id=user_id)
+        .on_conflict_do_nothing(constraint="uq_user_category_name")
+    )
+
+
+async def apply_update_category(db_session: AsyncSession, user_id: int, category_id: int, name: str) -> None:
+    await db_session.execute(
+        update(CategoryModel)
+        .where(CategoryModel.id == category_id, CategoryModel.user_id == user_id)
+        .values(name=name)
+    )
+
+
+async def apply_delete_category(db_session: AsyncSession, user_id: int, category_id: int) -> None:
+    # В общей категории есть задачи участников: удаляются все задачи категории владельца
+    owned_category = select(CategoryModel.id).where(CategoryModel.id == category_id, CategoryModel.user_id == user_id)
+    await db_session.execute(
+        delete(TaskModel).where(TaskModel.category_id.in_(owned_category))
+    )
+    await db_session.execute(
+        delete(CategoryModel).where(CategoryModel.id == category_id, CategoryModel.user_id == user_id)
+    )
+
+
+async def apply_remove_category(db_session: AsyncSession, user_id: int, category_id: int) -> None:
+    # Из чужой общей категории пользователь выходит, свою — удаляет
+    if not await leave_category(db_session, category_id, user_id):
+        await apply_delete_category(db_session, user_id, category_id)
+
+
+OPERATIONS: dict[str, Callable[..., Awaitable[None]]] = {
+    "create_tasks": apply_create_tasks,
+    "add_reminder": apply_add_reminder,
+    "add_category": apply_add_category,
+    "update_category": apply_update_category,
+    "delete_category": apply_delete_category,
+    "remove_category": apply_remove_category,
+}
+
+
+async def apply_operation(operation: Operation) -> bool:
+    """Применяет изменение из журнала ровно один раз; False, если оно уже было применено."""
+    with bot_scope(operation.bot_id):
+        db_session = await get_session()
+        try:
+            async with db_session.begin():
+                result = await db_session.execute(
+                    insert(AppliedOperationModel)
+                    .values(op_id=operation.op_id)
+                    .on_conflict_do_nothing()
+                    .returning(AppliedOperationModel.op_id)
+                )
+                if result.scalar_one_or_none() is None:
+                    return False
+
+                await OPERATIONS[operation.kind](db_session, operation.user_id, **operation.payload)
+        finally:
+            await db_session.close()
+
+        inline_cache.invalidate(operation.user_id)
+    return True
+
+
+def start_outbox_replay() -> None:
+    write_outbox.start(apply_operation)
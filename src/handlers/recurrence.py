@@ -0,0 +1,111 @@
+import re
+from datetime import datetime, timedelta
+
+from dateutil.rrule import rrule, rrulestr, DAILY, WEEKLY, MONTHLY, YEARLY
+from pytz import timezone, utc
+
+# Ключевые слова, которые пользователь пишет после даты события
+RECURRENCE_KEYWORDS = {
+    "ежедневно": "daily",
+    "еженедельно": "weekly",
+    "ежемесячно": "monthly",
+    "ежегодно": "yearly",
+}
+
+RECURRENCE_LABELS = {
+    "daily": "каждый день",
+    "weekly": "каждую неделю",
+    "monthly": "каждый месяц",
+    "yearly": "каждый год",
+}
+
+FREQUENCIES = {
+    "daily": DAILY,
+    "weekly": WEEKLY,
+    "monthly": MONTHLY,
+    "yearly": YEARLY,
+}
+
+# События срабатывают раз в день, поэтому правила чаще DAILY не принимаются: rule.after()
+# перебирает все срабатывания от даты события, и для SECONDLY это миллионы шагов в цикле событий
+ALLOWED_RRULE_FREQUENCIES = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+FORBIDDEN_RRULE_PARTS = {"BYHOUR", "BYMINUTE", "BYSECOND"}
+
+UTC_UNTIL_PATTERN = re.compile(r"UNTIL=(\d{8}T\d{6})Z")
+
+
+def check_rrule(rule: str) -> None:
+    """ValueError, если правило срабатывает чаще раза в день."""
+    parts = dict(part.split("=", 1) for part in rule[len("RRULE:"):].split(";") if "=" in part)
+    if parts.get("FREQ") not in ALLOWED_RRULE_FREQUENCIES:
+        raise ValueError(f"Повторение чаще раза в день не поддерживается: {rule}")
+    if FORBIDDEN_RRULE_PARTS & parts.keys():
+        raise ValueError(f"Время внутри дня в правиле повторения не поддерживается: {rule}")
+
+
+def normalize_until(rule: str) -> str:
+    """Переводит UNTIL в UTC (…Z, так пишут календари) в московское время без зоны.
+
+    Даты событий хранятся без зоны, а rrulestr не принимает UNTIL с зоной при dtstart без неё.
+    """
+    def to_moscow(match: re.Match) -> str:
+        until = utc.localize(datetime.strptime(match.group(1), "%Y%m%dT%H%M%S"))
+        return f"UNTIL={until.astimezone(timezone('Europe/Moscow')):%Y%m%dT%H%M%S}"
+
+    return UTC_UNTIL_PATTERN.sub(to_moscow, rule)
+
+
+def parse_recurrence(token: str) -> str | None:
+    """Распознаёт правило повторения: ключевое слово или строку RRULE."""
+    keyword = RECURRENCE_KEYWORDS.get(token.lower())
+    if keyword:
+        return keyword
+
+    if token.upper().startswith("RRULE:"):
+        rule = normalize_until(token.upper())
+        check_rrule(rule)
+        rrulestr(rule, dtstart=datetime.now())  # ValueError, если правило некорректно
+        return rule
+
+    return None
+
+
+def get_recurrence_label(recurrence: str | None) -> str | None:
+    if recurrence is None:
+        return None
+    return RECURRENCE_LABELS.get(recurrence, recurrence)
+
+
+def build_rule(anchor: datetime, recurrence: str) -> rrule | None:
+    if recurrence in FREQUENCIES:
+        return rrule(FREQUENCIES[recurrence], dtstart=anchor)
+
+    try:
+        check_rrule(recurrence)
+    except ValueError:
+        # Правило, сохранённое до проверки частоты: не перебираем его, событие больше не срабатывает
+        return None
+    return rrulestr(recurrence, dtstart=anchor)
+
+
+def next_occurrence(anchor: datetime, recurrence: str | None, not_before: datetime) -> datetime | None:
+    """Возвращает первое срабатывание не раньше not_before или None, если их больше не будет."""
+    if recurrence is None:
+        return anchor if anchor >= not_before else None
+
+    rule = build_rule(anchor, recurrence)
+    return rule.after(not_before, inc=True) if rule else None
+
+
+def occurrences_between(anchor: datetime, recurrence: str | None, start: datetime, end: datetime) -> list[datetime]:
+    """Все срабатывания в промежутке [start, end)."""
+    if recurrence is None:
+        return [anchor] if start <= anchor < end else []
+
+    rule = build_rule(anchor, recurrence)
+    return [occurrence for occurrence in rule.between(start, end, inc=True) if occurrence < end] if rule else []
+
+
+def next_occurrence_after_day(anchor: datetime, recurrence: str | None, day_start: datetime) -> datetime | None:
+    """Следующее срабатывание после дня, начинающегося в day_start."""
+    return next_occurrence(anchor, recurrence, day_start + timedelta(days=1))
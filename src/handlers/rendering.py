@@ -0,0 +1,93 @@
+import html
+from dataclasses import dataclass
+from itertools import chain
+from typing import Iterable, Iterator
+
+# Максимальная длина текста сообщения в Telegram (после разбора HTML-разметки лимит
+# считается по видимому тексту, поэтому по сырой строке мы укладываемся с запасом)
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+CONTINUATION_SUFFIX = " (продолжение)"
+
+
+@dataclass
+class Section:
+    """Блок сообщения: заголовок (например, категория) и строки, которые нельзя разрывать."""
+    header: str | None
+    lines: Iterable[str]
+
+
+def truncate_escaped(escaped: str, max_length: int) -> str:
+    """Обрезает уже экранированный текст до max_length, не разрывая HTML-сущности."""
+    if len(escaped) <= max_length:
+        return escaped
+
+    escaped = escaped[:max_length - 1]
+    entity_start = escaped.rfind("&")
+    if entity_start > escaped.rfind(";"):
+        escaped = escaped[:entity_start]
+    return escaped + "…"
+
+
+def escape_text(text: str, max_length: int = TELEGRAM_MESSAGE_LIMIT // 2) -> str:
+    """Экранирует пользовательский текст и обрезает его, не разрывая HTML-сущности."""
+    return truncate_escaped(html.escape(text, quote=False), max_length)
+
+
+def format_header(header: str, continued: bool = False) -> str:
+    return f"<b>{header}{CONTINUATION_SUFFIX if continued else ''}:</b>\n"
+
+
+def render_chunks(title: str, sections: Iterable[Section], limit: int = TELEGRAM_MESSAGE_LIMIT) -> Iterator[str]:
+    """Собирает сообщение из секций и режет его на части не длиннее limit.
+
+    Фрагменты копятся в списке и склеиваются одним join, поэтому сборка линейна по
+    объёму текста. Разрыв делается только между строками: предпочтительно перед новой
+    секцией, а если секция сама не влезает — внутри неё с повтором заголовка.
+    Заголовки и строки должны быть уже экранированы. Заголовок обрезается до четверти
+    limit, а строка — до того, что остаётся после повторённого заголовка, поэтому любая
+    часть укладывается в limit.
+    """
+    parts = [title]
+    length = len(title)
+
+    def flush() -> str:
+        nonlocal parts, length
+        chunk = "".join(parts).rstrip("\n")
+        parts, length = [], 0
+        return chunk
+
+    for section in sections:
+        section_header = truncate_escaped(section.header, limit // 4) if section.header else None
+        header = format_header(section_header) if section_header else ""
+        continued = format_header(section_header, continued=True) if section_header else ""
+        max_line_length = limit - len(continued)
+
+        lines = iter(section.lines)
+        first_line = next(lines, None)
+        if first_line is None:
+            continue
+
+        # Не оставляем заголовок секции висеть в конце сообщения без строк
+        if length and length + len(header) + len(first_line) > limit:
+            yield flush()
+
+        parts.append(header)
+        length += len(header)
+
+        for line in chain((first_line,), lines):
+            if len(line) > max_line_length:
+                line = truncate_escaped(line.rstrip("\n"), max_line_length - 1) + "\n"
+            if length + len(line) > limit:
+                yield flush()
+                parts.append(continued)
+                length = len(continued)
+            parts.append(line)
+            length += len(line)
+
+        parts.append("\n")
+        length += 1
+
+    if length:
+        yield flush()
+
@@ -1,5 +1,7 @@
 from aiogram import Router
 
 
+broadcast_router = Router()
 commands_router = Router()
-callbacks_router = Router()
\ No newline at end of file
+callbacks_router = Router()
+inline_router = Router()
@@ -1,101 +1,521 @@
-from datetime import timedelta, datetime
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable
+
 from pytz import timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from aiogram import Bot
+from sqlalchemy import and_
 from sqlalchemy.future import select
 
+from config import TASK_HISTORY_DAYS, TASK_COMPACTION_BATCH_SIZE
 from database import get_session
-from keyboards.keyboards import main_menu_keyboard
-from src.models.models import UserModel, ReminderModel
-from .callbacks import get_tasks, format_tasks_by_category
+from delivery import is_unreachable_recipient, message_sender
+from keyboards.keyboards import main_menu_keyboard, generate_event_actions_keyboard
+from lifecycle import jobs_in_flight, shutdown_event
+from metrics import MESSAGES_SENT, MESSAGES_FAILED, USERS_DEACTIVATED
+from profiling import profile_queries
+from src.models.bot_scope import bot_scope
+from src.models.models import CategoryModel, UserModel, ReminderModel
+from .deferred import snoozed_reminders
+from .inline_cache import inline_cache
+from .rendering import Section, escape_text, render_chunks
+from .text_constants import BOT_ANSWER
+from .utils import (
+    get_state_value, set_state_value, advance_reminders, get_due_digests, get_digest_tasks, save_digest_fingerprints,
+    deactivate_users, get_category_audience, format_task_rows, compact_completed_tasks,
+    get_now, get_today_start, is_snoozed_time, SNOOZE_DELAY
+)
+
+logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler(timezone=timezone('Europe/Moscow'))
 
+# Боты процесса по Telegram ID: задачи, общие для всех ботов, по bot_id строки находят, кем отправлять
+bots_by_id: dict[int, Bot] = {}
+
+USERS_BATCH_SIZE = 500
+
+
+async def iter_user_ids(batch_size: int = USERS_BATCH_SIZE, after: int | None = None) -> AsyncIterator[list[int]]:
+    """Перебирает идентификаторы активных пользователей пачками по возрастанию user_id."""
+    while True:
+        db_session = await get_session()
+        try:
+            stmt = (
+                select(UserModel.user_id)
+                .where(UserModel.is_active)
+                .order_by(UserModel.user_id)
+                .limit(batch_size)
+            )
+            if after is not None:
+                stmt = stmt.where(UserModel.user_id > after)
+            result = await db_session.execute(stmt)
+            user_ids = result.scalars().all()
+        finally:
+            await db_session.close()
+
+        if not user_ids:
+            return
+
+        yield user_ids
+        after = user_ids[-1]
+
+
+async def deactivate_unreachable_users(user_ids: list[int]) -> None:
+    if not user_ids:
+        return
 
-async def get_all_users() -> list:
     db_session = await get_session()
     try:
-        stmt = select(UserModel)
-        result = await db_session.execute(stmt)
-        return result.scalars().all()
+        await deactivate_users(db_session, user_ids)
     finally:
         await db_session.close()
 
+    USERS_DEACTIVATED.inc(len(user_ids))
+    logger.info("Пользователи помечены неактивными: %s", len(user_ids))
+
+
+async def send_counted_message(bot: Bot, kind: str, user_id: int, text: str, reply_markup=main_menu_keyboard) -> None:
+    """Отправляет сообщение планировщика и учитывает его в метриках."""
+    try:
+        await message_sender.send_message(bot, user_id, text, parse_mode='HTML', reply_markup=reply_markup)
+    except Exception:
+        MESSAGES_FAILED.labels(kind).inc()
+        raise
+    MESSAGES_SENT.labels(kind).inc()
+
+
+async def send_counted_chunks(bot: Bot, kind: str, user_id: int, chunks: list[str],
+                              reply_markup=main_menu_keyboard) -> None:
+    """Отправляет текст, разбитый на части; клавиатура прикрепляется к последней."""
+    for index, chunk in enumerate(chunks, start=1):
+        await send_counted_message(bot, kind, user_id, chunk, reply_markup if index == len(chunks) else None)
+
 
-async def send_task_message(user_id: int, bot: Bot) -> None:
+# ==============================
+# Общие категории
+# ==============================
+
+# Сколько новых задач перечислять в уведомлении участникам общей категории
+SHARED_TASKS_PREVIEW = 10
+
+
+async def notify_category_members(bot: Bot, category_id: int, author: str, author_id: int,
+                                  descriptions: list[str]) -> None:
+    """Сообщает владельцу и участникам общей категории о новых задачах.
+
+    Получатели выбираются одним запросом (для обычной категории он ничего не
+    возвращает), а сообщение отправляется всем сразу через общий лимит скорости бота.
+    """
     db_session = await get_session()
     try:
-        tasks = await get_tasks(db_session, user_id)
-        if tasks:
-            tasks_message = format_tasks_by_category(tasks)
-            await bot.send_message(user_id, tasks_message, parse_mode='HTML', reply_markup=main_menu_keyboard)
+        user_ids = await get_category_audience(db_session, category_id, author_id)
+        if not user_ids:
+            return
+        async with db_session.begin():
+            category = await db_session.get(CategoryModel, category_id)
     finally:
         await db_session.close()
 
+    if category is None:
+        return
 
-async def get_reminders_for_user(db_session, user_id, target_date):
-    start_date = target_date.replace(hour=0, minute=0, second=0, microsecond=0).astimezone(
-        timezone('Europe/Moscow')).replace(tzinfo=None)
-    end_date = (start_date + timedelta(days=1)).replace(tzinfo=None)
+    # Списки задач участников изменились
+    for user_id in user_ids:
+        inline_cache.invalidate(user_id)
 
-    stmt = select(ReminderModel).where(
-        ReminderModel.user_id == user_id,
-        ReminderModel.date >= start_date,
-        ReminderModel.date < end_date
+    task_list = "\n".join(f"• {escape_text(description)}" for description in descriptions[:SHARED_TASKS_PREVIEW])
+    if len(descriptions) > SHARED_TASKS_PREVIEW:
+        task_list += "\n…"
+    text = BOT_ANSWER["shared_tasks_added"].format(
+        author=escape_text(author), category_name=escape_text(category.name), task_list=task_list
     )
-    result = await db_session.execute(stmt)
-    return result.scalars().all()
 
+    delivery = await message_sender.send_many(bot, user_ids, text, parse_mode="HTML", reply_markup=main_menu_keyboard)
+    MESSAGES_SENT.labels("shared").inc(delivery.sent)
+    MESSAGES_FAILED.labels("shared").inc(delivery.failed)
+    await deactivate_unreachable_users(delivery.unreachable)
+
+
+# ==============================
+# События на сегодня
+# ==============================
+
+def get_due_range() -> tuple[datetime, datetime]:
+    """Начало текущих суток и текущий момент.
+
+    Срабатывают все события с next_fire_at до текущего момента, в том числе просроченные:
+    если утренняя рассылка пропала (бот не работал или она упала), событие придёт
+    со следующей и будет перенесено, а не застрянет в прошлом навсегда.
+    """
+    now = datetime.now(timezone('Europe/Moscow')).replace(tzinfo=None)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0), now
+
+
+async def iter_users_with_due_reminders(
+        batch_size: int = USERS_BATCH_SIZE, after: int | None = None) -> AsyncIterator[list[int]]:
+    """Перебирает пачками только тех пользователей, у которых сработали события."""
+    _, end = get_due_range()
+
+    while True:
+        db_session = await get_session()
+        try:
+            stmt = (
+                select(ReminderModel.user_id)
+                .join(UserModel, and_(UserModel.bot_id == ReminderModel.bot_id, UserModel.user_id == ReminderModel.user_id))
+                .where(
+                    ReminderModel.next_fire_at <= end,
+                    UserModel.is_active
+                )
+                .distinct()
+                .order_by(ReminderModel.user_id)
+                .limit(batch_size)
+            )
+            if after is not None:
+                stmt = stmt.where(ReminderModel.user_id > after)
+            result = await db_session.execute(stmt)
+            user_ids = result.scalars().all()
+        finally:
+            await db_session.close()
+
+        if not user_ids:
+            return
+
+        yield user_ids
+        after = user_ids[-1]
+
+
+async def load_due_reminders(user_ids: list[int]) -> dict[int, list[ReminderModel]]:
+    """Загружает сработавшие (и просроченные) события сразу для пачки пользователей."""
+    _, end = get_due_range()
 
-async def notify_user_about_today_reminders(user_id: int, bot: Bot) -> None:
     db_session = await get_session()
     try:
-        today = datetime.now(timezone('Europe/Moscow')).astimezone(timezone('Europe/Moscow'))
+        stmt = (
+            select(ReminderModel)
+            .where(
+                ReminderModel.user_id.in_(user_ids),
+                ReminderModel.next_fire_at <= end
+            )
+            .order_by(ReminderModel.user_id, ReminderModel.next_fire_at)
+        )
+        result = await db_session.execute(stmt)
+        reminders = result.scalars().all()
+    finally:
+        await db_session.close()
 
-        reminders_today = await get_reminders_for_user(db_session, user_id, today)
+    reminders_by_user = {}
+    for reminder in reminders:
+        reminders_by_user.setdefault(reminder.user_id, []).append(reminder)
+    return reminders_by_user
 
-        if reminders_today:
-            reminders_message = "📅 <b>Сегодня:</b>\n" + "\n".join(
-                [f"- {reminder.date.strftime('%d.%m.%Y')}: {reminder.description}" for reminder in reminders_today]
-            )
-            await bot.send_message(user_id, reminders_message, parse_mode='HTML', reply_markup=main_menu_keyboard)
+
+async def notify_user_about_today_reminders(user_id: int, bot: Bot, reminders_today: list[ReminderModel]) -> None:
+    lines = (
+        f"- {reminder.next_fire_at.strftime('%d.%m.%Y')}: {escape_text(reminder.description)}\n"
+        for reminder in reminders_today
+    )
+    chunks = list(render_chunks("📅 <b>Сегодня:</b>\n", [Section(None, lines)]))
+    await send_counted_chunks(bot, "event", user_id, chunks, generate_event_actions_keyboard(reminders_today))
+
+
+async def advance_fired_reminders(reminders_by_user: dict[int, list[ReminderModel]]) -> None:
+    """Переносит сработавшие события пачки на следующее срабатывание."""
+    reminders = [reminder for user_reminders in reminders_by_user.values() for reminder in user_reminders]
+    start, _ = get_due_range()
+
+    db_session = await get_session()
+    try:
+        await advance_reminders(db_session, reminders, start)
     finally:
         await db_session.close()
 
 
 # Уведомляем пользователя о конкретном напоминании
 async def notify_user_about_event_reminders(user_id: int, bot: Bot, reminder: ReminderModel) -> None:
-    reminders_message = f"📅 <b>Напоминание на {reminder.date.strftime('%d.%m.%Y')}:</b>\n- {reminder.description}"
-    await bot.send_message(user_id, reminders_message, parse_mode='HTML', reply_markup=main_menu_keyboard)
+    reminders_message = f"📅 <b>Напоминание на {reminder.next_fire_at.strftime('%d.%m.%Y')}:</b>\n- {escape_text(reminder.description)}"
+    await send_counted_message(bot, "event", user_id, reminders_message, generate_event_actions_keyboard([reminder]))
 
 
-async def check_and_notify_reminders(bot: Bot) -> None:
+# ==============================
+# Отложенные события
+# ==============================
+
+async def fire_snoozed_reminders(reminder_ids: list[int]) -> None:
+    """Присылает отложенные события, срок которых наступил, и переносит их на следующее срабатывание.
+
+    Очередь общая для всех ботов: события раскладываются по bot_id и отправляются от имени своего бота.
+    """
+    async with jobs_in_flight.track():
+        db_session = await get_session()
+        try:
+            async with db_session.begin():
+                # Событие могли удалить или отметить выполненным, пока оно ждало в очереди
+                result = await db_session.execute(
+                    select(ReminderModel)
+                    .where(ReminderModel.id.in_(reminder_ids), ReminderModel.next_fire_at <= get_now())
+                )
+                reminders = result.scalars().all()
+        finally:
+            await db_session.close()
+
+        reminders_by_bot = {}
+        for reminder in reminders:
+            reminders_by_bot.setdefault(reminder.bot_id, []).append(reminder)
+
+        for bot_id, bot_reminders in reminders_by_bot.items():
+            bot = bots_by_id.get(bot_id)
+            if bot is None:
+                logger.warning("Отложенные события бота %s пропущены: бот не запущен", bot_id)
+                continue
+
+            with bot_scope(bot_id):
+                await fire_bot_snoozed_reminders(bot, bot_reminders)
+
+
+async def fire_bot_snoozed_reminders(bot: Bot, reminders: list[ReminderModel]) -> None:
+    unreachable = []
+    for reminder in reminders:
+        try:
+            await notify_user_about_event_reminders(reminder.user_id, bot, reminder)
+        except Exception as error:
+            if is_unreachable_recipient(error):
+                unreachable.append(reminder.user_id)
+            else:
+                logger.exception("Не удалось отправить отложенное событие %s", reminder.id)
+
     db_session = await get_session()
     try:
-        users = await get_all_users()
-        for user in users:
-            await notify_user_about_today_reminders(user.user_id, bot)
+        await advance_reminders(db_session, reminders, get_today_start())
     finally:
         await db_session.close()
 
+    await deactivate_unreachable_users(unreachable)
 
-async def start_task_scheduler(bot: Bot) -> None:
+
+async def restore_snoozed_reminders() -> None:
+    """Поднимает в очередь события, отложенные до перезапуска бота (в том числе уже просроченные)."""
     db_session = await get_session()
     try:
-        users = await get_all_users()
-
-        for user in users:
-            scheduler.add_job(
-                send_task_message,
-                CronTrigger(hour=20, minute=0, timezone='Europe/Moscow'),
-                args=[user.user_id, bot]
+        async with db_session.begin():
+            result = await db_session.execute(
+                select(ReminderModel.id, ReminderModel.next_fire_at)
+                .where(ReminderModel.next_fire_at <= get_now() + SNOOZE_DELAY)
             )
+            snoozed = [(reminder_id, fire_at) for reminder_id, fire_at in result.all() if is_snoozed_time(fire_at)]
+    finally:
+        await db_session.close()
+
+    for reminder_id, fire_at in snoozed:
+        snoozed_reminders.schedule(reminder_id, fire_at)
+    snoozed_reminders.start(fire_snoozed_reminders)
+
+
+# ==============================
+# Сворачивание истории выполненных задач
+# ==============================
+
+async def compact_task_history() -> None:
+    """Переносит старые выполненные задачи в недельную статистику пачками.
+
+    Одна задача на все боты: строки сворачиваются со своим bot_id. Между пачками
+    проверяется остановка бота, недоделанное продолжится при следующем запуске.
+    """
+    before = get_today_start() - timedelta(days=TASK_HISTORY_DAYS)
+    total = 0
+
+    async with jobs_in_flight.track():
+        while not shutdown_event.is_set():
+            db_session = await get_session()
+            try:
+                compacted = await compact_completed_tasks(db_session, before, TASK_COMPACTION_BATCH_SIZE)
+            finally:
+                await db_session.close()
+
+            total += compacted
+            if compacted < TASK_COMPACTION_BATCH_SIZE:
+                break
 
-        scheduler.start()
+    if total:
+        logger.info("Выполненные задачи свёрнуты в статистику: %s", total)
+
+
+# ==============================
+# Рассылки с сохранением прогресса
+# ==============================
+
+@dataclass
+class FanOut:
+    """Описание рассылки: кого перебирать, что загрузить на пачку и как отправить."""
+    iter_user_ids: Callable[..., AsyncIterator[list[int]]]
+    load_batch: Callable[[list[int]], Awaitable[dict[int, Any]]]
+    send: Callable[[int, Bot, Any], Awaitable[None]]
+    finish_batch: Callable[[dict[int, Any]], Awaitable[None]] | None = None
+
+
+def get_fan_out_key(name: str, bot_id: int) -> str:
+    return f"fan_out:{name}:{bot_id}"
+
+
+async def load_fan_out_checkpoint(name: str, bot_id: int) -> dict | None:
+    db_session = await get_session()
+    try:
+        value = await get_state_value(db_session, get_fan_out_key(name, bot_id))
     finally:
         await db_session.close()
 
+    return json.loads(value) if value else None
+
+
+async def save_fan_out_checkpoint(name: str, bot_id: int, run_date: str, after: int | None,
+                                  done: bool = False) -> None:
+    db_session = await get_session()
+    try:
+        value = json.dumps({"date": run_date, "after": after, "done": done})
+        await set_state_value(db_session, get_fan_out_key(name, bot_id), value)
+    finally:
+        await db_session.close()
+
+
+async def run_fan_out(name: str, bot: Bot, after: int | None = None) -> None:
+    """Отправляет сообщения пользователям, сохраняя прогресс после каждой пачки.
+
+    При остановке бота рассылка прерывается, а после перезапуска продолжается
+    с последнего обработанного пользователя (см. resume_fan_outs). Каждый бот
+    рассылает своим пользователям отдельно и со своим прогрессом.
+    """
+    with bot_scope(bot.id):
+        await run_bot_fan_out(name, bot, after)
+
+
+async def run_bot_fan_out(name: str, bot: Bot, after: int | None) -> None:
+    fan_out = FAN_OUTS[name]
+    run_date = datetime.now(timezone('Europe/Moscow')).date().isoformat()
+    last_user_id = after
+
+    async with jobs_in_flight.track(), profile_queries(f"fan-out {name}"):
+        async for user_ids in fan_out.iter_user_ids(after=after):
+            payloads = await fan_out.load_batch(user_ids)
+            processed = {}
+            unreachable = []
+
+            for user_id in user_ids:
+                if shutdown_event.is_set():
+                    break
+
+                if user_id in payloads:
+                    try:
+                        await fan_out.send(user_id, bot, payloads[user_id])
+                    except Exception as error:
+                        if is_unreachable_recipient(error):
+                            unreachable.append(user_id)
+                        else:
+                            logger.exception("Рассылка %s: не удалось отправить сообщение пользователю %s", name, user_id)
+                    else:
+                        processed[user_id] = payloads[user_id]
+                last_user_id = user_id
+
+            await deactivate_unreachable_users(unreachable)
+            if fan_out.finish_batch is not None:
+                await fan_out.finish_batch(processed)
+            await save_fan_out_checkpoint(name, bot.id, run_date, last_user_id)
+
+            if shutdown_event.is_set():
+                logger.info("Рассылка %s остановлена после пользователя %s", name, last_user_id)
+                return
+
+        await save_fan_out_checkpoint(name, bot.id, run_date, last_user_id, done=True)
+
+
+@dataclass
+class Digest:
+    fingerprint: str
+    tasks: list[tuple[str, str]]
+
+
+async def load_digest_batch(user_ids: list[int]) -> dict[int, Digest]:
+    """Отбирает пользователей пачки, которым нужен дайджест, и загружает их задачи.
+
+    Два запроса на пачку: отпечатки и задачи всех получателей, включая участников
+    общих категорий, без отдельного запроса на каждого пользователя.
+    """
+    _, now = get_due_range()
+
+    db_session = await get_session()
+    try:
+        fingerprints = await get_due_digests(db_session, user_ids, now)
+        tasks = await get_digest_tasks(db_session, list(fingerprints))
+    finally:
+        await db_session.close()
+
+    return {
+        user_id: Digest(fingerprint, tasks[user_id])
+        for user_id, fingerprint in fingerprints.items() if user_id in tasks
+    }
+
+
+async def send_digest(user_id: int, bot: Bot, digest: Digest) -> None:
+    await send_counted_chunks(bot, "digest", user_id, format_task_rows(digest.tasks))
+
+
+async def save_sent_digests(digests: dict[int, Digest]) -> None:
+    _, now = get_due_range()
+    fingerprints = {user_id: digest.fingerprint for user_id, digest in digests.items()}
+
+    db_session = await get_session()
+    try:
+        await save_digest_fingerprints(db_session, fingerprints, now)
+    finally:
+        await db_session.close()
+
+
+async def send_daily_digests(bot: Bot) -> None:
+    await run_fan_out("daily_digest", bot)
+
+
+async def check_and_notify_reminders(bot: Bot) -> None:
+    await run_fan_out("today_reminders", bot)
+
+
+FAN_OUTS: dict[str, FanOut] = {
+    "daily_digest": FanOut(
+        iter_user_ids=iter_user_ids,
+        load_batch=load_digest_batch,
+        send=send_digest,
+        finish_batch=save_sent_digests,
+    ),
+    "today_reminders": FanOut(
+        iter_user_ids=iter_users_with_due_reminders,
+        load_batch=load_due_reminders,
+        send=notify_user_about_today_reminders,
+        finish_batch=advance_fired_reminders,
+    ),
+}
+
+
+async def resume_fan_outs(bot: Bot) -> None:
+    """Продолжает рассылки бота, прерванные сегодня его остановкой."""
+    today = datetime.now(timezone('Europe/Moscow')).date().isoformat()
+
+    for name in FAN_OUTS:
+        checkpoint = await load_fan_out_checkpoint(name, bot.id)
+        if checkpoint and checkpoint["date"] == today and not checkpoint["done"]:
+            logger.info("Бот %s: продолжаем рассылку %s после пользователя %s", bot.id, name, checkpoint["after"])
+            scheduler.add_job(run_fan_out, args=[name, bot, checkpoint["after"]])
+
+
+async def start_task_scheduler(bot: Bot) -> None:
+    # Одна задача на бота: пользователи перебираются в момент рассылки, а не при старте
+    scheduler.add_job(
+        send_daily_digests,
+        CronTrigger(hour=20, minute=0, timezone='Europe/Moscow'),
+        args=[bot]
+    )
+
 
 async def start_reminder_scheduler(bot: Bot) -> None:
     scheduler.add_job(
@@ -105,6 +525,19 @@ async def start_reminder_scheduler(bot: Bot) -> None:
     )
 
 
-async def start_schedulers(bot: Bot) -> None:
-    await start_task_scheduler(bot)
-    await start_reminder_scheduler(bot)
+async def start_schedulers(bots: list[Bot]) -> None:
+    # Один планировщик на все боты процесса
+    for bot in bots:
+        bots_by_id[bot.id] = bot
+        await start_task_scheduler(bot)
+        await start_reminder_scheduler(bot)
+        await resume_fan_outs(bot)
+    scheduler.add_job(compact_task_history, CronTrigger(hour=4, minute=0, timezone='Europe/Moscow'))
+    scheduler.start()
+    await restore_snoozed_reminders()
+
+
+async def stop_schedulers() -> None:
+    await snoozed_reminders.stop()
+    if scheduler.running:
+        scheduler.shutdown(wait=True)
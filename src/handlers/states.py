@@ -6,4 +6,6 @@ class InputState(StatesGroup):
     waiting_for_category_update = State()
     waiting_for_task_description = State()
     waiting_for_new_category_name = State()
-    waiting_for_reminder_input = State()
\ No newline at end of file
+    waiting_for_reminder_input = State()
+    waiting_for_search_query = State()
+    waiting_for_tasks_completion = State()
@@ -13,10 +13,21 @@ BOT_ANSWER = {
         "3. <b>Добавлять события</b> 📅\n"
         "   - Создавайте события, чтобы бот напомнил вам о задачах в конкретный день.\n"
         "   - Уведомление о событии придет в <i>9:00</i> по московскому времени.\n"
+        "   - События могут повторяться каждый день, неделю, месяц или год.\n"
         "4. <b>Как работают напоминания?</b> ❓\n"
         "   - Каждый день в <i>20:00</i> по московскому времени я отправлю вам сообщение со всеми актуальными напоминаниями.\n"
+        "   - В меню «Вечерняя рассылка» можно получать список только при изменениях или раз в неделю.\n"
         "5. <b>Использовать меню</b> 📋\n"
-        "   - В меню есть быстрый доступ к вашим напоминаниям и событиям, что позволит легко управлять ими.\n\n"
+        "   - В меню есть быстрый доступ к вашим напоминаниям и событиям, что позволит легко управлять ими.\n"
+        "   - Выполненные напоминания отмечайте кнопкой «Отметить выполненными», а команда <b>/stats</b> покажет, "
+        "сколько сделано по неделям.\n"
+        "6. <b>Искать</b> 🔍\n"
+        "   - Команда <b>/search</b> найдёт нужное напоминание или событие по словам из описания.\n"
+        "7. <b>Общие категории</b> 👥\n"
+        "   - В меню категорий можно поделиться категорией по ссылке: участники видят её напоминания и получают их в рассылке.\n"
+        "8. <b>Импорт и экспорт</b> 📤\n"
+        "   - Пришлите файл <i>.csv</i> или календарь <i>.ics</i>, и я добавлю из него напоминания и события.\n"
+        "   - Команда <b>/export</b> выгрузит всё в CSV, <b>/export ics</b> — события в календарь.\n\n"
         "✨ Чтобы начать, введите команду <b>/start</b> и следуйте инструкциям!"
     ),
 
@@ -38,22 +49,49 @@ BOT_ANSWER = {
     "category_updated": "Категория '<b>{category_name}</b>' успешно обновлена. 🔄",
     "category_deleted": "Категория успешно удалена. 🗑️",
     "category_exists": "❗ Категория '<b>{category_name}</b>' уже существует. ❗",
+    "category_left": "Вы вышли из общей категории. 👋",
+
+    # Сообщения для общих категорий
+    "input_category_name_for_share": (
+        "<b>Выберите категорию, которой хотите поделиться:</b> 👥\n\n"
+        "Участники увидят все напоминания категории и смогут добавлять свои."
+    ),
+    "category_invite_link": (
+        "Отправьте эту ссылку тем, с кем хотите вести категорию '<b>{category_name}</b>':\n\n{link}"
+    ),
+    "category_joined": "👥 Вы присоединились к категории '<b>{category_name}</b>'!",
+    "category_already_joined": "Вы уже участник категории '<b>{category_name}</b>'. 👥",
+    "category_own_invite": "Это ваша собственная категория '<b>{category_name}</b>'. 🙂",
+    "category_invite_not_found": "😔 Приглашение недействительно: категорию удалили или ссылка неверная.",
+    "shared_tasks_added": "👥 <b>{author}</b> добавил(а) в категорию '<b>{category_name}</b>':\n\n{task_list}",
 
     # Сообщения, связанные с напоминаниями
     "select_category_for_task": "<b>Выберите категорию для вашего напоминания:</b> 📋",
     "input_task_description": "Опишите, что нужно запомнить... 📝",
     "task_added": "❗ Напоминание '<b>{task_description}</b>' успешно добавлено! ✔️",
+    "input_task_list": "Пришлите список: каждая строка станет отдельным напоминанием... 📝",
+    "task_list_added": "❗ Добавлено напоминаний: <b>{count}</b> ✔️\n\n{task_list}",
+    "no_tasks_in_list": "В сообщении нет ни одной непустой строки. 😔",
     "no_tasks": "У вас пока нет напоминаний... 😔",
     "input_task_name_for_delete": "<b>Какое напоминание вы хотите удалить?</b> ❓",
     "task_deleted": "<b>Напоминание успешно удалено.</b> ✅",
     "task_not_found": "Напоминание не найдено. 🚫",
     "select_task_to_delete": "<b>Выберите напоминание для удаления:</b> 🗑️",
+    "select_tasks_to_complete": "<b>Отметьте выполненные напоминания и нажмите «Готово»:</b> ✅",
+    "tasks_completed": "✅ Выполнено напоминаний: <b>{count}</b>. Так держать!",
+
+    # Статистика выполненных задач
+    "stats_title": "<b>📈 Выполнено за {weeks} недель: {total}</b>\n\n",
+    "stats_empty": "За последние недели выполненных напоминаний нет. Отметить их можно в меню напоминаний. ✅",
 
     # Сообщение для ввода даты и описания
     "input_date_and_description": (
         "Введите дату и описание по следующему шаблону:\n"
         "<b>ДД.ММ.ГГГГ</b> <i>ваше описание</i>.\n\n"
-        "Пример: <b>25.12.2024</b> <i>Новый год с друзьями</i>"
+        "Пример: <b>25.12.2024</b> <i>Новый год с друзьями</i>\n\n"
+        "Чтобы событие повторялось, добавьте после даты <i>ежедневно</i>, <i>еженедельно</i>, "
+        "<i>ежемесячно</i>, <i>ежегодно</i> или правило RRULE.\n"
+        "Пример: <b>14.03.2025</b> <i>ежегодно День рождения мамы</i>"
     ),
     "no_reminders": "У вас нет добавленных событий для напоминания. 📅",
     "reminder_added": "📅 Напоминание '<b>{reminder_text}</b>' успешно добавлено!\n"
@@ -61,8 +99,74 @@ BOT_ANSWER = {
     "select_reminder_to_delete": "<b>Выберите событие для удаления:</b> 🗑️",
     "reminder_deleted": "Событие успешно удалено! 🗑️",
 
+    # Ответы на кнопки под уведомлением о событии
+    "event_done": "✅ Отмечено выполненным",
+    "event_snoozed_hour": "⏰ Напомню в {time}",
+    "event_snoozed_tomorrow": "📅 Напомню завтра в 9:00",
+    "event_not_found": "Событие уже удалено",
+
+    # Сообщения для поиска
+    "input_search_query": "<b>Что ищем?</b> 🔍\n\nВведите слово или фразу из напоминания или события.",
+    "search_results": "<b>Результаты поиска «{query}»</b> (страница {page}):\n\n",
+    "search_nothing_found": "По запросу «<b>{query}</b>» ничего не найдено. 🤷",
+
+    # Сообщения для импорта и экспорта
+    "import_started": "📥 Загружаю файл <b>{file_name}</b>...",
+    "import_summary": (
+        "✅ Импорт завершён.\n\n"
+        "Новых категорий: <b>{categories}</b>\n"
+        "Напоминаний: <b>{tasks}</b>\n"
+        "Событий: <b>{events}</b>\n"
+        "Пропущено строк: <b>{skipped}</b>"
+    ),
+    "import_errors": "\n\n<b>Ошибки:</b>\n{errors}",
+    "import_failed": "😔 Не удалось прочитать файл: {error}",
+    "import_unsupported": (
+        "😔 Я понимаю только файлы <i>.csv</i> и <i>.ics</i>.\n\n"
+        "Колонки CSV: <code>type,category,description,date,recurrence</code>, "
+        "где type — <i>category</i>, <i>task</i> или <i>event</i>, а дата в формате <b>ДД.ММ.ГГГГ</b>."
+    ),
+    "import_too_large": "😔 Файл слишком большой. Максимальный размер — {max_size} МБ.",
+    "export_empty": "Пока нечего выгружать... 😔",
+
+    # Сообщения для настройки дайджеста
+    "digest_settings": (
+        "<b>🔔 Вечерняя рассылка</b>\n\n"
+        "Как часто присылать список напоминаний в <i>20:00</i>?\n"
+        "В режиме «только если список изменился» я промолчу, пока вы не добавите или не удалите напоминание."
+    ),
+    "digest_mode_updated": "Настройка рассылки сохранена. ✔️",
+
+    # Сообщения для рассылок администратора
+    "broadcast_usage": (
+        "<b>/broadcast</b> <i>текст</i> — разослать сообщение всем активным пользователям\n"
+        "<b>/broadcast_pause</b> <i>номер</i> — приостановить\n"
+        "<b>/broadcast_resume</b> <i>номер</i> — продолжить\n"
+        "<b>/broadcast_cancel</b> <i>номер</i> — отменить\n"
+        "<b>/broadcast_status</b> — последние рассылки"
+    ),
+    "broadcast_progress": (
+        "📣 <b>Рассылка #{id}</b>: {status}\n"
+        "Отправлено: <b>{sent}</b>, заблокировали бота: <b>{unreachable}</b>, ошибок: <b>{failed}</b>"
+    ),
+    "broadcast_rate": "\nСкорость: <b>{rate:.1f}</b> сообщений в секунду",
+    "broadcast_paused": "⏸ Рассылка #{id} приостановлена.",
+    "broadcast_cancelled": "⏹ Рассылка #{id} отменена.",
+    "broadcast_not_found": "Рассылка с таким номером не найдена или уже не в этом состоянии.",
+    "broadcast_none": "Рассылок пока не было.",
+
     # Сообщения об ошибках
     "invalid_format": "😔 Неверный формат. Пожалуйста, используйте следующий шаблон: <b>ДД.ММ.ГГГГ</b> <i>ваше описание</i>.\n",
+    "overview_title": (
+        "<b>📊 Обзор</b>\n\n"
+        "Напоминаний: <b>{tasks}</b> в категориях: <b>{categories}</b>\n"
+        "Событий на неделе: <b>{events}</b>\n\n"
+    ),
+    "overview_empty": "Пока здесь пусто: добавьте категорию и первое напоминание. 📝",
+    "saved_offline": (
+        "⏳ База данных сейчас недоступна, но изменение сохранено.\n"
+        "Оно появится в списках автоматически, как только связь восстановится."
+    ),
     "error_occurred": "😔 Произошла ошибка. Пожалуйста, попробуйте снова позже или обратитесь к администратору.",
 
     # Общие сообщения
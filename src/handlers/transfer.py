@@ -0,0 +1,454 @@
+import codecs
+import csv
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, TextIO
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.models import CategoryModel, TaskModel, ReminderModel
+from .recurrence import FREQUENCIES, parse_recurrence, next_occurrence
+from .utils import get_today_start
+
+IMPORT_BATCH_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+
+# Сколько ошибок разбора показывать пользователю в итоговом сообщении
+IMPORT_ERRORS_SHOWN = 5
+
+CSV_HEADER = ["type", "category", "description", "date", "recurrence"]
+
+ROW_TYPES = {
+    "category": "category",
+    "категория": "category",
+    "task": "task",
+    "задача": "task",
+    "напоминание": "task",
+    "event": "event",
+    "событие": "event",
+}
+
+
+@dataclass
+class ImportRecord:
+    kind: str
+    description: str
+    category: str | None = None
+    date: datetime | None = None
+    recurrence: str | None = None
+
+
+@dataclass
+class ImportSummary:
+    categories: int = 0
+    tasks: int = 0
+    events: int = 0
+    errors: list[str] = field(default_factory=list)
+    skipped: int = 0
+
+    def add_error(self, line_number: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < IMPORT_ERRORS_SHOWN:
+            self.errors.append(f"строка {line_number}: {message}")
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+# ==============================
+# Разбор файлов
+# ==============================
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Декодирует поток байтов в строки, не загружая файл целиком."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def parse_date(value: str) -> datetime:
+    for date_format in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value.strip(), date_format)
+        except ValueError:
+            continue
+    raise ImportRowError(f"неверная дата «{value}»")
+
+
+def parse_import_recurrence(value: str) -> str | None:
+    # В выгрузке повторение хранится как есть (daily, RRULE:...), поэтому принимаем и его
+    if value.lower() in FREQUENCIES:
+        return value.lower()
+    return parse_recurrence(value)
+
+
+def parse_csv_row(row: dict) -> ImportRecord:
+    kind = ROW_TYPES.get((row.get("type") or "").strip().lower())
+    category = (row.get("category") or "").strip()
+    description = (row.get("description") or "").strip()
+
+    if kind is None:
+        raise ImportRowError(f"неизвестный тип «{row.get('type')}»")
+
+    if kind == "category":
+        if not category:
+            raise ImportRowError("не указана категория")
+        return ImportRecord(kind=kind, description="", category=category)
+
+    if not description:
+        raise ImportRowError("пустое описание")
+
+    if kind == "task":
+        if not category:
+            raise ImportRowError("не указана категория")
+        return ImportRecord(kind=kind, description=description, category=category)
+
+    recurrence_value = (row.get("recurrence") or "").strip()
+    recurrence = parse_import_recurrence(recurrence_value) if recurrence_value else None
+    if recurrence_value and recurrence is None:
+        raise ImportRowError(f"неизвестное повторение «{recurrence_value}»")
+
+    return ImportRecord(kind=kind, description=description, date=parse_date(row.get("date") or ""),
+                        recurrence=recurrence)
+
+
+class CsvLineFeed:
+    """Источник строк для csv.reader, который пополняется по мере чтения файла.
+
+    Пустая очередь для csv.reader — конец данных, но после пополнения чтение продолжается.
+    exhausted показывает, что последней записи строк не хватило.
+    """
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            self.exhausted = True
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv_lines(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, list[str]]]:
+    """Собирает записи CSV из строк файла и отдаёт их с номером первой строки.
+
+    Поле в кавычках может содержать перевод строки (так /export пишет многострочные
+    описания). Где кончается запись, решает сам csv.reader — один на весь файл: если
+    ему не хватило строк, строки записи подаются заново вместе со следующей.
+    Разделитель (запятая или точка с запятой) берётся из заголовка.
+    """
+    feed = CsvLineFeed()
+    reader = None
+    record_lines: list[str] = []
+    record_number = line_number = 0
+
+    async for line in lines:
+        line_number += 1
+        if not record_lines and not line.strip():
+            continue
+
+        if not record_lines:
+            record_number = line_number
+        record_lines.append(line + "\n")
+
+        if reader is None:
+            delimiter = ";" if line.count(";") > line.count(",") else ","
+            reader = csv.reader(feed, delimiter=delimiter)
+
+        feed.lines.extend(record_lines)
+        feed.exhausted = False
+        try:
+            values = next(reader, None)
+        except csv.Error as error:
+            raise ImportRowError(f"строка {record_number}: {error}") from error
+
+        if feed.exhausted:
+            # Поле в кавычках продолжается на следующей строке
+            continue
+        record_lines = []
+        yield record_number, values
+
+    if record_lines:
+        raise ImportRowError(f"строка {record_number}: не закрыта кавычка")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, ImportRecord | ImportRowError]]:
+    """Разбирает CSV по записям; первая запись — заголовок."""
+    header = None
+
+    async for line_number, values in iter_csv_lines(lines):
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            if "type" not in header:
+                raise ImportRowError("в первой строке нет заголовка с колонкой type")
+            continue
+
+        try:
+            yield line_number, parse_csv_row(dict(zip(header, values)))
+        except ValueError as error:
+            yield line_number, ImportRowError(str(error))
+
+
+def unescape_ics(value: str) -> str:
+    return (
+        value.replace("\\n", "\n").replace("\\N", "\n")
+        .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+    )
+
+
+def parse_ics_date(value: str) -> datetime:
+    value = value.rstrip("Z")
+    for date_format in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ImportRowError(f"неверная дата «{value}»")
+
+
+def parse_ics_event(properties: dict[str, str]) -> ImportRecord:
+    description = unescape_ics(properties.get("SUMMARY", "")).strip()
+    if not description:
+        raise ImportRowError("событие без SUMMARY")
+    if "DTSTART" not in properties:
+        raise ImportRowError("событие без DTSTART")
+
+    date = parse_ics_date(properties["DTSTART"]).replace(hour=0, minute=0, second=0)
+    recurrence = parse_recurrence(f"RRULE:{properties['RRULE']}") if "RRULE" in properties else None
+    return ImportRecord(kind="event", description=description, date=date, recurrence=recurrence)
+
+
+async def unfold_ics_lines(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, str]]:
+    """Склеивает перенесённые строки iCalendar (RFC 5545, 3.1) и отдаёт их с номером первой строки."""
+    pending: str | None = None
+    pending_number = 0
+    line_number = 0
+
+    async for line in lines:
+        line_number += 1
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending_number, pending
+        pending, pending_number = line, line_number
+
+    if pending is not None:
+        yield pending_number, pending
+
+
+async def iter_ics_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, ImportRecord | ImportRowError]]:
+    """Разбирает события VEVENT из iCalendar."""
+    properties: dict[str, str] | None = None
+    event_line = 0
+
+    async for number, content_line in unfold_ics_lines(lines):
+        name_part, _, value = content_line.partition(":")
+        name = name_part.split(";", 1)[0].upper()
+
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            properties, event_line = {}, number
+        elif name == "END" and value.upper() == "VEVENT" and properties is not None:
+            event, properties = properties, None
+            try:
+                yield event_line, parse_ics_event(event)
+            except ValueError as error:
+                yield event_line, ImportRowError(str(error))
+        elif properties is not None:
+            properties.setdefault(name, value)
+
+
+IMPORT_PARSERS = {
+    ".csv": iter_csv_records,
+    ".ics": iter_ics_records,
+}
+
+
+# ==============================
+# Загрузка в базу
+# ==============================
+
+class TaskImporter:
+    """Складывает записи пачками и вставляет их многострочными INSERT."""
+
+    def __init__(self, db_session: AsyncSession, user_id: int):
+        self.db_session = db_session
+        self.user_id = user_id
+        self.summary = ImportSummary()
+        self.category_ids: dict[str, int] = {}
+        self.batch: list[ImportRecord] = []
+        self.today_start = get_today_start()
+
+    async def add(self, record: ImportRecord) -> None:
+        self.batch.append(record)
+        if len(self.batch) >= IMPORT_BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+
+        batch, self.batch = self.batch, []
+        async with self.db_session.begin():
+            await self._ensure_categories({record.category for record in batch if record.category})
+
+            tasks = [
+                {"description": record.description, "category_id": self.category_ids[record.category],
+                 "user_id": self.user_id}
+                for record in batch if record.kind == "task"
+            ]
+            reminders = [
+                {"date": record.date, "description": record.description, "user_id": self.user_id,
+                 "recurrence": record.recurrence,
+                 "next_fire_at": next_occurrence(record.date, record.recurrence, self.today_start)}
+                for record in batch if record.kind == "event"
+            ]
+
+            if tasks:
+                await self.db_session.execute(insert(TaskModel), tasks)
+            if reminders:
+                await self.db_session.execute(insert(ReminderModel), reminders)
+
+        self.summary.tasks += len(tasks)
+        self.summary.events += len(reminders)
+
+    async def _ensure_categories(self, names: set[str]) -> None:
+        missing = [name for name in names if name not in self.category_ids]
+        if not missing:
+            return
+
+        created = await self.db_session.execute(
+            insert(CategoryModel)
+            .values([{"name": name, "user_id": self.user_id} for name in missing])
+            .on_conflict_do_nothing(constraint="uq_user_category_name")
+            .returning(CategoryModel.id)
+        )
+        self.summary.categories += len(created.all())
+
+        result = await self.db_session.execute(
+            select(CategoryModel.name, CategoryModel.id)
+            .where(CategoryModel.user_id == self.user_id, CategoryModel.name.in_(missing))
+        )
+        self.category_ids.update(dict(result.all()))
+
+
+async def import_records(db_session: AsyncSession, user_id: int,
+                         records: AsyncIterator[tuple[int, ImportRecord | ImportRowError]]) -> ImportSummary:
+    """Загружает записи из файла пачками и возвращает итог импорта."""
+    importer = TaskImporter(db_session, user_id)
+
+    async for line_number, record in records:
+        if isinstance(record, ImportRowError):
+            importer.summary.add_error(line_number, str(record))
+        else:
+            await importer.add(record)
+
+    await importer.flush()
+    return importer.summary
+
+
+# ==============================
+# Выгрузка
+# ==============================
+
+def _stream(db_session: AsyncSession, stmt):
+    return db_session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+
+async def write_export_csv(db_session: AsyncSession, user_id: int, file: TextIO) -> int:
+    """Пишет категории, задачи и события пользователя в CSV построчно и возвращает число строк.
+
+    Строки читаются серверным курсором пачками по EXPORT_BATCH_SIZE, так что память
+    не растёт с количеством записей. Формат совпадает с форматом импорта.
+    """
+    writer = csv.writer(file)
+    writer.writerow(CSV_HEADER)
+    rows = 0
+
+    async with db_session.begin():
+        result = await _stream(db_session, (
+            select(CategoryModel.name)
+            .where(CategoryModel.user_id == user_id)
+            .order_by(CategoryModel.id)
+        ))
+        async for (name,) in result:
+            writer.writerow(["category", name, "", "", ""])
+            rows += 1
+
+        result = await _stream(db_session, (
+            select(CategoryModel.name, TaskModel.description)
+            .join(CategoryModel, TaskModel.category_id == CategoryModel.id)
+            .where(TaskModel.user_id == user_id, TaskModel.completed_at.is_(None))
+            .order_by(TaskModel.id)
+        ))
+        async for category_name, description in result:
+            writer.writerow(["task", category_name, description, "", ""])
+            rows += 1
+
+        result = await _stream(db_session, (
+            select(ReminderModel.description, ReminderModel.date, ReminderModel.recurrence)
+            .where(ReminderModel.user_id == user_id)
+            .order_by(ReminderModel.id)
+        ))
+        async for description, date, recurrence in result:
+            writer.writerow(["event", "", description, date.strftime("%d.%m.%Y"), recurrence or ""])
+            rows += 1
+
+    return rows
+
+
+def escape_ics(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def format_ics_event(reminder_id: int, description: str, date: datetime, recurrence: str | None,
+                     stamp: str) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{reminder_id}@remember_me_bot",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;VALUE=DATE:{date.strftime('%Y%m%d')}",
+        f"SUMMARY:{escape_ics(description)}",
+    ]
+    if recurrence:
+        rule = recurrence[len("RRULE:"):] if recurrence.startswith("RRULE:") else f"FREQ={recurrence.upper()}"
+        lines.append(f"RRULE:{rule}")
+    lines.append("END:VEVENT")
+    return "".join(line + "\r\n" for line in lines)
+
+
+async def write_export_ics(db_session: AsyncSession, user_id: int, file: TextIO) -> int:
+    """Пишет события пользователя в iCalendar построчно и возвращает их число."""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    file.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//remember_me_bot//RU\r\n")
+    events = 0
+
+    async with db_session.begin():
+        result = await _stream(db_session, (
+            select(ReminderModel.id, ReminderModel.description, ReminderModel.date, ReminderModel.recurrence)
+            .where(ReminderModel.user_id == user_id)
+            .order_by(ReminderModel.id)
+        ))
+        async for reminder_id, description, date, recurrence in result:
+            file.write(format_ics_event(reminder_id, description, date, recurrence, stamp))
+            events += 1
+
+    file.write("END:VCALENDAR\r\n")
+    return events
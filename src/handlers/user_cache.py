@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from config import KNOWN_USERS_CACHE_SIZE
+from metrics import KNOWN_USER_CACHE_LOOKUPS, KNOWN_USER_CACHE_HIT_RATIO, KNOWN_USER_CACHE_SIZE
+from src.models.bot_scope import current_bot_id
+from src.models.models import UserModel
+
+
+class KnownUserCache:
+    """LRU-множество пользователей, которые точно есть в базе и активны.
+
+    Заполняется лениво, по мере обращений; при переполнении вытесняются
+    давно не появлявшиеся пользователи. Пользователи разных ботов хранятся
+    раздельно: ключ — пара (бот, пользователь).
+    """
+
+    def __init__(self, max_size: int = KNOWN_USERS_CACHE_SIZE):
+        self.max_size = max_size
+        self._user_ids: OrderedDict[tuple[int | None, int], None] = OrderedDict()
+        self._hits = 0
+        self._lookups = 0
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def check(self, user_id: int) -> bool:
+        """Проверяет пользователя и учитывает попадание или промах в метриках."""
+        key = (current_bot_id.get(), user_id)
+        hit = key in self._user_ids
+        if hit:
+            self._user_ids.move_to_end(key)
+            self._hits += 1
+        self._lookups += 1
+
+        KNOWN_USER_CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+        KNOWN_USER_CACHE_HIT_RATIO.set(self._hits / self._lookups)
+        return hit
+
+    def add(self, user_id: int) -> None:
+        key = (current_bot_id.get(), user_id)
+        self._user_ids[key] = None
+        self._user_ids.move_to_end(key)
+        while len(self._user_ids) > self.max_size:
+            self._user_ids.popitem(last=False)
+        KNOWN_USER_CACHE_SIZE.set(len(self._user_ids))
+
+    def discard(self, user_id: int, bot_id: int | None = None) -> None:
+        """Забывает пользователя: после удаления или деактивации /start снова пойдёт в базу."""
+        self._user_ids.pop((bot_id or current_bot_id.get(), user_id), None)
+        KNOWN_USER_CACHE_SIZE.set(len(self._user_ids))
+
+
+known_users = KnownUserCache()
+
+
+@event.listens_for(UserModel, "after_delete")
+def forget_deleted_user(mapper, connection, target: UserModel) -> None:
+    known_users.discard(target.user_id, target.bot_id)
@@ -1,9 +1,58 @@
+import html
+import secrets
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pytz import timezone
+from sqlalchemy import func, literal, literal_column, null, union_all, desc, text, update, delete, or_, and_
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+
+from tracing import traced
+from .rendering import Section, escape_text, render_chunks
+from .recurrence import next_occurrence, next_occurrence_after_day, occurrences_between, get_recurrence_label
+from .text_constants import BOT_ANSWER
+from .user_cache import known_users
+from src.models.models import (
+    CategoryModel, CategoryMemberModel, UserModel, TaskModel, TaskStatsModel, ReminderModel, BotStateModel
+)
+from src.models.bot_scope import get_current_bot_id
+
+
+def get_now() -> datetime:
+    """Текущее время по Москве (без часового пояса, как в базе)."""
+    return datetime.now(timezone('Europe/Moscow')).replace(tzinfo=None)
 
-from src.models.models import CategoryModel, UserModel, TaskModel, ReminderModel
+
+def get_today_start() -> datetime:
+    """Начало текущих суток по Москве (без часового пояса, как в базе)."""
+    return get_now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# ==============================
+# Служебное состояние бота
+# ==============================
+
+async def get_state_value(db_session: AsyncSession, key: str) -> str | None:
+    """Получает значение служебного ключа."""
+    async with db_session.begin():
+        stmt = select(BotStateModel.value).where(BotStateModel.key == key)
+        result = await db_session.execute(stmt)
+        return result.scalar_one_or_none()
+
+
+async def set_state_value(db_session: AsyncSession, key: str, value: str) -> None:
+    """Сохраняет значение служебного ключа."""
+    async with db_session.begin():
+        stmt = insert(BotStateModel).values(key=key, value=value)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BotStateModel.key],
+            set_={"value": stmt.excluded.value, "updated_at": func.now()}
+        )
+        await db_session.execute(stmt)
 
 
 # ==============================
@@ -25,9 +74,195 @@ async def get_or_create_user(db_session: AsyncSession, user_data) -> UserModel:
             db_session.add(new_user)
             return new_user
 
+        if not user.is_active:
+            # Пользователь разблокировал бота: возвращаем его в рассылки
+            user.is_active = True
+            await reschedule_missed_reminders(db_session, user.user_id)
+
         return user
 
 
+async def ensure_user(db_session: AsyncSession, user_data) -> None:
+    """Убеждается, что пользователь есть в базе и активен; известных пользователей не проверяет повторно."""
+    if known_users.check(user_data.id):
+        return
+
+    await get_or_create_user(db_session, user_data)
+    known_users.add(user_data.id)
+
+
+async def deactivate_users(db_session: AsyncSession, user_ids: list[int]) -> None:
+    """Помечает неактивными пользователей, которым нельзя доставить сообщение, одним UPDATE."""
+    if not user_ids:
+        return
+
+    # Иначе /start попадёт в кеш и не вернёт пользователя в рассылки
+    for user_id in user_ids:
+        known_users.discard(user_id)
+
+    async with db_session.begin():
+        await db_session.execute(
+            update(UserModel).where(UserModel.user_id.in_(user_ids)).values(is_active=False)
+        )
+
+
+DIGEST_MODES = ("always", "changed", "weekly")
+
+# В режиме weekly дайджест уходит, если прошлый был не позже чем неделю назад (с запасом на время рассылки)
+WEEKLY_DIGEST_INTERVAL = timedelta(days=7) - timedelta(hours=1)
+
+
+async def get_digest_mode(db_session: AsyncSession, user_id: int) -> str:
+    """Получает режим вечернего дайджеста пользователя."""
+    async with db_session.begin():
+        stmt = select(UserModel.digest_mode).where(UserModel.user_id == user_id)
+        result = await db_session.execute(stmt)
+        return result.scalar_one_or_none() or "always"
+
+
+async def set_digest_mode(db_session: AsyncSession, user_id: int, mode: str) -> None:
+    """Меняет режим вечернего дайджеста пользователя."""
+    if mode not in DIGEST_MODES:
+        raise ValueError(f"Неизвестный режим дайджеста '{mode}'.")
+
+    async with db_session.begin():
+        await db_session.execute(
+            update(UserModel).where(UserModel.user_id == user_id).values(digest_mode=mode)
+        )
+
+
+def digest_fingerprint_column():
+    """Отпечаток списка задач: меняется при добавлении, удалении задачи и переименовании категории."""
+    return func.md5(func.string_agg(
+        func.concat_ws(":", TaskModel.id, TaskModel.created_at, CategoryModel.name),
+        aggregate_order_by(literal(","), TaskModel.id)
+    ))
+
+
+def digest_recipients(user_ids: list[int]):
+    """Пары (задача, получатель) для дайджестов пачки пользователей.
+
+    В дайджест попадают только активные задачи. Получатели задачи — её автор,
+    а в общей категории ещё владелец и все участники.
+    Части не пересекаются: автор берётся из первой, остальные — только если задачу
+    добавил кто-то другой. Фильтр по боту задаём явно, как и в поиске.
+    """
+    bot_id = get_current_bot_id()
+    own_tasks = (
+        select(TaskModel.id.label("task_id"), TaskModel.user_id.label("recipient_id"))
+        .where(TaskModel.bot_id == bot_id, TaskModel.user_id.in_(user_ids), TaskModel.completed_at.is_(None))
+    )
+    member_tasks = (
+        select(TaskModel.id, CategoryMemberModel.user_id)
+        .join(CategoryMemberModel, CategoryMemberModel.category_id == TaskModel.category_id)
+        .where(
+            CategoryMemberModel.bot_id == bot_id,
+            CategoryMemberModel.user_id.in_(user_ids),
+            TaskModel.user_id != CategoryMemberModel.user_id,
+            TaskModel.completed_at.is_(None)
+        )
+    )
+    owner_tasks = (
+        select(TaskModel.id, CategoryModel.user_id)
+        .join(CategoryModel, CategoryModel.id == TaskModel.category_id)
+        .where(
+            CategoryModel.bot_id == bot_id,
+            CategoryModel.user_id.in_(user_ids),
+            TaskModel.user_id != CategoryModel.user_id,
+            TaskModel.completed_at.is_(None)
+        )
+    )
+    return union_all(own_tasks, member_tasks, owner_tasks).subquery()
+
+
+async def get_due_digests(db_session: AsyncSession, user_ids: list[int], now: datetime) -> dict[int, str]:
+    """Возвращает отпечатки задач для пользователей пачки, которым пора отправить дайджест.
+
+    Отпечатки считаются и сравниваются в одном запросе, поэтому пользователи без задач
+    или без изменений отсекаются без загрузки самих задач. Задачи общих категорий
+    входят в отпечаток каждого участника.
+    """
+    recipients = digest_recipients(user_ids)
+    fingerprints = (
+        select(recipients.c.recipient_id, digest_fingerprint_column().label("fingerprint"))
+        .select_from(recipients)
+        .join(TaskModel, TaskModel.id == recipients.c.task_id)
+        .join(CategoryModel, TaskModel.category_id == CategoryModel.id)
+        .group_by(recipients.c.recipient_id)
+        .subquery()
+    )
+
+    stmt = (
+        select(UserModel.user_id, fingerprints.c.fingerprint)
+        .join(fingerprints, fingerprints.c.recipient_id == UserModel.user_id)
+        .where(or_(
+            UserModel.digest_mode == "always",
+            and_(
+                UserModel.digest_mode == "changed",
+                UserModel.digest_fingerprint.is_distinct_from(fingerprints.c.fingerprint)
+            ),
+            and_(
+                UserModel.digest_mode == "weekly",
+                or_(UserModel.digest_sent_at.is_(None), UserModel.digest_sent_at <= now - WEEKLY_DIGEST_INTERVAL)
+            ),
+        ))
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(stmt)
+        return dict(result.all())
+
+
+async def get_digest_tasks(db_session: AsyncSession, user_ids: list[int]) -> dict[int, list[tuple[str, str]]]:
+    """Загружает задачи дайджеста сразу для пачки пользователей: (категория, описание) по получателям.
+
+    Задача общей категории читается один раз и размножается по участникам через
+    category_members в том же запросе, а не отдельным get_tasks на каждого.
+    """
+    if not user_ids:
+        return {}
+
+    recipients = digest_recipients(user_ids)
+    stmt = (
+        select(recipients.c.recipient_id, CategoryModel.name, TaskModel.description)
+        .select_from(recipients)
+        .join(TaskModel, TaskModel.id == recipients.c.task_id)
+        .join(CategoryModel, TaskModel.category_id == CategoryModel.id)
+        .order_by(recipients.c.recipient_id, TaskModel.id)
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(stmt)
+        rows = result.all()
+
+    tasks_by_user = {}
+    for recipient_id, category_name, description in rows:
+        tasks_by_user.setdefault(recipient_id, []).append((category_name, description))
+    return tasks_by_user
+
+
+async def save_digest_fingerprints(db_session: AsyncSession, fingerprints: dict[int, str], sent_at: datetime) -> None:
+    """Запоминает отпечатки отправленных дайджестов одним UPDATE."""
+    if not fingerprints:
+        return
+
+    async with db_session.begin():
+        await db_session.execute(
+            text(
+                "UPDATE users SET digest_fingerprint = sent.fingerprint, digest_sent_at = :sent_at "
+                "FROM unnest(CAST(:user_ids AS bigint[]), CAST(:fingerprints AS varchar[])) "
+                "AS sent(user_id, fingerprint) "
+                "WHERE users.bot_id = :bot_id AND users.user_id = sent.user_id"
+            ),
+            {
+                "bot_id": get_current_bot_id(),
+                "user_ids": list(fingerprints),
+                "fingerprints": list(fingerprints.values()),
+                "sent_at": sent_at,
+            }
+        )
+
+
 # ==============================
 # Категории
 # ==============================
@@ -42,6 +277,35 @@ async def get_user_categories(db_session: AsyncSession, user_id: int) -> list[Ca
     return categories
 
 
+async def get_category_overview(db_session: AsyncSession, user_id: int) -> list[tuple[int, str, int, bool]]:
+    """Возвращает категории пользователя, в том числе общие, с числом активных задач в каждой.
+
+    Задачи считаются одним GROUP BY category_id без загрузки самих задач; пустые
+    категории тоже попадают в результат. Последнее поле — владеет ли пользователь категорией.
+    """
+    task_counts = (
+        select(TaskModel.category_id, func.count().label("tasks"))
+        .where(visible_tasks_filter(user_id), TaskModel.completed_at.is_(None))
+        .group_by(TaskModel.category_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            CategoryModel.id,
+            CategoryModel.name,
+            func.coalesce(task_counts.c.tasks, 0),
+            (CategoryModel.user_id == user_id).label("is_owner")
+        )
+        .outerjoin(task_counts, task_counts.c.category_id == CategoryModel.id)
+        .where(visible_categories_filter(user_id))
+        .order_by(CategoryModel.id)
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(stmt)
+        return result.all()
+
+
 async def get_or_create_category(db_session: AsyncSession, category_name: str, user_id: int) -> tuple[CategoryModel, bool]:
     """Получает или создает категорию для данного пользователя."""
     async with db_session.begin():
@@ -67,25 +331,30 @@ async def get_or_create_category(db_session: AsyncSession, category_name: str, u
 async def delete_category(db_session: AsyncSession, category_id: int, user_id: int) -> None:
     """Удаляет категорию по идентификатору для данного пользователя."""
     async with db_session.begin():
-        category_query = select(CategoryModel).where(
-            CategoryModel.id == category_id,
-            CategoryModel.user_id == user_id
-        )
+        await delete_owned_category(db_session, category_id, user_id)
 
-        result = await db_session.execute(category_query)
-        category = result.scalar_one_or_none()
 
-        if category is None:
-            raise ValueError(f"Категория с ID '{category_id}' не найдена.")
+async def delete_owned_category(db_session: AsyncSession, category_id: int, user_id: int) -> None:
+    """Удаляет категорию пользователя вместе с задачами в уже открытой транзакции."""
+    category_query = select(CategoryModel).where(
+        CategoryModel.id == category_id,
+        CategoryModel.user_id == user_id
+    )
 
-        tasks_query = select(TaskModel).where(TaskModel.category_id == category.id)
-        tasks_result = await db_session.execute(tasks_query)
+    result = await db_session.execute(category_query)
+    category = result.scalar_one_or_none()
 
-        tasks = tasks_result.scalars().all()
-        for task in tasks:
-            await db_session.delete(task)
+    if category is None:
+        raise ValueError(f"Категория с ID '{category_id}' не найдена.")
+
+    tasks_query = select(TaskModel).where(TaskModel.category_id == category.id)
+    tasks_result = await db_session.execute(tasks_query)
 
-        await db_session.delete(category)
+    tasks = tasks_result.scalars().all()
+    for task in tasks:
+        await db_session.delete(task)
+
+    await db_session.delete(category)
 
 
 async def update_category(db_session: AsyncSession, category_id, new_name, user_id):
@@ -105,6 +374,127 @@ async def update_category(db_session: AsyncSession, category_id, new_name, user_
             raise ValueError(f"Категория с ID '{category_id}' не найдена.")
 
 
+# ==============================
+# Общие категории
+# ==============================
+
+# Длина кода приглашения в общую категорию до base64: помещается в payload /start
+INVITE_CODE_BYTES = 12
+
+
+def member_category_ids(user_id: int):
+    """Категории, в которые пользователь вступил по приглашению."""
+    return (
+        select(CategoryMemberModel.category_id)
+        .where(CategoryMemberModel.bot_id == get_current_bot_id(), CategoryMemberModel.user_id == user_id)
+    )
+
+
+def shared_category_ids(user_id: int):
+    """Общие категории пользователя: те, где он участник, и свои, в которых есть участники."""
+    return (
+        select(CategoryMemberModel.category_id)
+        .join(CategoryModel, CategoryModel.id == CategoryMemberModel.category_id)
+        .where(
+            CategoryMemberModel.bot_id == get_current_bot_id(),
+            or_(CategoryMemberModel.user_id == user_id, CategoryModel.user_id == user_id)
+        )
+    )
+
+
+def visible_categories_filter(user_id: int):
+    """Категории, которые видит пользователь: свои и общие, в которых он участник."""
+    return or_(CategoryModel.user_id == user_id, CategoryModel.id.in_(member_category_ids(user_id)))
+
+
+def visible_tasks_filter(user_id: int):
+    """Задачи, которые видит пользователь: свои и все задачи его общих категорий."""
+    return or_(TaskModel.user_id == user_id, TaskModel.category_id.in_(shared_category_ids(user_id)))
+
+
+async def get_or_create_invite_code(db_session: AsyncSession, category_id: int, user_id: int) -> tuple[str, str]:
+    """Возвращает код приглашения в категорию и её название; делиться можно только своей категорией."""
+    async with db_session.begin():
+        stmt = select(CategoryModel).where(CategoryModel.id == category_id, CategoryModel.user_id == user_id)
+        result = await db_session.execute(stmt)
+        category = result.scalar_one_or_none()
+
+        if category is None:
+            raise ValueError(f"Категория с ID '{category_id}' не найдена.")
+
+        if category.invite_code is None:
+            category.invite_code = secrets.token_urlsafe(INVITE_CODE_BYTES)
+        return category.invite_code, category.name
+
+
+async def join_category(db_session: AsyncSession, invite_code: str, user_id: int) -> tuple[str, str | None]:
+    """Добавляет пользователя в общую категорию по коду приглашения.
+
+    Возвращает статус (joined, already, own, not_found) и название категории.
+    """
+    async with db_session.begin():
+        result = await db_session.execute(select(CategoryModel).where(CategoryModel.invite_code == invite_code))
+        category = result.scalar_one_or_none()
+
+        if category is None:
+            return "not_found", None
+        if category.user_id == user_id:
+            return "own", category.name
+
+        result = await db_session.execute(
+            insert(CategoryMemberModel)
+            .values(category_id=category.id, user_id=user_id)
+            .on_conflict_do_nothing()
+            .returning(CategoryMemberModel.category_id)
+        )
+        return ("joined" if result.scalar_one_or_none() is not None else "already"), category.name
+
+
+async def leave_category(db_session: AsyncSession, category_id: int, user_id: int) -> bool:
+    """Выходит из общей категории в уже открытой транзакции; False, если пользователь в ней не состоит."""
+    result = await db_session.execute(
+        delete(CategoryMemberModel)
+        .where(CategoryMemberModel.category_id == category_id, CategoryMemberModel.user_id == user_id)
+        .returning(CategoryMemberModel.category_id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def remove_category(db_session: AsyncSession, category_id: int, user_id: int) -> bool:
+    """Выходит из чужой общей категории или удаляет свою одной транзакцией; True, если пользователь вышел.
+
+    Выбор делается внутри записи, а не перед ней, чтобы при недоступной базе
+    удаление целиком ушло в журнал изменений.
+    """
+    async with db_session.begin():
+        if await leave_category(db_session, category_id, user_id):
+            return True
+        await delete_owned_category(db_session, category_id, user_id)
+    return False
+
+
+async def get_category_audience(db_session: AsyncSession, category_id: int, author_id: int) -> list[int]:
+    """Активные владелец и участники общей категории, кроме автора изменения, одним запросом."""
+    bot_id = get_current_bot_id()
+    audience = union_all(
+        select(CategoryModel.user_id.label("user_id"))
+        .where(CategoryModel.bot_id == bot_id, CategoryModel.id == category_id),
+        select(CategoryMemberModel.user_id)
+        .where(CategoryMemberModel.bot_id == bot_id, CategoryMemberModel.category_id == category_id),
+    ).subquery()
+
+    stmt = (
+        select(UserModel.user_id)
+        .join(audience, audience.c.user_id == UserModel.user_id)
+        .where(UserModel.is_active, UserModel.user_id != author_id)
+        .distinct()
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(stmt)
+        return result.scalars().all()
+
+
 # ==============================
 # Напоминания
 # ==============================
@@ -122,13 +512,27 @@ async def create_task(db_session: AsyncSession, description: str, category_id: i
     return new_task
 
 
+async def create_tasks(db_session: AsyncSession, descriptions: list[str], category_id: int, user_id: int) -> int:
+    """Создает несколько задач одним многострочным INSERT."""
+    async with db_session.begin():
+        await db_session.execute(
+            insert(TaskModel).values([
+                {"description": description, "category_id": category_id, "user_id": user_id}
+                for description in descriptions
+            ])
+        )
+
+    return len(descriptions)
+
+
+@traced("get_tasks")
 async def get_tasks(db_session: AsyncSession, user_id: int) -> list[TaskModel]:
-    """Получает все задачи с именами категорий."""
+    """Получает все активные задачи с именами категорий."""
     async with db_session.begin():
         tasks_stmt = (
             select(TaskModel)
             .options(joinedload(TaskModel.category))
-            .where(TaskModel.user_id == user_id)
+            .where(visible_tasks_filter(user_id), TaskModel.completed_at.is_(None))
         )
         tasks_result = await db_session.execute(tasks_stmt)
         tasks = tasks_result.scalars().all()
@@ -136,46 +540,73 @@ async def get_tasks(db_session: AsyncSession, user_id: int) -> list[TaskModel]:
     return tasks
 
 
-def format_tasks_by_category(tasks: list[TaskModel]) -> str:
-    """Форматирует задачи по категориям."""
-    tasks_by_category = {}
+@traced("format_tasks_by_category")
+def format_tasks_by_category(tasks: list[TaskModel]) -> list[str]:
+    """Форматирует задачи по категориям и делит результат на сообщения."""
+    return format_task_rows((task.category.name, task.description) for task in tasks)
 
-    for task in tasks:
-        category_name = task.category.name
-        if category_name not in tasks_by_category:
-            tasks_by_category[category_name] = []
-        tasks_by_category[category_name].append(task.description)
 
-    tasks_message = "<b>Ваши напоминания:</b>\n\n"
-    for category, descriptions in tasks_by_category.items():
-        tasks_message += f"<b>{category}:</b>\n"
-        for idx, description in enumerate(descriptions, start=1):
-            tasks_message += f"{idx}. {description}\n"
-        tasks_message += "\n"
+def format_task_rows(rows) -> list[str]:
+    """Форматирует пары (категория, описание) по категориям и делит результат на сообщения."""
+    tasks_by_category: dict[str, list[str]] = {}
+
+    for category_name, description in rows:
+        tasks_by_category.setdefault(category_name, []).append(description)
 
-    return tasks_message
+    sections = (
+        Section(
+            header=escape_text(category),
+            lines=(f"{idx}. {escape_text(description)}\n" for idx, description in enumerate(descriptions, start=1)),
+        )
+        for category, descriptions in tasks_by_category.items()
+    )
+    return list(render_chunks("<b>Ваши напоминания:</b>\n\n", sections))
 
 
 async def delete_task_by_id(db_session: AsyncSession, task_id: int, user_id: int) -> None:
-    """Удаляет напоминание по ID для данного пользователя."""
+    """Удаляет напоминание по ID: своё или из общей категории пользователя."""
     async with db_session.begin():
-        task_query = select(TaskModel).where(
-            TaskModel.id == task_id,
-            TaskModel.user_id == user_id
+        result = await db_session.execute(
+            delete(TaskModel)
+            .where(TaskModel.id == task_id, visible_tasks_filter(user_id))
+            .returning(TaskModel.id)
         )
-        result = await db_session.execute(task_query)
-        task = result.scalar_one_or_none()
 
-        if task:
-            await db_session.delete(task)
-        else:
+        if result.scalar_one_or_none() is None:
             raise ValueError(f"Напоминание с ID '{task_id}' не найдено.")
 
 
-async def add_reminder(db_session: AsyncSession, date, description, user_id) -> bool:
+async def complete_tasks(db_session: AsyncSession, task_ids: list[int], user_id: int) -> int:
+    """Отмечает выбранные задачи выполненными одним UPDATE; возвращает число отмеченных.
+
+    Задачи остаются в базе до сворачивания в статистику (см. compact_completed_tasks).
+    """
+    if not task_ids:
+        return 0
+
+    async with db_session.begin():
+        result = await db_session.execute(
+            update(TaskModel)
+            .where(TaskModel.id.in_(task_ids), visible_tasks_filter(user_id), TaskModel.completed_at.is_(None))
+            .values(completed_at=get_now())
+            .returning(TaskModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        return len(result.all())
+
+
+async def add_reminder(db_session: AsyncSession, date, description, user_id, recurrence: str | None = None) -> bool:
     """Добавляет событие в базу данных."""
+    today_start = get_today_start()
+
     async with db_session.begin():
-        new_reminder = ReminderModel(date=date, description=description, user_id=user_id)
+        new_reminder = ReminderModel(
+            date=date,
+            description=description,
+            user_id=user_id,
+            recurrence=recurrence,
+            next_fire_at=next_occurrence(date, recurrence, today_start)
+        )
 
         try:
             db_session.add(new_reminder)
@@ -185,6 +616,74 @@ async def add_reminder(db_session: AsyncSession, date, description, user_id) ->
             return False
 
 
+# На сколько дней вперёд показывать события в обзоре
+UPCOMING_EVENT_DAYS = 7
+
+
+async def get_upcoming_event_counts(db_session: AsyncSession, user_id: int,
+                                    days: int = UPCOMING_EVENT_DAYS) -> list[tuple[datetime, int]]:
+    """Считает срабатывания событий пользователя по дням на days дней вперёд.
+
+    В базе хранится только ближайшее срабатывание (next_fire_at): оно считается как есть
+    (отложенное событие могло сдвинуться с даты правила), а повторяющиеся события
+    разворачиваются по правилу начиная со следующего дня.
+    """
+    today_start = get_today_start()
+    window_end = today_start + timedelta(days=days)
+
+    stmt = (
+        select(ReminderModel.date, ReminderModel.recurrence, ReminderModel.next_fire_at)
+        .where(ReminderModel.user_id == user_id, ReminderModel.next_fire_at < window_end)
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(stmt)
+        reminders = result.all()
+
+    return count_occurrences_by_day(reminders, today_start, window_end)
+
+
+def count_occurrences_by_day(reminders: list[tuple[datetime, str | None, datetime]],
+                             window_start: datetime, window_end: datetime) -> list[tuple[datetime, int]]:
+    """Считает срабатывания событий (date, recurrence, next_fire_at) по дням в промежутке [window_start, window_end)."""
+    counts = Counter()
+    for date, recurrence, next_fire_at in reminders:
+        fire_day = next_fire_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        if window_start <= fire_day < window_end:
+            counts[fire_day] += 1
+
+        # Правила не чаще раза в день: после дня next_fire_at срабатываний в этот день уже нет
+        start = max(fire_day + timedelta(days=1), window_start)
+        for occurrence in occurrences_between(date, recurrence, start, window_end):
+            counts[occurrence.replace(hour=0, minute=0, second=0, microsecond=0)] += 1
+    return sorted(counts.items())
+
+
+def format_overview(categories: list[tuple[int, str, int, bool]], events: list[tuple[datetime, int]]) -> list[str]:
+    """Форматирует обзор: задачи по категориям и события по дням."""
+    total_tasks = sum(count for _, _, count, _ in categories)
+    total_events = sum(count for _, count in events)
+    title = BOT_ANSWER["overview_title"].format(tasks=total_tasks, categories=len(categories), events=total_events)
+
+    sections = [
+        Section(
+            header="Категории",
+            lines=(f"• {format_category_name(name, is_owner)} — {count}\n" for _, name, count, is_owner in categories),
+        ),
+        Section(
+            header=f"События на {UPCOMING_EVENT_DAYS} дней",
+            lines=(f"• {day.strftime('%d.%m')} — {count}\n" for day, count in events),
+        ),
+    ]
+    return list(render_chunks(title, sections))
+
+
+def format_category_name(name: str, is_owner: bool) -> str:
+    """Название категории для списков; общие категории других пользователей отмечены значком."""
+    return escape_text(name) if is_owner else f"👥 {escape_text(name)}"
+
+
+@traced("get_reminders")
 async def get_reminders(db_session: AsyncSession, user_id: int) -> list[ReminderModel]:
     """Получает все события пользователя."""
     async with db_session.begin():
@@ -199,6 +698,97 @@ async def get_reminders(db_session: AsyncSession, user_id: int) -> list[Reminder
     return reminders
 
 
+async def advance_reminders(db_session: AsyncSession, reminders: list[ReminderModel], day_start: datetime) -> None:
+    """Переносит next_fire_at сработавших событий на следующее срабатывание одним UPDATE."""
+    if not reminders:
+        return
+
+    ids = [reminder.id for reminder in reminders]
+    next_fire_dates = [
+        next_occurrence_after_day(reminder.date, reminder.recurrence, day_start) for reminder in reminders
+    ]
+
+    async with db_session.begin():
+        await db_session.execute(
+            text(
+                "UPDATE reminders SET next_fire_at = advanced.next_fire_at "
+                "FROM unnest(CAST(:ids AS integer[]), CAST(:next_fire_dates AS timestamp[])) "
+                "AS advanced(id, next_fire_at) "
+                "WHERE reminders.id = advanced.id"
+            ),
+            {"ids": ids, "next_fire_dates": next_fire_dates}
+        )
+
+
+async def reschedule_missed_reminders(db_session: AsyncSession, user_id: int) -> None:
+    """Переносит на будущее события, пропущенные, пока пользователь был неактивен.
+
+    Вызывается внутри уже открытой транзакции.
+    """
+    today_start = get_today_start()
+    result = await db_session.execute(
+        select(ReminderModel).where(ReminderModel.user_id == user_id, ReminderModel.next_fire_at < today_start)
+    )
+    for reminder in result.scalars().all():
+        reminder.next_fire_at = next_occurrence(reminder.date, reminder.recurrence, today_start)
+
+
+def format_reminders(reminders: list[ReminderModel]) -> list[str]:
+    """Форматирует список событий и делит его на сообщения."""
+    return list(render_chunks("", [Section(None, (format_reminder_line(reminder) + "\n" for reminder in reminders))]))
+
+
+def get_reminder_display_date(reminder: ReminderModel) -> datetime:
+    """Дата события для показа: у повторяющегося — ближайшее срабатывание, а не дата первого."""
+    return reminder.next_fire_at if reminder.recurrence and reminder.next_fire_at else reminder.date
+
+
+def format_reminder_line(reminder: ReminderModel) -> str:
+    """Форматирует событие для списка: ближайшая дата, описание и повторение."""
+    date = get_reminder_display_date(reminder)
+    line = f"📅 <b>{date.strftime('%d.%m.%Y')}</b> - {escape_text(reminder.description)}"
+
+    label = get_recurrence_label(reminder.recurrence)
+    return f"{line} (🔁 {label})" if label else line
+
+
+# На сколько откладывает событие кнопка «+1 ч»
+SNOOZE_DELAY = timedelta(hours=1)
+
+
+def is_snoozed_time(fire_at: datetime) -> bool:
+    """Плановые срабатывания приходятся на полночь, отложенные кнопкой — на конкретное время."""
+    return fire_at != fire_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def get_user_reminder(db_session: AsyncSession, reminder_id: int, user_id: int) -> ReminderModel | None:
+    stmt = select(ReminderModel).where(ReminderModel.id == reminder_id, ReminderModel.user_id == user_id)
+    result = await db_session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def snooze_reminder(db_session: AsyncSession, reminder_id: int, user_id: int,
+                          fire_at: datetime) -> ReminderModel | None:
+    """Откладывает событие: следующее срабатывание переносится на fire_at."""
+    async with db_session.begin():
+        reminder = await get_user_reminder(db_session, reminder_id, user_id)
+        if reminder is not None:
+            reminder.next_fire_at = fire_at
+        return reminder
+
+
+async def acknowledge_reminder(db_session: AsyncSession, reminder_id: int, user_id: int) -> ReminderModel | None:
+    """Отмечает событие выполненным: отменяет отложенное на сегодня срабатывание."""
+    today_start = get_today_start()
+
+    async with db_session.begin():
+        reminder = await get_user_reminder(db_session, reminder_id, user_id)
+        if reminder is not None and reminder.next_fire_at is not None \
+                and reminder.next_fire_at < today_start + timedelta(days=1):
+            reminder.next_fire_at = next_occurrence_after_day(reminder.date, reminder.recurrence, today_start)
+        return reminder
+
+
 async def delete_reminder_by_id(db_session: AsyncSession, reminder_id: int, user_id: int) -> None:
     """Удаляет событие по ID для данного пользователя."""
     async with db_session.begin():
@@ -213,3 +803,176 @@ async def delete_reminder_by_id(db_session: AsyncSession, reminder_id: int, user
             await db_session.delete(reminder)
         else:
             raise ValueError(f"Напоминание с ID '{reminder_id}' не найдено.")
+
+
+# ==============================
+# Статистика выполненных задач
+# ==============================
+
+# За сколько последних недель показывать статистику
+STATS_WEEKS = 8
+
+
+async def get_completion_stats(db_session: AsyncSession, user_id: int,
+                               weeks: int = STATS_WEEKS) -> list[tuple[str, datetime, int]]:
+    """Считает выполненные задачи по категориям и неделям одним агрегирующим запросом.
+
+    Недавно выполненные задачи группируются прямо из tasks (по частичному индексу
+    ix_tasks_completed_at), а свёрнутая история берётся готовой из task_stats.
+    Фильтр по боту в частях UNION задаём явно.
+    """
+    bot_id = get_current_bot_id()
+    today_start = get_today_start()
+    since = today_start - timedelta(days=today_start.weekday() + 7 * (weeks - 1))
+    week = func.date_trunc("week", TaskModel.completed_at)
+
+    completed = union_all(
+        select(TaskModel.category_id.label("category_id"), week.label("week"), func.count().label("completed"))
+        .where(
+            TaskModel.bot_id == bot_id,
+            TaskModel.completed_at >= since,
+            visible_tasks_filter(user_id)
+        )
+        .group_by(TaskModel.category_id, week),
+        select(TaskStatsModel.category_id, TaskStatsModel.week, TaskStatsModel.completed)
+        .where(
+            TaskStatsModel.bot_id == bot_id,
+            TaskStatsModel.week >= since,
+            or_(TaskStatsModel.user_id == user_id, TaskStatsModel.category_id.in_(shared_category_ids(user_id)))
+        ),
+    ).subquery()
+
+    stmt = (
+        select(CategoryModel.name, completed.c.week, func.sum(completed.c.completed))
+        .join(completed, completed.c.category_id == CategoryModel.id)
+        .group_by(CategoryModel.id, CategoryModel.name, completed.c.week)
+        .order_by(CategoryModel.id, completed.c.week)
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(stmt)
+        return result.all()
+
+
+def format_completion_stats(rows: list[tuple[str, datetime, int]]) -> list[str]:
+    """Форматирует статистику: по категориям, в каждой — выполненные задачи по неделям."""
+    weeks_by_category: dict[str, list[tuple[datetime, int]]] = {}
+    for category_name, week, completed in rows:
+        weeks_by_category.setdefault(category_name, []).append((week, completed))
+
+    title = BOT_ANSWER["stats_title"].format(total=sum(completed for _, _, completed in rows), weeks=STATS_WEEKS)
+    sections = (
+        Section(
+            header=escape_text(category_name),
+            lines=(f"• неделя с {week.strftime('%d.%m')} — {completed}\n" for week, completed in weeks),
+        )
+        for category_name, weeks in weeks_by_category.items()
+    )
+    return list(render_chunks(title, sections))
+
+
+async def compact_completed_tasks(db_session: AsyncSession, before: datetime, batch_size: int) -> int:
+    """Сворачивает пачку выполненных до before задач в task_stats; возвращает число свёрнутых.
+
+    Удаление и прибавление к статистике — один запрос, поэтому прерванная пачка
+    не теряет и не задваивает задачи. Работает по всем ботам сразу: bot_id берётся из строк.
+    """
+    async with db_session.begin():
+        result = await db_session.execute(
+            text(
+                "WITH compacted AS ("
+                "DELETE FROM tasks WHERE id IN ("
+                "SELECT id FROM tasks WHERE completed_at < :before ORDER BY completed_at LIMIT :batch_size) "
+                "RETURNING category_id, bot_id, user_id, completed_at"
+                "), counted AS ("
+                "INSERT INTO task_stats (category_id, bot_id, user_id, week, completed) "
+                "SELECT category_id, bot_id, user_id, date_trunc('week', completed_at), count(*) "
+                "FROM compacted GROUP BY category_id, bot_id, user_id, date_trunc('week', completed_at) "
+                "ON CONFLICT (category_id, user_id, week) "
+                "DO UPDATE SET completed = task_stats.completed + excluded.completed"
+                ") SELECT count(*) FROM compacted"
+            ),
+            {"before": before, "batch_size": batch_size}
+        )
+        return result.scalar_one()
+
+
+# ==============================
+# Поиск
+# ==============================
+
+SEARCH_PAGE_SIZE = 10
+# Страница результатов — одно сообщение с кнопками листания, поэтому длина каждой части
+# ограничена так, чтобы SEARCH_PAGE_SIZE строк с заголовком уложились в лимит Telegram
+SEARCH_QUERY_LENGTH = 400
+SEARCH_CATEGORY_LENGTH = 64
+SEARCH_DESCRIPTION_LENGTH = 250
+
+
+async def search_user_items(db_session: AsyncSession, user_id: int, query: str, page: int = 0) -> tuple[list, bool]:
+    """Ищет задачи и события пользователя по полнотекстовому индексу.
+
+    Возвращает страницу результатов, отсортированных по релевантности,
+    и признак наличия следующей страницы.
+    """
+    ts_query = func.websearch_to_tsquery(literal_column("'russian'"), query)
+    # Фильтр по боту задаём явно: части UNION не проходят через общий фильтр ORM-запросов
+    bot_id = get_current_bot_id()
+    tasks_vector = TaskModel.__table__.c.search_vector
+    reminders_vector = ReminderModel.__table__.c.search_vector
+
+    tasks_stmt = (
+        select(
+            literal("task").label("kind"),
+            TaskModel.id,
+            TaskModel.description,
+            CategoryModel.name.label("category_name"),
+            null().label("date"),
+            func.ts_rank(tasks_vector, ts_query).label("rank")
+        )
+        .join(CategoryModel, TaskModel.category_id == CategoryModel.id)
+        .where(
+            TaskModel.bot_id == bot_id,
+            visible_tasks_filter(user_id),
+            TaskModel.completed_at.is_(None),
+            tasks_vector.op("@@")(ts_query)
+        )
+    )
+    reminders_stmt = (
+        select(
+            literal("reminder").label("kind"),
+            ReminderModel.id,
+            ReminderModel.description,
+            null().label("category_name"),
+            ReminderModel.date,
+            func.ts_rank(reminders_vector, ts_query).label("rank")
+        )
+        .where(ReminderModel.bot_id == bot_id, ReminderModel.user_id == user_id, reminders_vector.op("@@")(ts_query))
+    )
+
+    search_stmt = (
+        union_all(tasks_stmt, reminders_stmt)
+        .order_by(desc("rank"), "kind", "id")
+        .limit(SEARCH_PAGE_SIZE + 1)
+        .offset(page * SEARCH_PAGE_SIZE)
+    )
+
+    async with db_session.begin():
+        result = await db_session.execute(search_stmt)
+        rows = result.all()
+
+    return rows[:SEARCH_PAGE_SIZE], len(rows) > SEARCH_PAGE_SIZE
+
+
+def format_search_results(rows: list, query: str, page: int) -> str:
+    """Форматирует страницу результатов поиска."""
+    lines = []
+    for row in rows:
+        description = escape_text(row.description, SEARCH_DESCRIPTION_LENGTH)
+        if row.kind == "task":
+            lines.append(f"⏰ <b>{escape_text(row.category_name, SEARCH_CATEGORY_LENGTH)}:</b> {description}")
+        else:
+            lines.append(f"📅 <b>{row.date.strftime('%d.%m.%Y')}</b> - {description}")
+
+    title = BOT_ANSWER["search_results"].format(query=escape_text(query, SEARCH_QUERY_LENGTH), page=page + 1)
+    return title + "\n".join(lines)
@@ -1,9 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from handlers.utils import get_user_categories
+from handlers.utils import get_category_overview, get_user_categories
 from models.models import ReminderModel
-from .menu_items import menu_buttons, main_menu_buttons, category_buttons, task_buttons, reminder_buttons
+from .menu_items import (
+    menu_buttons, main_menu_buttons, category_buttons, task_buttons, reminder_buttons, digest_mode_buttons,
+    event_action_buttons, complete_task_buttons
+)
 
 
 def back_button():
@@ -54,18 +57,39 @@ main_menu_keyboard = InlineKeyboardMarkup(
 
 
 async def generate_category_keyboard(user_id, db_session: AsyncSession):
-    categories = await get_user_categories(db_session, user_id)
+    categories = await get_category_overview(db_session, user_id)
 
     category_keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
-                            [InlineKeyboardButton(text=category.name, callback_data=f"category_{category.id}")]
-                            for category in categories
+                            [InlineKeyboardButton(
+                                text=f"{name} ({count})" if is_owner else f"👥 {name} ({count})",
+                                callback_data=f"category_{category_id}"
+                            )]
+                            for category_id, name, count, is_owner in categories
                         ] + [[back_button()]]
     )
 
     return category_keyboard
 
 
+async def generate_owned_category_keyboard(user_id, db_session: AsyncSession,
+                                           callback_prefix: str = "category") -> InlineKeyboardMarkup:
+    """Генерирует клавиатуру только со своими категориями пользователя: общие чужие менять нельзя."""
+    categories = await get_user_categories(db_session, user_id)
+
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+                            [InlineKeyboardButton(text=category.name, callback_data=f"{callback_prefix}_{category.id}")]
+                            for category in categories
+                        ] + [[back_button()]]
+    )
+
+
+async def generate_share_category_keyboard(user_id, db_session: AsyncSession) -> InlineKeyboardMarkup:
+    """Генерирует клавиатуру со своими категориями пользователя: делиться можно только ими."""
+    return await generate_owned_category_keyboard(user_id, db_session, callback_prefix="share")
+
+
 async def generate_task_keyboard_for_deletion(tasks):
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -75,6 +99,24 @@ async def generate_task_keyboard_for_deletion(tasks):
     )
 
 
+def generate_complete_tasks_keyboard(tasks: list[tuple[int, str]], selected: set[int]) -> InlineKeyboardMarkup:
+    """Генерирует клавиатуру выбора задач с отметками у выбранных и кнопкой подтверждения."""
+    unchecked, checked, toggle_prefix = complete_task_buttons["toggle"]
+    confirm_text, confirm_callback = complete_task_buttons["confirm"]
+
+    rows = [
+        [InlineKeyboardButton(
+            text=f"{checked if task_id in selected else unchecked} {description}",
+            callback_data=f"{toggle_prefix}{task_id}"
+        )]
+        for task_id, description in tasks
+    ]
+    if selected:
+        rows.append([InlineKeyboardButton(text=f"{confirm_text} ({len(selected)})", callback_data=confirm_callback)])
+
+    return InlineKeyboardMarkup(inline_keyboard=rows + [[back_button()]])
+
+
 async def generate_reminder_keyboard(reminders: list[ReminderModel]) -> InlineKeyboardMarkup:
     """Генерирует клавиатуру для напоминаний."""
     keyboard = InlineKeyboardMarkup(
@@ -87,3 +129,63 @@ async def generate_reminder_keyboard(reminders: list[ReminderModel]) -> InlineKe
     )
 
     return keyboard
+
+
+def generate_search_keyboard(page: int, has_more: bool) -> InlineKeyboardMarkup:
+    """Генерирует клавиатуру для листания результатов поиска."""
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"search_page_{page - 1}"))
+    if has_more:
+        navigation.append(InlineKeyboardButton(text="Далее ➡️", callback_data=f"search_page_{page + 1}"))
+
+    return InlineKeyboardMarkup(
+        inline_keyboard=([navigation] if navigation else []) + [[back_button()]]
+    )
+
+
+def generate_digest_mode_keyboard(current_mode: str) -> InlineKeyboardMarkup:
+    """Генерирует клавиатуру выбора режима дайджеста с отметкой текущего."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+                            [InlineKeyboardButton(
+                                text=f"✅ {text}" if mode == current_mode else text,
+                                callback_data=callback
+                            )] for mode, (text, callback) in digest_mode_buttons.items()
+                        ] + [[back_button()]]
+    )
+
+
+# Больше строк с кнопками под одним уведомлением не показываем, чтобы не упереться в лимит клавиатуры
+MAX_EVENT_ACTION_ROWS = 30
+
+
+def generate_event_actions_keyboard(reminders: list[ReminderModel]) -> InlineKeyboardMarkup:
+    """Генерирует кнопки «выполнено», «+1 ч» и «завтра» для каждого события уведомления."""
+    done_text, done_prefix = event_action_buttons["done"]
+    rows = [
+        [
+            InlineKeyboardButton(
+                text=f"{done_text} {reminder.description[:40]}",
+                callback_data=f"{done_prefix}{reminder.id}"
+            ),
+            *(
+                InlineKeyboardButton(text=text, callback_data=f"{prefix}{reminder.id}")
+                for key, (text, prefix) in event_action_buttons.items() if key != "done"
+            ),
+        ]
+        for reminder in reminders[:MAX_EVENT_ACTION_ROWS]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=rows + main_menu_keyboard.inline_keyboard)
+
+
+def remove_event_actions(markup: InlineKeyboardMarkup, reminder_id: int) -> InlineKeyboardMarkup:
+    """Убирает из клавиатуры уведомления строку с кнопками события."""
+    suffix = f"_{reminder_id}"
+    return InlineKeyboardMarkup(inline_keyboard=[
+        row for row in markup.inline_keyboard
+        if not any(
+            (button.callback_data or "").startswith("event_") and button.callback_data.endswith(suffix)
+            for button in row
+        )
+    ])
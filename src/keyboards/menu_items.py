@@ -1,11 +1,15 @@
 main_menu_buttons = {
+    "overview": ("📊 Обзор", "overview_pressed"),
     "open_menu": ("❗ Открыть меню ❗", "main_menu_pressed"),
 }
 
 menu_buttons = {
+    "overview": ("📊 Обзор", "overview_pressed"),
     "categories": ("🗂 Управление категориями", "categories_pressed"),
     "tasks": ("⏰ Управление напоминаниями", "tasks_pressed"),
     "reminders": ("📅 Управление событиями", "reminders_pressed"),
+    "search": ("🔍 Поиск", "search_pressed"),
+    "digest": ("🔔 Вечерняя рассылка", "digest_settings_pressed"),
 }
 
 
@@ -13,16 +17,39 @@ category_buttons = {
     "add_category": ("➕ Новая категория", "add_category_pressed"),
     "update_category": ("✏️ Изменить категорию", "update_category_pressed"),
     "delete_category": ("🗑 Удалить категорию", "delete_category_pressed"),
+    "share_category": ("👥 Поделиться категорией", "share_category_pressed"),
 }
 
 task_buttons = {
     "get_task": ("📋 Мои напоминания", "get_task_pressed"),
     "add_task": ("➕ Новое напоминание", "add_task_pressed"),
+    "add_task_list": ("📝 Несколько напоминаний списком", "add_task_list_pressed"),
+    "complete_tasks": ("✅ Отметить выполненными", "complete_tasks_pressed"),
     "delete_task": ("🗑 Удалить напоминание", "delete_task_pressed"),
+    "stats": ("📈 Статистика выполненных", "stats_pressed"),
 }
 
 reminder_buttons = {
     "get_date": ("📅 Мои события", "get_dates_pressed"),
     "add_date": ("➕ Новое событие", "add_date"),
     "delete_date": ("🗑 Удалить событие", "delete_date_pressed"),
-}
\ No newline at end of file
+}
+
+digest_mode_buttons = {
+    "always": ("📨 Каждый день", "digest_mode_always"),
+    "changed": ("✏️ Только если список изменился", "digest_mode_changed"),
+    "weekly": ("🗓 Раз в неделю", "digest_mode_weekly"),
+}
+
+# Кнопки выбора задач для отметки выполненными; к callback_data переключателя добавляется id задачи
+complete_task_buttons = {
+    "toggle": ("⬜", "☑️", "complete_toggle_"),
+    "confirm": ("✅ Готово", "complete_confirm"),
+}
+
+# Кнопки под уведомлением о событии; к callback_data добавляется id события
+event_action_buttons = {
+    "done": ("✅", "event_done_"),
+    "hour": ("⏰ +1 ч", "event_hour_"),
+    "tomorrow": ("📅 Завтра", "event_tomorrow_"),
+}
@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from aiogram import BaseMiddleware
+
+
+class InFlightTracker:
+    """Считает выполняющиеся операции, чтобы при остановке дождаться их завершения."""
+
+    def __init__(self):
+        self._count = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        self._count += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._count -= 1
+            if self._count == 0:
+                self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Ждёт завершения всех операций не дольше timeout секунд."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Выставляется при остановке: рассылки сохраняют прогресс и прекращают работу
+shutdown_event = asyncio.Event()
+
+handlers_in_flight = InFlightTracker()
+jobs_in_flight = InFlightTracker()
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Учитывает обрабатываемые апдейты и не берёт новые после начала остановки."""
+
+    async def __call__(self, handler, event, data):
+        if shutdown_event.is_set():
+            return None
+
+        async with handlers_in_flight.track():
+            return await handler(event, data)
@@ -1,4 +1,7 @@
 MENU_COMMANDS: dict[str, str] = {
     '/start': 'Запустить бота и начать работу',
     '/help': 'Посмотреть доступные команды и возможности',
+    '/search': 'Найти напоминание или событие',
+    '/stats': 'Сколько напоминаний выполнено по неделям',
+    '/export': 'Выгрузить напоминания и события в файл',
 }
\ No newline at end of file
@@ -1,13 +1,41 @@
+import hashlib
+import json
+
 from aiogram import Bot
 from aiogram.types import BotCommand
 
+from database import get_session
+from handlers.utils import get_state_value, set_state_value
 from .menu_commands import MENU_COMMANDS
 
-async def set_main_menu(bot: Bot):
-    main_menu_commands = [
-        BotCommand(
-            command=command,
-            description=description
-        ) for command, description in MENU_COMMANDS.items()
-    ]
-    await bot.set_my_commands(main_menu_commands)
\ No newline at end of file
+MENU_COMMANDS_HASH_KEY = "menu_commands_hash:{bot_id}"
+
+
+def get_menu_commands_hash() -> str:
+    """Считает хеш текущего набора команд меню."""
+    payload = json.dumps(MENU_COMMANDS, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def set_main_menu(bot: Bot) -> bool:
+    """Регистрирует команды меню, только если MENU_COMMANDS изменились."""
+    commands_hash = get_menu_commands_hash()
+    # Команды хранятся в Telegram для каждого бота отдельно
+    hash_key = MENU_COMMANDS_HASH_KEY.format(bot_id=bot.id)
+
+    db_session = await get_session()
+    try:
+        if await get_state_value(db_session, hash_key) == commands_hash:
+            return False
+
+        main_menu_commands = [
+            BotCommand(
+                command=command,
+                description=description
+            ) for command, description in MENU_COMMANDS.items()
+        ]
+        await bot.set_my_commands(main_menu_commands)
+        await set_state_value(db_session, hash_key, commands_hash)
+        return True
+    finally:
+        await db_session.close()
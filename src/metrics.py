@@ -0,0 +1,176 @@
+import time
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramAPIError
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from sqlalchemy import event
+
+from config import METRICS_PORT
+
+# ==============================
+# Обработчики
+# ==============================
+
+HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds", "Время работы обработчика апдейта", ["handler"]
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total", "Необработанные исключения в обработчиках", ["handler"]
+)
+
+# ==============================
+# База данных
+# ==============================
+
+DB_STATEMENT_DURATION = Histogram(
+    "bot_db_statement_duration_seconds", "Время выполнения SQL-запроса", ["operation"]
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "bot_db_pool_connections", "Соединения пула по состоянию", ["state"]
+)
+DB_CIRCUIT_STATE = Gauge(
+    "bot_db_circuit_state", "Предохранитель базы: 0 — замкнут, 1 — пробный запрос, 2 — разомкнут"
+)
+OUTBOX_PENDING = Gauge(
+    "bot_outbox_pending", "Изменения, ожидающие записи в базу после её восстановления"
+)
+OUTBOX_OPERATIONS = Counter(
+    "bot_outbox_operations_total", "Изменения, прошедшие через локальный журнал", ["result"]
+)
+
+# ==============================
+# Планировщик
+# ==============================
+
+SCHEDULER_JOB_LAG = Histogram(
+    "bot_scheduler_job_lag_seconds", "Задержка запуска задачи относительно расписания", ["job"]
+)
+SCHEDULER_JOB_DURATION = Histogram(
+    "bot_scheduler_job_duration_seconds", "Время выполнения задачи планировщика", ["job", "status"],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600)
+)
+
+# ==============================
+# Bot API и рассылки
+# ==============================
+
+BOT_API_DURATION = Histogram(
+    "bot_api_request_duration_seconds", "Время запроса к Bot API", ["method"]
+)
+BOT_API_ERRORS = Counter(
+    "bot_api_errors_total", "Ошибки запросов к Bot API", ["method", "error"]
+)
+MESSAGES_SENT = Counter(
+    "bot_messages_sent_total", "Отправленные планировщиком сообщения", ["kind"]
+)
+MESSAGES_FAILED = Counter(
+    "bot_messages_failed_total", "Сообщения планировщика, которые не удалось отправить", ["kind"]
+)
+KNOWN_USER_CACHE_LOOKUPS = Counter(
+    "bot_known_user_cache_lookups_total", "Обращения к кешу известных пользователей", ["result"]
+)
+KNOWN_USER_CACHE_HIT_RATIO = Gauge(
+    "bot_known_user_cache_hit_ratio", "Доля попаданий в кеш известных пользователей с момента запуска"
+)
+KNOWN_USER_CACHE_SIZE = Gauge(
+    "bot_known_user_cache_size", "Пользователей в кеше известных пользователей"
+)
+USERS_DEACTIVATED = Counter(
+    "bot_users_deactivated_total", "Пользователи, помеченные неактивными после блокировки бота"
+)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Замеряет время работы каждого обработчика."""
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(name).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(name).observe(time.perf_counter() - start)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Замеряет время и ошибки запросов к Bot API по методам."""
+
+    async def __call__(self, make_request, bot, method):
+        name = method.__api_method__
+
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as error:
+            BOT_API_ERRORS.labels(name, type(error).__name__).inc()
+            raise
+        finally:
+            BOT_API_DURATION.labels(name).observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine) -> None:
+    """Подключает замер SQL-запросов и состояния пула."""
+    sync_engine = engine.sync_engine
+
+    def observe_statement(context, statement: str) -> None:
+        start = getattr(context, "_metrics_query_start", None)
+        if start is None:
+            return
+        context._metrics_query_start = None
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_STATEMENT_DURATION.labels(operation).observe(time.perf_counter() - start)
+
+    # Время начала хранится в контексте выполнения, а не в соединении: упавший запрос
+    # не оставляет после себя записей, которые сдвинули бы замеры следующих
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        observe_statement(context, statement)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def on_error(exception_context):
+        if exception_context.statement is not None:
+            observe_statement(exception_context.execution_context, exception_context.statement)
+
+    pool = sync_engine.pool
+    DB_POOL_CONNECTIONS.labels("size").set_function(pool.size)
+    DB_POOL_CONNECTIONS.labels("checked_in").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels("checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels("overflow").set_function(pool.overflow)
+
+
+def instrument_scheduler(scheduler) -> None:
+    """Подключает замер задержки и длительности задач APScheduler."""
+    started_jobs: dict[str, tuple[str, float]] = {}
+
+    def on_job_event(job_event):
+        if job_event.code == EVENT_JOB_SUBMITTED:
+            job = scheduler.get_job(job_event.job_id)
+            name = job.name if job else job_event.job_id
+            lag = time.time() - job_event.scheduled_run_times[0].timestamp()
+            SCHEDULER_JOB_LAG.labels(name).observe(max(lag, 0))
+            started_jobs[job_event.job_id] = (name, time.perf_counter())
+            return
+
+        name, start = started_jobs.pop(job_event.job_id, (job_event.job_id, None))
+        if start is not None:
+            status = "error" if job_event.code == EVENT_JOB_ERROR else "ok"
+            SCHEDULER_JOB_DURATION.labels(name, status).observe(time.perf_counter() - start)
+
+    scheduler.add_listener(on_job_event, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
+
+def start_metrics_server() -> None:
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
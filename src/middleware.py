@@ -1,10 +1,39 @@
+import logging
+import time
+
 from aiogram import BaseMiddleware
 from database import get_session
+from src.models.bot_scope import bot_scope
+from tracing import start_span
+
+logger = logging.getLogger(__name__)
 
 
 class DatabaseSessionMiddleware(BaseMiddleware):
     async def __call__(self, handler, event, data):
-        session = await get_session()
-        async with session as db_session:
-            data['db_session'] = db_session
+        with start_span("middleware DatabaseSessionMiddleware"):
+            session = await get_session()
+            async with session as db_session:
+                data['db_session'] = db_session
+                return await handler(event, data)
+
+
+class BotScopeMiddleware(BaseMiddleware):
+    """Обрабатывает апдейт в контексте бота, который его получил: запросы видят только его данные."""
+
+    async def __call__(self, handler, event, data):
+        with bot_scope(data["bot"].id):
             return await handler(event, data)
+
+
+class FirstUpdateTimingMiddleware(BaseMiddleware):
+    """Один раз логирует время от запуска процесса до первого апдейта."""
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+
+    async def __call__(self, handler, event, data):
+        if self.started_at is not None:
+            logger.info("Первый апдейт получен через %.3f с после запуска", time.perf_counter() - self.started_at)
+            self.started_at = None
+        return await handler(event, data)
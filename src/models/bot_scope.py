@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+# Бот, в рамках которого идёт обработка апдейта или задачи планировщика.
+# Один процесс обслуживает несколько ботов, и данные каждого из них изолированы по bot_id.
+current_bot_id: ContextVar[int | None] = ContextVar("current_bot_id", default=None)
+
+
+class BotScoped:
+    """Модели, строки которых принадлежат одному боту (колонка bot_id)."""
+
+
+def get_current_bot_id() -> int:
+    bot_id = current_bot_id.get()
+    if bot_id is None:
+        raise RuntimeError("Запрос к данным бота вне контекста бота (см. bot_scope)")
+    return bot_id
+
+
+@contextmanager
+def bot_scope(bot_id: int) -> Iterator[None]:
+    """Выполняет блок в контексте бота: запросы видят только его строки."""
+    token = current_bot_id.set(bot_id)
+    try:
+        yield
+    finally:
+        current_bot_id.reset(token)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def scope_to_current_bot(execute_state) -> None:
+    """Добавляет bot_id = текущий бот ко всем ORM-запросам к моделям BotScoped.
+
+    Вне контекста бота (служебные задачи, которые сами раскладывают строки по ботам)
+    фильтр не добавляется.
+    """
+    bot_id = current_bot_id.get()
+    if bot_id is None or execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(BotScoped, lambda cls: cls.bot_id == bot_id, include_aliases=True)
+    )
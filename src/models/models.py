@@ -1,52 +1,209 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, func, BigInteger
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, func, BigInteger, Index, text, Boolean
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, ForeignKeyConstraint
+
+from .bot_scope import BotScoped, get_current_bot_id
 
 Base = declarative_base()
 
-class UserModel(Base):
+
+def bot_id_column(**kwargs) -> Column:
+    # Telegram ID бота, которому принадлежит строка; при вставке берётся из текущего контекста бота
+    return Column(BigInteger, nullable=False, default=get_current_bot_id, **kwargs)
+
+
+def user_foreign_key() -> ForeignKeyConstraint:
+    return ForeignKeyConstraint(["bot_id", "user_id"], ["users.bot_id", "users.user_id"])
+
+
+class UserModel(BotScoped, Base):
     __tablename__ = "users"
 
-    user_id = Column(BigInteger, primary_key=True, nullable=False, unique=True)
+    # Один и тот же человек в разных ботах — разные пользователи
+    bot_id = bot_id_column(primary_key=True)
+    user_id = Column(BigInteger, primary_key=True, nullable=False)
     username = Column(String, nullable=True)
+    # Когда присылать вечерний дайджест: always, changed (только при изменениях) или weekly
+    digest_mode = Column(String, nullable=False, server_default="always")
+    # Отпечаток задач в последнем отправленном дайджесте и время отправки
+    digest_fingerprint = Column(String, nullable=True)
+    digest_sent_at = Column(TIMESTAMP, nullable=True)
+    # False, если пользователь заблокировал бота; снова True после /start
+    is_active = Column(Boolean, nullable=False, server_default=text("true"))
 
     categories = relationship("CategoryModel", back_populates="user")
     tasks = relationship("TaskModel", back_populates="user")
     reminders = relationship("ReminderModel", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Рассылки перебирают только активных пользователей бота по возрастанию user_id
+        Index('ix_users_bot_id_user_id_active', 'bot_id', 'user_id', postgresql_where=text('is_active')),
+    )
+
 
-class CategoryModel(Base):
+class CategoryModel(BotScoped, Base):
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
-    user_id = Column(BigInteger, ForeignKey("users.user_id"), nullable=False)
+    bot_id = bot_id_column()
+    # Владелец категории; участники общей категории — в category_members
+    user_id = Column(BigInteger, nullable=False)
+    # Код приглашения в общую категорию (/start join_<код>); создаётся, когда владелец делится категорией
+    invite_code = Column(String, nullable=True, unique=True)
 
     user = relationship("UserModel", back_populates="categories")
     tasks = relationship("TaskModel", back_populates="category", cascade="all, delete-orphan")
 
-    __table_args__ = (UniqueConstraint('user_id', 'name', name='uq_user_category_name'),)
+    __table_args__ = (
+        user_foreign_key(),
+        UniqueConstraint('bot_id', 'user_id', 'name', name='uq_user_category_name'),
+    )
 
 
-class TaskModel(Base):
+class CategoryMemberModel(BotScoped, Base):
+    __tablename__ = "category_members"
+
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    bot_id = bot_id_column()
+    user_id = Column(BigInteger, primary_key=True)
+    joined_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        user_foreign_key(),
+        # Общие категории, в которых состоит пользователь
+        Index('ix_category_members_bot_id_user_id', 'bot_id', 'user_id'),
+    )
+
+
+class TaskModel(BotScoped, Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     description = Column(String, nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
-    user_id = Column(BigInteger, ForeignKey("users.user_id"), nullable=False)
+    bot_id = bot_id_column()
+    user_id = Column(BigInteger, nullable=False)
+    # Когда задачу отметили выполненной; NULL — задача активна
+    completed_at = Column(TIMESTAMP, nullable=True)
+    # to_tsvector('russian', description); заполняется триггером set_search_vector, см. ревизию 7f3b2d9e1c85
+    search_vector = Column(TSVECTOR, nullable=True)
 
     category = relationship("CategoryModel", back_populates="tasks")
     user = relationship("UserModel", back_populates="tasks")
 
-
-class ReminderModel(Base):
+    __table_args__ = (
+        user_foreign_key(),
+        # Подсчёт задач по категориям (обзор); строится онлайн-миграцией, см. backfill/steps.py
+        Index('ix_tasks_user_id_category_id', 'user_id', 'category_id'),
+        # Задачи общих категорий для участников; строится онлайн-миграцией
+        Index('ix_tasks_category_id', 'category_id'),
+        # Поиск; строится онлайн-миграцией
+        Index('ix_tasks_user_id_search_vector', 'user_id', 'search_vector', postgresql_using='gin'),
+        # Частичные индексы только по активным задачам: выполненные не замедляют списки,
+        # обзор, дайджест и поиск. Строятся онлайн-миграцией
+        Index('ix_tasks_active_user_id_category_id', 'user_id', 'category_id',
+              postgresql_where=text('completed_at IS NULL')),
+        Index('ix_tasks_active_category_id', 'category_id', postgresql_where=text('completed_at IS NULL')),
+        Index('ix_tasks_active_user_id_search_vector', 'user_id', 'search_vector', postgresql_using='gin',
+              postgresql_where=text('completed_at IS NULL')),
+        # Выполненные задачи для статистики и сворачивания истории
+        Index('ix_tasks_completed_at', 'completed_at', postgresql_where=text('completed_at IS NOT NULL')),
+    )
+    # Колонка нужна только для поиска в SQL, в ORM-объекты её не загружаем
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
+
+class TaskStatsModel(BotScoped, Base):
+    """Свёрнутая история: число выполненных задач категории за неделю.
+
+    Выполненные задачи старше TASK_HISTORY_DAYS удаляются из tasks и прибавляются сюда
+    (см. compact_completed_tasks), поэтому /stats не зависит от размера истории.
+    """
+    __tablename__ = "task_stats"
+
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    bot_id = bot_id_column()
+    # Автор задач, как в tasks.user_id
+    user_id = Column(BigInteger, primary_key=True)
+    # Начало недели (понедельник), date_trunc('week', completed_at)
+    week = Column(TIMESTAMP, primary_key=True)
+    completed = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        user_foreign_key(),
+    )
+
+
+class ReminderModel(BotScoped, Base):
     __tablename__ = "reminders"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     date = Column(TIMESTAMP, nullable=False)
     description = Column(String, nullable=False)
-    user_id = Column(BigInteger, ForeignKey("users.user_id"), nullable=False)
+    bot_id = bot_id_column()
+    user_id = Column(BigInteger, nullable=False)
+    # daily, weekly, monthly, yearly или строка RRULE; NULL — разовое событие
+    recurrence = Column(String, nullable=True)
+    # Ближайшее срабатывание; NULL, когда срабатываний больше не будет
+    next_fire_at = Column(TIMESTAMP, nullable=True)
+    # to_tsvector('russian', description); заполняется триггером set_search_vector, см. ревизию 7f3b2d9e1c85
+    search_vector = Column(TSVECTOR, nullable=True)
 
     user = relationship("UserModel", back_populates="reminders")
+
+    __table_args__ = (
+        user_foreign_key(),
+        Index('ix_reminders_user_id_search_vector', 'user_id', 'search_vector', postgresql_using='gin'),
+        Index('ix_reminders_next_fire_at', 'next_fire_at', postgresql_where=text('next_fire_at IS NOT NULL')),
+    )
+    # Колонка нужна только для поиска в SQL, в ORM-объекты её не загружаем
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
+
+class BotStateModel(Base):
+    __tablename__ = "bot_state"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class BroadcastModel(BotScoped, Base):
+    __tablename__ = "broadcasts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bot_id = bot_id_column()
+    text = Column(String, nullable=False)
+    # running, paused, cancelled или done
+    status = Column(String, nullable=False, server_default="running")
+    # Последний обработанный пользователь: после паузы или перезапуска рассылка продолжается с него
+    last_user_id = Column(BigInteger, nullable=True)
+    sent = Column(Integer, nullable=False, server_default="0")
+    failed = Column(Integer, nullable=False, server_default="0")
+    unreachable = Column(Integer, nullable=False, server_default="0")
+    created_by = Column(BigInteger, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class AppliedOperationModel(Base):
+    __tablename__ = "applied_operations"
+
+    # Идентификатор изменения из локального журнала: повторное применение после сбоя пропускается
+    op_id = Column(String, primary_key=True)
+    applied_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+
+class BackfillProgressModel(Base):
+    __tablename__ = "backfill_progress"
+
+    # Имя шага онлайн-миграции (см. src/backfill/steps.py)
+    name = Column(String, primary_key=True)
+    # Последний обработанный ключ: после остановки заполнение продолжается с него
+    last_key = Column(BigInteger, nullable=True)
+    rows = Column(BigInteger, nullable=False, server_default="0")
+    done = Column(Boolean, nullable=False, server_default=text("false"))
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
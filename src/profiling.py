@@ -0,0 +1,132 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from aiogram import BaseMiddleware
+from sqlalchemy import event
+
+from config import PROFILE_SAMPLE_RATE, PROFILE_N_PLUS_ONE_THRESHOLD, PROFILE_SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|\b\d+(?:\.\d+)?\b")
+_VALUES_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass
+class QueryProfile:
+    """Статистика запросов в рамках одного апдейта или задачи планировщика."""
+    name: str
+    statements: int = 0
+    db_time: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+
+current_profile: ContextVar[QueryProfile | None] = ContextVar("current_profile", default=None)
+
+
+def normalize_sql(statement: str) -> str:
+    """Приводит запрос к форме без литералов, параметров и длины IN-списков."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _VALUES_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def report_profile(profile: QueryProfile, elapsed: float) -> None:
+    if not profile.statements:
+        return
+
+    logger.info(
+        "Профиль %s: %s запросов, БД %.1f мс из %.1f мс",
+        profile.name, profile.statements, profile.db_time * 1000, elapsed * 1000
+    )
+    for shape, count in profile.shapes.most_common():
+        if count < PROFILE_N_PLUS_ONE_THRESHOLD:
+            break
+        logger.warning("Возможный N+1 в %s: %s раз %s", profile.name, count, shape)
+
+
+@asynccontextmanager
+async def profile_queries(name: str) -> AsyncIterator[QueryProfile | None]:
+    """Считает запросы внутри блока, если он попал в выборку PROFILE_SAMPLE_RATE."""
+    if random.random() >= PROFILE_SAMPLE_RATE:
+        yield None
+        return
+
+    profile = QueryProfile(name)
+    token = current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+        report_profile(profile, time.perf_counter() - start)
+
+
+def install_query_profiler(engine) -> None:
+    """Подключает профилировщик и лог медленных запросов к движку."""
+    sync_engine = engine.sync_engine
+
+    def record_statement(context, statement: str) -> None:
+        start = getattr(context, "_profiling_query_start", None)
+        if start is None:
+            return
+        context._profiling_query_start = None
+        elapsed = time.perf_counter() - start
+        profile = current_profile.get()
+
+        if profile is not None:
+            profile.statements += 1
+            profile.db_time += elapsed
+            profile.shapes[normalize_sql(statement)] += 1
+
+        if PROFILE_SLOW_QUERY_MS and elapsed * 1000 >= PROFILE_SLOW_QUERY_MS:
+            logger.warning(
+                "Медленный запрос (%.1f мс, %s): %s",
+                elapsed * 1000, profile.name if profile else "-", normalize_sql(statement)
+            )
+
+    # Время начала хранится в контексте выполнения: упавший запрос закрывается в handle_error
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiling_query_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_statement(context, statement)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def on_error(exception_context):
+        if exception_context.statement is not None:
+            record_statement(exception_context.execution_context, exception_context.statement)
+
+
+def describe_update(update) -> str:
+    """Короткое имя апдейта для логов без пользовательских данных."""
+    if update.callback_query and update.callback_query.data:
+        return f"callback {_DIGITS.sub('?', update.callback_query.data)}"
+    if update.message and update.message.text and update.message.text.startswith("/"):
+        return f"command {update.message.text.split()[0]}"
+    return update.event_type
+
+
+class QueryProfilerMiddleware(BaseMiddleware):
+    """Профилирует запросы каждого апдейта из выборки."""
+
+    async def __call__(self, handler, event, data):
+        if not PROFILE_SAMPLE_RATE:
+            return await handler(event, data)
+
+        async with profile_queries(describe_update(event)):
+            return await handler(event, data)
@@ -0,0 +1,306 @@
+import asyncio
+import functools
+import json
+import logging
+import random
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import aiohttp
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from sqlalchemy import event
+
+from config import TRACE_EXPORT_PATH, TRACE_OTLP_ENDPOINT, TRACE_SLOW_MS, TRACE_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "remember_me_bot"
+
+TRACING_ENABLED = bool(TRACE_EXPORT_PATH or TRACE_OTLP_ENDPOINT)
+
+EXPORT_BATCH_SIZE = 100
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+
+@dataclass
+class Trace:
+    trace_id: str = field(default_factory=lambda: secrets.token_hex(16))
+    spans: list[Span] = field(default_factory=list)
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _new_span(trace: Trace, name: str, attributes: dict) -> Span:
+    parent = current_span.get()
+    span = Span(
+        name=name,
+        trace_id=trace.trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+    trace.spans.append(span)
+    return span
+
+
+@contextmanager
+def start_span(name: str, **attributes) -> Iterator[Span | None]:
+    """Открывает дочерний спан текущей трассы; вне трассы ничего не делает."""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    span = _new_span(trace, name, attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as error:
+        span.error = type(error).__name__
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        current_span.reset(token)
+
+
+def traced(name: str):
+    """Оборачивает функцию (обычную или корутину) в спан."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# ==============================
+# Экспорт
+# ==============================
+
+def _to_otlp_span(span: Span) -> dict:
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": [
+            {"key": key, "value": {"stringValue": str(value)}} for key, value in span.attributes.items()
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        otlp_span["parentSpanId"] = span.parent_id
+    return otlp_span
+
+
+def to_otlp(traces: list[Trace]) -> dict:
+    """Собирает трассы в тело запроса OTLP/HTTP JSON."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": SERVICE_NAME},
+                "spans": [_to_otlp_span(span) for trace in traces for span in trace.spans],
+            }],
+        }]
+    }
+
+
+class TraceExporter:
+    """Копит отобранные трассы и выгружает их пачками в фоне."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[Trace] = asyncio.Queue(maxsize=10_000)
+        self._task: asyncio.Task | None = None
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except asyncio.QueueFull:
+            logger.warning("Очередь трасс переполнена, трасса %s отброшена", trace.trace_id)
+
+    def start(self) -> None:
+        if TRACING_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        while traces := self._drain():
+            await self._flush(traces)
+
+    def _drain(self) -> list[Trace]:
+        traces = []
+        while not self._queue.empty() and len(traces) < EXPORT_BATCH_SIZE:
+            traces.append(self._queue.get_nowait())
+        return traces
+
+    async def _run(self) -> None:
+        while True:
+            traces = [await self._queue.get()] + self._drain()
+            try:
+                await self._flush(traces)
+            except Exception:
+                logger.exception("Не удалось выгрузить %s трасс", len(traces))
+
+    async def _flush(self, traces: list[Trace]) -> None:
+        if not traces:
+            return
+
+        payload = to_otlp(traces)
+        if TRACE_EXPORT_PATH:
+            await asyncio.to_thread(self._write_file, json.dumps(payload, ensure_ascii=False))
+        if TRACE_OTLP_ENDPOINT:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(TRACE_OTLP_ENDPOINT, json=payload) as response:
+                    response.raise_for_status()
+
+    @staticmethod
+    def _write_file(line: str) -> None:
+        with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+trace_exporter = TraceExporter()
+
+
+def should_keep(root: Span) -> bool:
+    """Хвостовая выборка: медленные и упавшие апдейты сохраняются всегда."""
+    return root.error is not None or root.duration_ms >= TRACE_SLOW_MS or random.random() < TRACE_SAMPLE_RATE
+
+
+# ==============================
+# Точки подключения
+# ==============================
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """Создаёт трассу на каждый апдейт."""
+
+    async def __call__(self, handler, event, data):
+        if not TRACING_ENABLED:
+            return await handler(event, data)
+
+        trace = Trace()
+        trace_token = current_trace.set(trace)
+        try:
+            with start_span(f"update {event.event_type}", update_id=event.update_id) as root:
+                return await handler(event, data)
+        finally:
+            current_trace.reset(trace_token)
+            if should_keep(root):
+                trace_exporter.submit(trace)
+
+
+class FSMTracingMiddleware(BaseMiddleware):
+    """Выполняет FSM-middleware диспетчера и оборачивает в спан разрешение состояния.
+
+    Спан закрывается, когда состояние получено и апдейт передан дальше, поэтому
+    в него попадают ожидание блокировки FSM и get_state, но не сам обработчик.
+    """
+
+    def __init__(self, fsm: BaseMiddleware):
+        self.fsm = fsm
+
+    async def __call__(self, handler, event, data):
+        trace = current_trace.get()
+        if trace is None:
+            return await self.fsm(handler, event, data)
+
+        span = _new_span(trace, "fsm", {})
+
+        async def state_resolved(event, data):
+            span.end_ns = time.time_ns()
+            if data.get("raw_state") is not None:
+                span.attributes["fsm.state"] = data["raw_state"]
+            return await handler(event, data)
+
+        try:
+            return await self.fsm(state_resolved, event, data)
+        except BaseException as error:
+            if span.end_ns is None:
+                span.error = type(error).__name__
+                span.end_ns = time.time_ns()
+            raise
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """Оборачивает обработчик в спан."""
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+
+        with start_span(f"handler {name}"):
+            return await handler(event, data)
+
+
+class BotApiTracingMiddleware(BaseRequestMiddleware):
+    """Оборачивает запросы к Bot API в спаны."""
+
+    async def __call__(self, make_request, bot, method):
+        with start_span(f"bot_api {method.__api_method__}"):
+            return await make_request(bot, method)
+
+
+def install_db_tracing(engine) -> None:
+    """Добавляет в текущую трассу спан на каждый SQL-запрос."""
+    sync_engine = engine.sync_engine
+
+    # Спан хранится в контексте выполнения: упавший запрос закрывается в handle_error с ошибкой
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = current_trace.get()
+        if trace is not None and context is not None:
+            context._tracing_span = _new_span(trace, "db", {"db.statement": statement})
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        end_db_span(context)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def on_error(exception_context):
+        end_db_span(exception_context.execution_context, type(exception_context.original_exception).__name__)
+
+
+def end_db_span(context, error: str | None = None) -> None:
+    span = getattr(context, "_tracing_span", None)
+    if span is None:
+        return
+    context._tracing_span = None
+    span.error = error
+    span.end_ns = time.time_ns()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Код бота, как и в Dockerfile, ожидает src в PYTHONPATH, а модели импортируются как src.models
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+for path in (ROOT_DIR, SRC_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Движок базы создаётся при импорте database.py; тесты к PostgreSQL не подключаются
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
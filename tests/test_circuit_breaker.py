@@ -0,0 +1,60 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, install_circuit_breaker
+
+RESET_TIMEOUT = 0.05
+
+
+@pytest.fixture
+def breaker_and_engine():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    # NullPool открывает новое соединение на каждый запрос: срабатывают и do_connect, и checkout
+    engine = create_engine("sqlite://", poolclass=NullPool)
+    install_circuit_breaker(SimpleNamespace(sync_engine=engine), breaker)
+    yield breaker, engine
+    engine.dispose()
+
+
+def execute_select(engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def test_open_breaker_rejects_connections(breaker_and_engine):
+    breaker, engine = breaker_and_engine
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        execute_select(engine)
+    assert breaker.state == "open"
+
+
+def test_breaker_closes_after_successful_trial(breaker_and_engine):
+    breaker, engine = breaker_and_engine
+    breaker.record_failure()
+    time.sleep(RESET_TIMEOUT * 2)
+
+    execute_select(engine)
+    assert breaker.state == "closed"
+
+    execute_select(engine)
+    assert breaker.state == "closed"
+
+
+def test_trial_rejects_other_connections_until_it_finishes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    breaker.record_failure()
+    time.sleep(RESET_TIMEOUT * 2)
+
+    assert breaker.check() is True
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
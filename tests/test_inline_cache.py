@@ -0,0 +1,43 @@
+from handlers.inline_cache import InlineItem, InlineResultCache
+from src.models.bot_scope import bot_scope
+
+ITEMS = [
+    InlineItem(kind="task", id=1, title="Купить молоко", description="Дом"),
+    InlineItem(kind="task", id=2, title="Отчёт", description="Работа"),
+]
+
+
+def test_longer_query_reuses_shorter_one():
+    cache = InlineResultCache(ttl=60, max_size=10)
+    cache.set(1, "", ITEMS)
+
+    assert cache.get(1, "мол") == [ITEMS[0]]
+    assert cache.get(1, "работ") == [ITEMS[1]]
+
+
+def test_disabled_cache_returns_nothing():
+    for cache in (InlineResultCache(ttl=0, max_size=10), InlineResultCache(ttl=60, max_size=0)):
+        cache.set(1, "", ITEMS)
+        assert cache.get(1, "") is None
+
+
+def test_invalidate_drops_only_that_user():
+    cache = InlineResultCache(ttl=60, max_size=10)
+    cache.set(1, "", ITEMS)
+    cache.set(2, "", ITEMS)
+
+    cache.invalidate(1)
+
+    assert cache.get(1, "") is None
+    assert cache.get(2, "") == ITEMS
+
+
+def test_entries_are_separate_per_bot():
+    cache = InlineResultCache(ttl=60, max_size=10)
+    with bot_scope(100):
+        cache.set(1, "", ITEMS)
+
+    with bot_scope(200):
+        assert cache.get(1, "") is None
+    with bot_scope(100):
+        assert cache.get(1, "") == ITEMS
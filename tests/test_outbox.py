@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from circuit_breaker import CircuitOpenError
+from handlers import outbox
+from handlers.outbox import WRITE_DEFERRED, WriteOutbox, current_operation_id, submit_write
+from src.models.bot_scope import bot_scope
+from src.models.models import AppliedOperationModel
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    journal = WriteOutbox(str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(outbox, "write_outbox", journal)
+    yield journal
+    asyncio.run(journal.stop())
+
+
+def test_direct_write_records_op_id_in_its_transaction():
+    engine = create_engine("sqlite://")
+    AppliedOperationModel.__table__.create(engine)
+
+    token = current_operation_id.set("op-1")
+    try:
+        with Session(engine) as session, session.begin():
+            pass
+        # op_id записывается только при первой фиксации
+        with Session(engine) as session, session.begin():
+            pass
+    finally:
+        current_operation_id.reset(token)
+
+    with Session(engine) as session:
+        assert session.scalars(select(AppliedOperationModel.op_id)).all() == ["op-1"]
+
+
+def test_failed_write_is_journaled_under_the_same_op_id(journal):
+    seen_op_ids = []
+
+    async def write():
+        seen_op_ids.append(current_operation_id.get())
+        raise CircuitOpenError("База данных недоступна")
+
+    async def run():
+        with bot_scope(100):
+            result = await submit_write("add_category", 1, {"name": "Дом"}, write)
+        return result, await journal.read(10)
+
+    result, operations = asyncio.run(run())
+
+    assert result is WRITE_DEFERRED
+    assert [operation.op_id for operation in operations] == seen_op_ids
+    assert current_operation_id.get() is None
+
+
+def test_pending_journal_keeps_later_writes_in_order(journal):
+    async def write():
+        raise AssertionError("при неприменённом журнале запись в базу не делается")
+
+    async def run():
+        with bot_scope(100):
+            await journal.append("first", "add_category", 100, 1, {"name": "Дом"})
+            result = await submit_write("add_category", 1, {"name": "Работа"}, write)
+        return result, await journal.read(10)
+
+    result, operations = asyncio.run(run())
+
+    assert result is WRITE_DEFERRED
+    assert [operation.payload["name"] for operation in operations] == ["Дом", "Работа"]
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from handlers.recurrence import occurrences_between, parse_recurrence, next_occurrence
+from handlers.utils import count_occurrences_by_day
+
+TODAY = datetime(2026, 10, 19)
+WEEK_END = TODAY + timedelta(days=7)
+
+
+def test_occurrences_between_expands_daily_rule_over_window():
+    occurrences = occurrences_between(datetime(2026, 1, 1), "daily", TODAY, WEEK_END)
+
+    assert occurrences == [TODAY + timedelta(days=day) for day in range(7)]
+
+
+def test_occurrences_between_excludes_window_end():
+    assert occurrences_between(WEEK_END, None, TODAY, WEEK_END) == []
+    assert occurrences_between(datetime(2025, 10, 26), "yearly", TODAY, WEEK_END) == []
+
+
+def test_occurrences_between_skips_rules_finer_than_daily():
+    assert occurrences_between(TODAY, "RRULE:FREQ=HOURLY", TODAY, WEEK_END) == []
+    assert next_occurrence(TODAY, "RRULE:FREQ=HOURLY", TODAY) is None
+
+
+def test_parse_recurrence_normalizes_utc_until():
+    rule = parse_recurrence("RRULE:FREQ=WEEKLY;UNTIL=20261231T210000Z")
+
+    assert rule == "RRULE:FREQ=WEEKLY;UNTIL=20270101T000000"
+
+
+def test_parse_recurrence_rejects_hourly_rule():
+    with pytest.raises(ValueError):
+        parse_recurrence("RRULE:FREQ=HOURLY")
+
+
+def test_snoozed_one_off_event_is_counted_on_its_new_day():
+    tomorrow = TODAY + timedelta(days=1)
+
+    counts = count_occurrences_by_day([(TODAY, None, tomorrow + timedelta(hours=1))], TODAY, WEEK_END)
+
+    assert counts == [(tomorrow, 1)]
+
+
+def test_snoozed_daily_event_keeps_todays_occurrence():
+    counts = count_occurrences_by_day([(datetime(2026, 1, 1), "daily", TODAY + timedelta(hours=1))], TODAY, WEEK_END)
+
+    assert counts == [(TODAY + timedelta(days=day), 1) for day in range(7)]
@@ -0,0 +1,41 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from handlers.rendering import Section, TELEGRAM_MESSAGE_LIMIT, escape_text, render_chunks
+from handlers.utils import SEARCH_PAGE_SIZE, format_search_results
+
+
+def test_escape_text_does_not_cut_entities():
+    escaped = escape_text("&" * 10, max_length=8)
+
+    assert escaped == "&amp;…"
+
+
+def test_render_chunks_fits_long_header_and_line():
+    sections = [Section(escape_text("&" * 3000), [escape_text("<" * 3000) + "\n"])]
+
+    chunks = list(render_chunks("T\n", sections))
+
+    assert chunks and all(len(chunk) <= TELEGRAM_MESSAGE_LIMIT for chunk in chunks)
+
+
+def test_render_chunks_repeats_header_when_section_is_split():
+    lines = [f"{index}. {'x' * 40}\n" for index in range(20)]
+
+    chunks = list(render_chunks("Заголовок\n", [Section("Работа", lines)], limit=300))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert all("<b>Работа (продолжение):</b>" in chunk for chunk in chunks[1:])
+    assert sum(chunk.count("x" * 40) for chunk in chunks) == len(lines)
+
+
+def test_search_page_with_long_matches_fits_message_limit():
+    rows = [
+        SimpleNamespace(kind="task", description="<" * 4096, category_name="&" * 255, date=None)
+        for _ in range(SEARCH_PAGE_SIZE - 1)
+    ] + [SimpleNamespace(kind="event", description="&" * 4096, category_name=None, date=datetime(2026, 10, 19))]
+
+    text = format_search_results(rows, "&" * 200, page=0)
+
+    assert len(text) <= TELEGRAM_MESSAGE_LIMIT
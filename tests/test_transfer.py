@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from handlers.transfer import ImportRowError, iter_csv_lines
+
+
+async def iterate(lines: list[str]):
+    for line in lines:
+        yield line
+
+
+def read_records(text: str) -> list[tuple[int, list[str]]]:
+    async def collect():
+        return [record async for record in iter_csv_lines(iterate(text.split("\n")))]
+
+    return asyncio.run(collect())
+
+
+def test_quote_inside_unquoted_field_is_literal():
+    records = read_records('type,description,category\ntask,Монитор 27" новый,Работа\n')
+
+    assert records == [(1, ["type", "description", "category"]), (2, ["task", 'Монитор 27" новый', "Работа"])]
+
+
+def test_quoted_field_spans_several_lines():
+    records = read_records('type,description\ntask,"первая\nвторая ""в кавычках""\n\nтретья"\ntask,дальше')
+
+    assert records == [
+        (1, ["type", "description"]),
+        (2, ["task", 'первая\nвторая "в кавычках"\n\nтретья']),
+        (6, ["task", "дальше"]),
+    ]
+
+
+def test_unclosed_quote_reports_row_number():
+    with pytest.raises(ImportRowError, match="строка 2"):
+        read_records('type,description\ntask,a b"c,"d\ntask,e')
+
+
+def test_delimiter_is_taken_from_header():
+    records = read_records('type;description\ntask;"a, b"')
+
+    assert records[1] == (2, ["task", "a, b"])